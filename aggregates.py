@@ -0,0 +1,311 @@
+"""
+Aggregates - sum, mean, variance, min/max, percentiles and a histogram in one pass
+
+Aggregate summarises a sequence or stream of numbers without keeping it:
+
+- sum: Neumaier (improved Kahan) compensated summation, so adding a million
+  values loses no more precision than adding a few.
+- mean and variance: Welford's running mean and sum of squared deviations.
+  update() takes values a chunk at a time; each chunk is summarised exactly
+  (math.fsum, then a second pass over the chunk for the deviations) and
+  folded in with Chan's parallel formulas.
+- percentiles and histogram: a QuantileSketch (the KLL algorithm), a few
+  hundred representative values whose ranks are within about 1% of the true
+  ones, however many values went in.
+
+Every part can be merged, so a large input can be split into chunks that are
+summarised in parallel (e.g. in worker processes) and combined with merge().
+
+    total = Aggregate()
+    total.update(values)
+    total.mean, total.stddev(), total.percentile(99)
+"""
+
+import itertools
+import math
+import random
+
+from operations import InputError
+
+# Quantile sketch size: rank error ~1%, memory ~3 * k values
+DEFAULT_SKETCH_SIZE = 200
+DEFAULT_PERCENTILES = (50, 90, 99)
+DEFAULT_BINS = 10
+# Largest histogram, and most percentiles, one summary may ask for
+MAX_BINS = 10000
+MAX_PERCENTILES = 100
+# Values summarised at a time by update()
+CHUNK_SIZE = 4096
+
+
+def parse_value(value):
+    """Turn a number or numeric text (str or bytes) into a finite float."""
+    if isinstance(value, bool):
+        raise InputError("Values must be numbers")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise InputError(f"Not a number: {value!r}")
+    if not math.isfinite(number):
+        raise InputError(f"Values must be finite: {value!r}")
+    return number
+
+
+class QuantileSketch:
+    """Mergeable quantile estimates with a bounded rank error (the KLL sketch).
+
+    Values are kept in a stack of compactors; level h holds items that each
+    stand for 2**h values. When the sketch is full, a level is sorted and
+    every other item (odd or even positions, at random) moves up one level,
+    so memory stays around 3 * k items however many values are added. With
+    the default k = 200, a quantile's rank is typically within 1% of the
+    truth. The coin flips come from a seeded generator, so the same input
+    gives the same estimates every time.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=0):
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically less room than the top one
+        height = len(self.compactors)
+        return int(math.ceil(self.k * (2 / 3) ** (height - level - 1))) + 1
+
+    def _update_sizes(self):
+        self._size = sum(len(items) for items in self.compactors)
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._size >= self._max_size:
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    # Pairs of items move up as one; an odd one out stays behind
+                    # so the weights still add up to count
+                    keep = items[-1:] if len(items) % 2 else []
+                    pairs = items[:len(items) - len(keep)]
+                    self.compactors[level + 1].extend(pairs[self._random.random() < 0.5::2])
+                    self.compactors[level] = keep
+                    break
+            self._update_sizes()
+
+    def add(self, x):
+        self.compactors[0].append(x)
+        self.count += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values):
+        """Add a list of values at once."""
+        self.compactors[0].extend(values)
+        self.count += len(values)
+        self._size += len(values)
+        self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self._update_sizes()
+        self._compress()
+        return self
+
+    def items(self):
+        """Return (value, weight) pairs sorted by value; the weights add up to count."""
+        return sorted((value, 1 << level)
+                      for level, items in enumerate(self.compactors) for value in items)
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1); None if nothing was added."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for value, weight in self.items():
+            seen += weight
+            if seen > rank:
+                return value
+        return value
+
+    def __len__(self):
+        return self._size
+
+
+class Aggregate:
+    """Constant-memory, mergeable summary of a sequence of numbers."""
+
+    def __init__(self, sketch_size=DEFAULT_SKETCH_SIZE):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._sum = 0.0
+        self._compensation = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.sketch = QuantileSketch(sketch_size)
+
+    def _add_to_sum(self, x):
+        # Neumaier: keep the low-order bits lost by each addition in _compensation
+        total = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._compensation += (self._sum - total) + x
+        else:
+            self._compensation += (x - total) + self._sum
+        self._sum = total
+
+    def _check_range(self):
+        # Finite values can still add up past the largest float
+        if not (math.isfinite(self.sum) and math.isfinite(self._m2)):
+            raise InputError("Values are too large: their sum or variance is out of range")
+
+    def add(self, value):
+        """Add one value (Welford's update)."""
+        x = parse_value(value)
+        self.count += 1
+        self._add_to_sum(x)
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+        self._check_range()
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        self.sketch.add(x)
+        return self
+
+    def update(self, values):
+        """Add every value of an iterable, CHUNK_SIZE at a time; returns self."""
+        values = iter(values)
+        while True:
+            chunk = list(itertools.islice(values, CHUNK_SIZE))
+            if not chunk:
+                return self
+            self.merge(self.from_chunk(chunk, self.sketch.k))
+
+    @classmethod
+    def from_chunk(cls, chunk, sketch_size=DEFAULT_SKETCH_SIZE):
+        """Summarise a list of values held in memory, exactly."""
+        part = cls(sketch_size)
+        values = [parse_value(value) for value in chunk]
+        if not values:
+            return part
+        part.count = len(values)
+        try:
+            part._sum = math.fsum(values)
+            part._mean = part._sum / part.count
+            part._m2 = math.fsum((x - part._mean) ** 2 for x in values)
+        except OverflowError:
+            # fsum's partial sums, or a squared deviation, overflowed
+            part._m2 = math.inf
+        part._check_range()
+        part.min, part.max = min(values), max(values)
+        part.sketch.extend(values)
+        return part
+
+    def merge(self, other):
+        """Fold another Aggregate into this one (Chan et al.); returns self."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.min, self.max = other.min, other.max
+        else:
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self._add_to_sum(other._sum)
+        self._add_to_sum(other._compensation)
+        self._check_range()
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def sum(self):
+        return self._sum + self._compensation
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def variance(self, ddof=0):
+        """Population variance (ddof=0) or sample variance (ddof=1)."""
+        if self.count <= ddof:
+            return None
+        return max(0.0, self._m2 / (self.count - ddof))
+
+    def stddev(self, ddof=0):
+        variance = self.variance(ddof)
+        return None if variance is None else math.sqrt(variance)
+
+    def percentile(self, p):
+        """Estimate the p-th percentile (0-100) from the sketch; 0 and 100 are exact."""
+        if not 0 <= p <= 100:
+            raise InputError("Percentiles must be between 0 and 100")
+        if not self.count:
+            return None
+        if p == 0:
+            return self.min
+        if p == 100:
+            return self.max
+        return min(self.max, max(self.min, self.sketch.quantile(p / 100)))
+
+    def histogram(self, bins=DEFAULT_BINS, bounds=None):
+        """Counts in `bins` equal-width bins between bounds=(low, high), default min to max.
+
+        Built from the sketch: the counts add up to the number of values, but
+        each bin's count is an estimate, off by up to about 1% of the total.
+        Values outside explicit bounds are left out.
+        """
+        if not isinstance(bins, int) or bins < 1:
+            raise InputError("bins must be a positive integer")
+        if bins > MAX_BINS:
+            raise InputError(f"bins must be at most {MAX_BINS}")
+        if not self.count:
+            return {'edges': [], 'counts': []}
+        low, high = bounds if bounds is not None else (self.min, self.max)
+        if not low < high:
+            if bounds is not None:
+                raise InputError("Histogram bounds must be increasing")
+            return {'edges': [low, high], 'counts': [self.count]}
+        if not math.isfinite(high - low):
+            raise InputError("Histogram bounds are too far apart")
+        width = (high - low) / bins
+        counts = [0] * bins
+        for value, count in self.sketch.items():
+            if bounds is None:
+                value = min(high, max(low, value))
+            elif not low <= value <= high:
+                continue
+            counts[min(bins - 1, int((value - low) / width))] += count
+        return {'edges': [low + i * width for i in range(bins)] + [high], 'counts': counts}
+
+    def to_dict(self, percentiles=DEFAULT_PERCENTILES, bins=DEFAULT_BINS, ddof=0, bounds=None):
+        """Everything at once, ready to be sent as JSON."""
+        return {
+            'count': self.count,
+            'sum': self.sum if self.count else 0.0,
+            'mean': self.mean,
+            'variance': self.variance(ddof),
+            'stddev': self.stddev(ddof),
+            'min': self.min,
+            'max': self.max,
+            'percentiles': {_label(p): self.percentile(p) for p in percentiles},
+            'histogram': self.histogram(bins, bounds),
+        }
+
+
+def _label(p):
+    return f'{p:g}'
@@ -6,111 +6,906 @@ This Flask app provides a web interface for students to test their calculator im
 Students implement methods in calculator.py and can test them through the web interface.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
+from aggregates import DEFAULT_BINS, DEFAULT_PERCENTILES, MAX_BINS, MAX_PERCENTILES
+from backends import open_backend
 from calculator import Calculator
-import traceback
+from cache import DEFAULT_MAX_BYTES, SharedResultCache
+from coalesce import SingleFlight
+from factorial import FactorialEngine
+from offload import DEFAULT_MAX_RESULT_BITS, DEFAULT_MIN_BITS, Offloader
+from expression import ExpressionError, default_cache as expression_cache
+from numeric import get_mode, to_json
+from operations import InputError, parse_number
+from sessions import SessionStore, is_valid_session_id, new_session_id
+from jobs import JobManager, JobRejected
+from history_store import HistoryLog, PersistentHistory
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from ratelimit import (ITEM_TOKENS, REQUEST_TOKENS, STREAM_BYTES_PER_TOKEN, ConcurrencyLimiter,
+                       RateLimiter, operation_tokens)
+from serialization import COMPRESSIBLE_MIMETYPES, available_encodings, compress, dumps, loads
+from tables import (DEFAULT_MAX_BYTES as DEFAULT_TABLE_BYTES, DEFAULT_MAX_CELLS, LookupTable,
+                    TableStore, is_valid_name)
+from time import perf_counter
+import math
+import os
+import uuid
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with serialization.dumps() and builds byte bodies directly."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# Behind a reverse proxy (Render.com has one) the client address is the last
+# CALC_PROXY_HOPS entries of X-Forwarded-For; rate limits are keyed by it
+PROXY_HOPS = int(os.environ.get('CALC_PROXY_HOPS', 0))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+
+# Upper bound on operations accepted by /calculate/batch in a single request
+MAX_BATCH_SIZE = int(os.environ.get('CALC_MAX_BATCH_SIZE', 10000))
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/ndjson')
+VECTOR_OPERATIONS = ('add', 'subtract', 'multiply', 'divide', 'power',
+                     'square_root', 'factorial', 'percentage')
+
+# Responses at least this large are gzip/brotli compressed when the client accepts it
+COMPRESS_MIN_BYTES = int(os.environ.get('CALC_COMPRESS_MIN_BYTES', 1024))
+
+# History page sizes for /history and the recent entries echoed by /evaluate
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+# Part of every /history ETag, so tags from another worker or an earlier run never match
+INSTANCE_ID = uuid.uuid4().hex[:12]
+
+def make_state_backend():
+    """Build the result cache and history store; CALC_STATE_BACKEND picks where
+    they live: memory (default), sqlite:///file or redis://host:port/db (see backends.py).
+
+    CALC_CACHE_PATH and CALC_HISTORY_DB still put the cache or the history in
+    an SQLite file of its own.
+    """
+    max_bytes = int(os.environ.get('CALC_CACHE_BYTES', DEFAULT_MAX_BYTES))
+    backend = open_backend(os.environ.get('CALC_STATE_BACKEND'), max_bytes)
+    if os.environ.get('CALC_CACHE_PATH'):
+        backend.cache = SharedResultCache(os.environ['CALC_CACHE_PATH'], max_bytes=max_bytes)
+    if os.environ.get('CALC_HISTORY_DB'):
+        backend.history_log = HistoryLog(os.environ['CALC_HISTORY_DB'])
+    return backend
+
+def make_factorial_engine():
+    """Build the factorial engine with request-safe limits."""
+    return FactorialEngine(
+        max_n=int(os.environ.get('CALC_FACTORIAL_MAX_N', 10000)),
+        time_budget=float(os.environ.get('CALC_FACTORIAL_TIME_BUDGET', 5.0)),
+        workers=int(os.environ.get('CALC_FACTORIAL_WORKERS', 0)),
+    )
+
+def make_offloader():
+    """Build the offloader; CALC_OFFLOAD_WORKERS > 0 moves costly operations to a process pool."""
+    return Offloader(
+        workers=int(os.environ.get('CALC_OFFLOAD_WORKERS', 0)),
+        min_bits=int(os.environ.get('CALC_OFFLOAD_MIN_BITS', DEFAULT_MIN_BITS)),
+        max_result_bits=int(os.environ.get('CALC_MAX_RESULT_BITS', DEFAULT_MAX_RESULT_BITS)),
+        timeout=float(os.environ.get('CALC_OFFLOAD_TIMEOUT', 10.0)),
+    )
+
+def make_rate_limiter():
+    """Build the per-client limiter; CALC_RATE_LIMIT is tokens per second (0 turns it off)."""
+    rate = float(os.environ.get('CALC_RATE_LIMIT', 0))
+    if rate <= 0:
+        return None
+    return RateLimiter(rate, burst=float(os.environ.get('CALC_RATE_BURST', 2 * rate)),
+                       max_clients=int(os.environ.get('CALC_RATE_LIMIT_CLIENTS', 10000)))
+
+def make_concurrency_limiter():
+    """Build the global cap on calculations in progress; CALC_MAX_CONCURRENT=0 turns it off."""
+    limit = int(os.environ.get('CALC_MAX_CONCURRENT', 0))
+    return ConcurrencyLimiter(limit) if limit > 0 else None
+
+def make_table_store():
+    """Build the registry of precomputed lookup tables, bounded by CALC_TABLE_BYTES."""
+    max_bytes = int(os.environ.get('CALC_TABLE_BYTES', DEFAULT_TABLE_BYTES))
+    max_cells = int(os.environ.get('CALC_TABLE_MAX_CELLS', DEFAULT_MAX_CELLS))
+    return TableStore(max_bytes=max_bytes, max_cells=max_cells)
+
+# Shared by every session's calculator
+state_backend = make_state_backend()
+result_cache = state_backend.cache
+factorial_engine = make_factorial_engine()
+offloader = make_offloader()
+# Concurrent identical power/square_root/factorial requests compute once
+single_flight = SingleFlight()
+# Admission control for the calculation endpoints (see ratelimit.py)
+rate_limiter = make_rate_limiter()
+concurrency_limiter = make_concurrency_limiter()
+# Named tables registered with POST /tables, shared by every session
+table_store = make_table_store()
+
+# With a history log (SQLite or Redis backend) history survives restarts
+HISTORY_SIZE = int(os.environ.get('CALC_HISTORY_SIZE', 1000))
+history_log = state_backend.history_log
+
+def make_calculator(session_id=None):
+    """Build a session's calculator, reloading its saved history if persistence is on."""
+    history = None
+    if history_log is not None and session_id is not None:
+        history = PersistentHistory(history_log, session_id, HISTORY_SIZE)
+    return Calculator(history_size=HISTORY_SIZE, cache=result_cache,
+                      factorial_engine=factorial_engine, history=history, offloader=offloader,
+                      single_flight=single_flight)
+
+# One calculator (and history) per client session, keyed by cookie or header
+SESSION_COOKIE = 'calc_session'
+SESSION_HEADER = 'X-Session-Id'
+sessions = SessionStore(make_calculator,
+                        max_sessions=int(os.environ.get('CALC_MAX_SESSIONS', 10000)),
+                        idle_timeout=float(os.environ.get('CALC_SESSION_IDLE_SECONDS', 3600)))
+
+# Prometheus metrics served at /metrics
+metrics = MetricsRegistry()
+operations_total = metrics.counter(
+    'calc_operations_total', 'Operations run, by outcome (ok, invalid or error)',
+    ('operation', 'status'))
+phase_seconds = metrics.histogram(
+    'calc_phase_seconds', 'Time spent per operation in each request phase '
+    '(parse, coerce, compute, history, serialize)', ('operation', 'phase'))
+http_requests_total = metrics.counter(
+    'calc_http_requests_total', 'HTTP requests by route and status', ('endpoint', 'status'))
+http_request_seconds = metrics.histogram(
+    'calc_http_request_seconds', 'Time to build each HTTP response', ('endpoint',))
+in_flight = metrics.gauge('calc_http_requests_in_flight', 'Requests currently being handled')
+rejected_total = metrics.counter(
+    'calc_rejected_total', 'Requests turned away with 429, by reason (rate_limit or concurrency)',
+    ('reason',))
+
+@metrics.collector
+def collect_state():
+    """Cache, expression cache and session figures, read at scrape time."""
+    cache = result_cache.stats()
+    lookups = cache['hits'] + cache['misses']
+    expressions = expression_cache.stats()
+    expression_lookups = expressions['hits'] + expressions['misses']
+    return [
+        ('calc_cache_hits_total', 'counter', 'Result cache hits', cache['hits']),
+        ('calc_cache_misses_total', 'counter', 'Result cache misses', cache['misses']),
+        ('calc_cache_hit_ratio', 'gauge', 'Result cache hits / lookups',
+         cache['hits'] / lookups if lookups else 0.0),
+        ('calc_cache_entries', 'gauge', 'Entries in the result cache', cache['entries']),
+        ('calc_cache_bytes', 'gauge', 'Approximate size of cached results', cache['bytes']),
+        ('calc_expression_cache_hit_ratio', 'gauge', 'Compiled expression cache hits / lookups',
+         expressions['hits'] / expression_lookups if expression_lookups else 0.0),
+        ('calc_sessions', 'gauge', 'Client sessions held in memory', len(sessions)),
+        ('calc_offloaded_total', 'counter', 'Operations run in the offload process pool',
+         offloader.offloaded),
+        ('calc_offload_timeouts_total', 'counter', 'Offloaded operations that timed out',
+         offloader.timeouts),
+        ('calc_coalesced_total', 'counter',
+         'Operations that shared an identical in-flight computation', single_flight.coalesced),
+        ('calc_tables', 'gauge', 'Registered lookup tables', len(table_store)),
+        ('calc_table_bytes', 'gauge', 'Approximate size of the lookup tables',
+         table_store.stats()['bytes']),
+    ]
+
+def operation_label(name):
+    """Metric label for an operation name; unregistered names share one label."""
+    return name if isinstance(name, str) and name in Calculator.registry else 'unknown'
+
+def observe(operation, phase, start):
+    """Record the time since start for one phase of an operation and return now."""
+    now = perf_counter()
+    phase_seconds.observe((operation, phase), now - start)
+    return now
+
+def run_operation(calc, name, operands, mode):
+    """calc.calculate() with coercion and compute timed separately."""
+    label = operation_label(name)
+    try:
+        operation = calc.registry.get(name)
+        start = perf_counter()
+        values = operation.coerce(operands, mode.parse)
+        start = observe(label, 'coerce', start)
+        result = calc.run(operation, values, mode)
+    except InputError:
+        operations_total.inc((label, 'invalid'))
+        raise
+    except Exception:
+        operations_total.inc((label, 'error'))
+        raise
+    observe(label, 'compute', start)
+    operations_total.inc((label, 'ok'))
+    return result
+
+# CALC_PROFILE=1 lets a request add ?profile=1 to get a cProfile report instead
+# of its normal response (?profile=tottime etc. picks the sort order)
+PROFILING_ENABLED = os.environ.get('CALC_PROFILE', '').lower() in ('1', 'true', 'yes')
+PROFILE_LINES = 40
+
+@app.before_request
+def start_request():
+    g.request_start = perf_counter()
+    in_flight.inc()
+    if PROFILING_ENABLED and request.args.get('profile'):
+        import cProfile
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.teardown_request
+def finish_request(error=None):
+    in_flight.dec()
+
+def current_session_id():
+    """Return this request's session id, issuing a new one if it has none."""
+    if 'session_id' not in g:
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        if not is_valid_session_id(session_id):
+            session_id = new_session_id()
+            g.new_session_id = session_id
+        g.session_id = session_id
+    return g.session_id
+
+def current_calculator():
+    """Return the calculator for this request's session, starting one if needed."""
+    return sessions.get(current_session_id())
+
+# Endpoints that calculate, and so are subject to rate limits and the concurrency cap
+ADMISSION_ENDPOINTS = ('calculate', 'calculate_batch', 'calculate_vector', 'evaluate',
+                       'submit_job', 'aggregate', 'register_table', 'table_lookup')
+
+def client_key():
+    """The address rate limits are counted against."""
+    return request.remote_addr or 'unknown'
+
+def item_tokens(item):
+    if not isinstance(item, dict):
+        return ITEM_TOKENS
+    return operation_tokens(item.get('operation'), (item.get('num1'), item.get('num2')),
+                            item.get('mode'), item.get('precision'))
+
+def table_tokens(data):
+    """Cost of building a table: one operation per cell."""
+    if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+        return ITEM_TOKENS
+    rows = data['rows']
+    columns = data.get('columns') if isinstance(data.get('columns'), list) else [None]
+    operation = data.get('operation')
+    if len(rows) * len(columns) > table_store.max_cells:
+        # Turned away before anything is computed
+        return ITEM_TOKENS
+    if (not isinstance(operation, str) or operation not in Calculator.registry
+            or Calculator.registry.get(operation).cost is None):
+        return ITEM_TOKENS * len(rows) * len(columns)
+    return sum(operation_tokens(operation, (a, b), data.get('mode'), data.get('precision'))
+               for a in rows for b in columns)
+
+def request_tokens():
+    """Estimate what this request will cost, in rate-limit tokens."""
+    endpoint = request.endpoint
+    if endpoint == 'table_lookup':
+        return REQUEST_TOKENS
+    data = request.get_json(silent=True)
+    if endpoint == 'calculate':
+        return REQUEST_TOKENS + item_tokens(data)
+    if endpoint == 'register_table':
+        # Kept for register_table(), which turns away tables over the burst
+        g.table_tokens = table_tokens(data)
+        return REQUEST_TOKENS + g.table_tokens
+    if endpoint == 'aggregate':
+        return REQUEST_TOKENS + (request.content_length or 0) / STREAM_BYTES_PER_TOKEN
+    if endpoint in ('evaluate', 'calculate_vector'):
+        data = data if isinstance(data, dict) else {}
+        sizes = [len(data.get(key) or ()) for key in ('bindings', 'num1', 'num2')
+                 if isinstance(data.get(key), list)]
+        return REQUEST_TOKENS + ITEM_TOKENS * max(sizes, default=1)
+    if endpoint == 'submit_job' and isinstance(data, dict) and 'operation' in data:
+        return REQUEST_TOKENS + item_tokens(data)
+    try:
+        items = _read_batch()
+    except InputError:
+        return REQUEST_TOKENS
+    return REQUEST_TOKENS + sum(item_tokens(item) for item in items[:MAX_BATCH_SIZE])
+
+def too_many_requests(message, retry_after=1):
+    response = jsonify({'success': False, 'error': message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+@app.before_request
+def admit_request():
+    """Turn calculation requests away with 429 when the server or this client is over its limit."""
+    if request.endpoint not in ADMISSION_ENDPOINTS:
+        return None
+    if concurrency_limiter is not None:
+        if not concurrency_limiter.try_acquire():
+            rejected_total.inc(('concurrency',))
+            return too_many_requests('Server is busy; please retry shortly')
+        g.concurrency_slot = True
+    if rate_limiter is not None:
+        retry_after = rate_limiter.acquire(client_key(), request_tokens())
+        if retry_after:
+            release_slot()
+            rejected_total.inc(('rate_limit',))
+            return too_many_requests(
+                f'Rate limit exceeded; retry in {math.ceil(retry_after)}s', retry_after)
+    return None
 
-# Global calculator instance for maintaining history
-calc = Calculator()
+@app.teardown_request
+def release_slot(error=None):
+    if g.pop('concurrency_slot', False):
+        concurrency_limiter.release()
+
+@app.after_request
+def compress_response(response):
+    """Compress large text bodies with the best coding the client accepts."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is not None:
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.after_request
+def set_session_cookie(response):
+    """Hand newly created session ids back to the browser."""
+    session_id = g.pop('new_session_id', None)
+    if session_id is not None:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        response.headers[SESSION_HEADER] = session_id
+    return response
+
+@app.after_request
+def record_request(response):
+    """Count the response and time it, labelled by route rather than raw path."""
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    http_requests_total.inc((endpoint, str(response.status_code)))
+    if 'request_start' in g:
+        http_request_seconds.observe((endpoint,), perf_counter() - g.request_start)
+    return response
+
+@app.after_request
+def profile_report(response):
+    """Replace the response with the profile collected for it, if one was requested."""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    import io
+    import pstats
+    sort = request.args.get('profile')
+    if sort not in ('cumulative', 'tottime', 'calls', 'ncalls'):
+        sort = 'cumulative'
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(PROFILE_LINES)
+    return Response(report.getvalue(), mimetype='text/plain')
 
 @app.route('/')
 def index():
     """Render the main calculator page."""
     return render_template('index.html')
 
+def parse_variables(variables):
+    """Parse an expression's {name: value} bindings into numbers."""
+    if variables is None:
+        return {}
+    if not isinstance(variables, dict):
+        raise InputError('Variables must be an object of name: number pairs')
+    return {name: parse_number(value, f"'{name}'") for name, value in variables.items()}
+
+def recent_history(calc):
+    """Return the newest page of calc's history, oldest first."""
+    total = len(calc.history)
+    return calc.get_history(max(0, total - HISTORY_PAGE_SIZE), HISTORY_PAGE_SIZE)
+
+def error_message(error, operation):
+    """Turn a calculator exception into the message shown to the user."""
+    # Check if it's a "not implemented" error (method returns None or raises NotImplementedError)
+    message = str(error)
+    if 'pass' in message or not message or 'NoneType' in message:
+        message = f"Method '{operation}' not implemented yet! Check calculator.py"
+    return message
+
 @app.route('/calculate', methods=['POST'])
 def calculate():
     """Handle calculation requests from the web interface."""
+    calc = current_calculator()
+    operation = None
     try:
+        start = perf_counter()
         data = request.get_json()
         operation = data.get('operation')
-        num1 = data.get('num1')
-        num2 = data.get('num2')
-        
-        # Convert string inputs to numbers
-        if num1 is not None:
-            try:
-                num1 = float(num1) if '.' in str(num1) else int(num1)
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': f'Invalid first number: {num1}'
-                })
-        
-        if num2 is not None:
+        mode = get_mode(data.get('mode'), data.get('precision'))
+        label = operation_label(operation)
+        observe(label, 'parse', start)
+        result = run_operation(calc, operation, (data.get('num1'), data.get('num2')), mode)
+
+        # Only the new entry is sent back; clients that missed others
+        # (e.g. another tab) catch up with /history?since=
+        start = perf_counter()
+        seq, entry = calc.history.recorded()
+        entry = None if entry is None else str(entry)
+        start = observe(label, 'history', start)
+        response = jsonify({
+            'success': True,
+            'result': to_json(result),
+            'mode': mode.name,
+            'entry': entry,
+            'seq': seq
+        })
+        observe(label, 'serialize', start)
+        return response
+
+    except InputError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': error_message(e, operation)
+        })
+
+def run_item(calc, item):
+    """Run one {operation, num1, num2} object, returning its result or error."""
+    operation = None
+    try:
+        if not isinstance(item, dict):
+            raise InputError('Each operation must be an object')
+        operation = item.get('operation')
+        mode = get_mode(item.get('mode'), item.get('precision'))
+        result = run_operation(calc, operation, (item.get('num1'), item.get('num2')), mode)
+        return {'success': True, 'result': to_json(result)}
+    except InputError as e:
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        return {'success': False, 'error': error_message(e, operation)}
+
+def _read_batch():
+    """Return the list of operations in a batch request (JSON array or NDJSON)."""
+    # Parsed once per request: admit_request() reads it to estimate the cost
+    if 'batch_items' not in g:
+        g.batch_items = _parse_batch()
+    return g.batch_items
+
+def _parse_batch():
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
             try:
-                num2 = float(num2) if '.' in str(num2) else int(num2)
+                items.append(loads(line))
             except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': f'Invalid second number: {num2}'
-                })
-        
-        # Perform the calculation based on operation
-        result = None
-        
-        if operation == 'add':
-            result = calc.add(num1, num2)
-        elif operation == 'subtract':
-            result = calc.subtract(num1, num2)
-        elif operation == 'multiply':
-            result = calc.multiply(num1, num2)
-        elif operation == 'divide':
-            result = calc.divide(num1, num2)
-        elif operation == 'power':
-            result = calc.power(num1, num2)
-        elif operation == 'square_root':
-            result = calc.square_root(num1)
-        elif operation == 'factorial':
-            # For factorial, ensure we have an integer
-            if isinstance(num1, float) and not num1.is_integer():
-                return jsonify({
-                    'success': False,
-                    'error': 'Factorial requires an integer'
-                })
-            result = calc.factorial(int(num1))
-        elif operation == 'percentage':
-            result = calc.percentage(num1, num2)
-        else:
+                # Keep the slot so results stay aligned with input lines
+                items.append(None)
+        return items
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('operations')
+    if not isinstance(payload, list):
+        raise InputError('Expected a JSON array of operations or an "operations" list')
+    return payload
+
+@app.route('/calculate/batch', methods=['POST'])
+def calculate_batch():
+    """Evaluate many operations in one request, returning results in input order."""
+    try:
+        items = _read_batch()
+    except InputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'Batch too large: {len(items)} operations (limit {MAX_BATCH_SIZE})'
+        }), 413
+
+    calc = current_calculator()
+    results = []
+    append = results.append
+    for item in items:
+        append(run_item(calc, item))
+
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+# Background jobs for long-running work; results are streamed back per job
+JOB_STREAM_HEARTBEAT = 15
+jobs = JobManager(run_item,
+                  workers=int(os.environ.get('CALC_JOB_WORKERS', 4)),
+                  max_pending=int(os.environ.get('CALC_MAX_PENDING_JOBS', 100)),
+                  # CALC_MAX_JOBS_PER_SESSION is the setting's older name
+                  max_per_client=int(os.environ.get('CALC_MAX_JOBS_PER_CLIENT',
+                                                    os.environ.get('CALC_MAX_JOBS_PER_SESSION', 2))))
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue one operation or a batch and return a job id straight away."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and 'operation' in payload:
+        items = [payload]
+    else:
+        try:
+            items = _read_batch()
+        except InputError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'Batch too large: {len(items)} operations (limit {MAX_BATCH_SIZE})'
+        }), 413
+
+    try:
+        job = jobs.submit(client_key(), current_calculator(), items)
+    except JobRejected as e:
+        return too_many_requests(str(e))
+    return jsonify(dict(job.describe(), success=True,
+                        status_url=f'/jobs/{job.id}',
+                        stream_url=f'/jobs/{job.id}/stream')), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report a job's progress and the results produced so far."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify(dict(job.describe(), success=True, results=list(job.results)))
+
+@app.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Stream a job's results as they finish (NDJSON, or SSE for text/event-stream)."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    sse = request.accept_mimetypes.best == 'text/event-stream'
+
+    def events():
+        seen = 0
+        finished = False
+        while not finished:
+            new_results, finished = job.wait(seen, timeout=JOB_STREAM_HEARTBEAT)
+            for result in new_results:
+                line = dumps(dict(result, index=seen)).decode()
+                yield f'event: result\ndata: {line}\n\n' if sse else line + '\n'
+                seen += 1
+            if not new_results and not finished and sse:
+                # Keep idle connections (and proxies) from timing out
+                yield ': keep-alive\n\n'
+        summary = dumps(job.describe()).decode()
+        yield f'event: done\ndata: {summary}\n\n' if sse else summary + '\n'
+
+    mimetype = 'text/event-stream' if sse else 'application/x-ndjson'
+    return Response(events(), mimetype=mimetype, headers={'Cache-Control': 'no-cache'})
+
+@app.route('/evaluate', methods=['POST'])
+def evaluate():
+    """Evaluate an expression, once or for each set of variable bindings."""
+    data = request.get_json(silent=True)
+    expression = data.get('expression') if isinstance(data, dict) else None
+    if not isinstance(expression, str) or not expression.strip():
+        return jsonify({
+            'success': False,
+            'error': 'Missing expression'
+        }), 400
+
+    calc = current_calculator()
+    try:
+        if 'bindings' in data:
+            if not isinstance(data['bindings'], list):
+                raise InputError('Bindings must be a list of name: number objects')
+            bindings = [parse_variables(b) for b in data['bindings']]
+            results = []
+            for variables in bindings:
+                try:
+                    results.append({'success': True, 'result': to_json(calc.evaluate(expression, variables))})
+                except (ValueError, ArithmeticError) as e:
+                    results.append({'success': False, 'error': str(e)})
             return jsonify({
-                'success': False,
-                'error': f'Unknown operation: {operation}'
+                'success': True,
+                'results': results,
+                'history': recent_history(calc)
             })
-        
+        result = calc.evaluate(expression, parse_variables(data.get('variables')))
         return jsonify({
             'success': True,
-            'result': result,
-            'history': calc.get_history()
+            'result': to_json(result),
+            'history': recent_history(calc)
         })
-        
+    except (ExpressionError, InputError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
-        # Check if it's a "not implemented" error (method returns None or raises NotImplementedError)
-        error_message = str(e)
-        if 'pass' in error_message or not error_message or 'NoneType' in error_message:
-            error_message = f"Method '{operation}' not implemented yet! Check calculator.py"
-        
         return jsonify({
             'success': False,
-            'error': error_message,
-            'history': calc.get_history()
+            'error': error_message(e, 'evaluate'),
+            'history': recent_history(calc)
         })
 
-@app.route('/history')
-def get_history():
-    """Get the calculation history."""
+@app.route('/calculate/vector', methods=['POST'])
+def calculate_vector():
+    """Apply one operation element-wise over arrays of operands (NumPy broadcasting)."""
+    data = request.get_json(silent=True)
+    operation = data.get('operation') if isinstance(data, dict) else None
+    if not isinstance(operation, str) or operation not in VECTOR_OPERATIONS:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown operation: {operation}'
+        }), 400
+
+    try:
+        from vector_calculator import to_list
+        method = getattr(current_calculator().vector, operation)
+        if Calculator.registry.get(operation).arity == 1:
+            result = method(data.get('num1'))
+        else:
+            result = method(data.get('num1'), data.get('num2'))
+        return jsonify({
+            'success': True,
+            'result': to_list(result)
+        })
+    except (ValueError, ArithmeticError, RuntimeError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+def _number_list(value, name):
+    """A list of numbers from JSON (a list) or a query string ("50,90,99")."""
+    if isinstance(value, str):
+        value = [item for item in value.split(',') if item.strip()]
+    if not isinstance(value, list):
+        raise InputError(f'{name} must be a list of numbers')
+    try:
+        return [float(item) for item in value]
+    except (TypeError, ValueError):
+        raise InputError(f'{name} must be a list of numbers')
+
+def _integer_option(value, name, default):
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InputError(f'{name} must be an integer')
+
+@app.route('/aggregate', methods=['POST'])
+def aggregate():
+    """Count, sum, mean, variance, min/max, percentiles and a histogram of many numbers.
+
+    Send {"values": [...]} as JSON, or any other body with one number per
+    line, which is read as a stream. Options (percentiles, bins, ddof, bounds)
+    go in the JSON object or the query string.
+    """
+    try:
+        if request.is_json:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get('values'), list):
+                raise InputError('Expected {"values": [...]} or one number per line')
+            values, options = data['values'], data
+        else:
+            values = (line for line in request.stream if line.strip())
+            options = request.args
+        percentiles = options.get('percentiles')
+        percentiles = (DEFAULT_PERCENTILES if percentiles is None
+                       else _number_list(percentiles, 'percentiles'))
+        bins = _integer_option(options.get('bins'), 'bins', DEFAULT_BINS)
+        ddof = _integer_option(options.get('ddof'), 'ddof', 0)
+        bounds = options.get('bounds')
+        if bounds is not None:
+            bounds = _number_list(bounds, 'bounds')
+            if len(bounds) != 2:
+                raise InputError('bounds must be [low, high]')
+        if ddof not in (0, 1):
+            raise InputError('ddof must be 0 or 1')
+        if len(percentiles) > MAX_PERCENTILES:
+            raise InputError(f'At most {MAX_PERCENTILES} percentiles may be requested')
+        for p in percentiles:
+            if not 0 <= p <= 100:
+                raise InputError('Percentiles must be between 0 and 100')
+        if not 1 <= bins <= MAX_BINS:
+            raise InputError(f'bins must be between 1 and {MAX_BINS}')
+        total = current_calculator().aggregate(values)
+        return jsonify(dict(total.to_dict(percentiles, bins, ddof, bounds), success=True))
+    except InputError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/tables', methods=['POST'])
+def register_table():
+    """Precompute an operation over a grid of operands for lookups by index.
+
+    Send {"name", "operation", "rows": [...], "columns": [...]} (no columns
+    for unary operations, optional "mode"/"precision"). Cell (i, j) is
+    operation(rows[i], columns[j]); read it with GET /tables/<name>/<i>/<j>.
+    Registering an existing name replaces that table.
+    """
+    if table_store.disabled:
+        return jsonify({
+            'success': False,
+            'error': table_store.disabled
+        }), 409
+    data = request.get_json(silent=True)
+    try:
+        if not isinstance(data, dict):
+            raise InputError('Expected {"name", "operation", "rows": [...], "columns": [...]}')
+        name = data.get('name')
+        if not is_valid_name(name):
+            raise InputError('name must be 1-64 letters, digits, "_", "." or "-"')
+        rows, columns = data.get('rows'), data.get('columns')
+        if not isinstance(rows, list) or not isinstance(columns, (list, type(None))):
+            raise InputError('rows and columns must be lists of numbers')
+        table_store.check_size(len(rows), len(columns or ()))
+        mode = get_mode(data.get('mode'), data.get('precision'))
+        if rate_limiter is not None:
+            # The limiter charges at most a full bucket, so bigger tables would be cheap
+            tokens = g.table_tokens if 'table_tokens' in g else table_tokens(data)
+            tokens += REQUEST_TOKENS
+            if tokens > rate_limiter.burst:
+                raise InputError(f'Table too costly: {tokens:.0f} rate-limit tokens '
+                                 f'(limit {rate_limiter.burst:g})')
+        # Cells aren't session history; a scratch calculator records them
+        calc = Calculator(history_size=1, cache=result_cache, factorial_engine=factorial_engine,
+                          offloader=offloader, single_flight=single_flight)
+        table = LookupTable.build(name, calc, data.get('operation'), rows, columns, mode)
+        evicted = table_store.add(table)
+    except InputError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except RuntimeError as e:
+        # e.g. the offload pool broke during a cell; nothing was registered
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': error_message(e, data.get('operation'))
+        }), 500
+    return jsonify(dict(table.describe(), success=True, evicted=evicted)), 201
+
+@app.route('/tables')
+def list_tables():
+    """Describe the registered lookup tables, least recently used first."""
     return jsonify({
-        'history': calc.get_history()
+        'tables': table_store.describe(),
+        'stats': table_store.stats()
     })
 
+@app.route('/tables/<name>/<int:row>')
+@app.route('/tables/<name>/<int:row>/<int:column>')
+def table_lookup(name, row, column=0):
+    """Return one precomputed cell of a registered table."""
+    table = table_store.get(name)
+    if table is None:
+        # Never registered, or evicted
+        return jsonify({
+            'success': False,
+            'error': f'Unknown table: {name}'
+        }), 404
+    try:
+        result = table.lookup(row, column)
+    except IndexError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+    return jsonify({
+        'success': True,
+        'result': result
+    })
+
+@app.route('/tables/<name>', methods=['DELETE'])
+def delete_table(name):
+    if not table_store.remove(name):
+        return jsonify({
+            'success': False,
+            'error': f'Unknown table: {name}'
+        }), 404
+    return jsonify({'success': True})
+
+@app.route('/operations')
+def list_operations():
+    """Describe every registered operation (the UI builds its choices from this)."""
+    return jsonify({
+        'operations': Calculator.registry.describe()
+    })
+
+@app.route('/history')
+def get_history():
+    """Get one page of the calculation history (?offset=&limit=), or the
+    entries recorded after a sequence number (?since=).
+
+    Responses carry an ETag, so pollers get a 304 until something changes.
+    """
+    calc = current_calculator()
+    history = calc.history
+    # Catch up with entries recorded by other instances (shared backends only)
+    history.refresh()
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    limit = max(0, min(limit, MAX_HISTORY_PAGE_SIZE))
+    # The ETag is per URL, so the query parameters needn't be part of it
+    etag = f'{INSTANCE_ID}-{history.epoch}-{history.seq}'
+    # Weak, because compression gives the same content different bytes
+    if request.if_none_match.contains_weak(etag):
+        return history_response(Response(status=304), etag)
+
+    since = request.args.get('since', type=int)
+    if since is not None:
+        seq, entries = history.changes(since, limit)
+        reset = entries is None
+        if reset:
+            # Too far behind for a delta: send the newest page instead
+            total = len(history)
+            entries = history.entries(max(0, total - limit), limit)
+        return history_response(jsonify({
+            'history': [str(entry) for entry in entries],
+            'since': since,
+            'seq': seq,
+            'reset': reset
+        }), etag)
+
+    offset = request.args.get('offset', 0, type=int)
+    return history_response(jsonify({
+        'history': calc.get_history(offset, limit),
+        'offset': offset,
+        'limit': limit,
+        'total': len(history),
+        'seq': history.seq
+    }), etag)
+
+def history_response(response, etag):
+    response.set_etag(etag, weak=True)
+    # History is per session: revalidate every time and never share it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.update(('Cookie', SESSION_HEADER))
+    return response
+
 @app.route('/clear', methods=['POST'])
 def clear_history():
-    """Clear the calculation history."""
+    """Clear the calculation history of this session only."""
+    calc = current_calculator()
     calc.clear_history()
     return jsonify({
         'success': True,
-        'message': 'History cleared'
+        'message': 'History cleared',
+        'seq': calc.history.seq
     })
 
 @app.route('/health')
@@ -118,11 +913,56 @@ def health_check():
     """Simple health check endpoint."""
     return jsonify({
         'status': 'healthy',
-        'message': 'Calculator web app is running!'
+        'message': 'Calculator web app is running!',
+        'cache': result_cache.stats(),
+        'state_backend': state_backend.stats(),
+        'offload': offloader.stats(),
+        'coalescing': single_flight.stats(),
+        'rate_limit': rate_limiter.stats() if rate_limiter is not None else None,
+        'concurrency': concurrency_limiter.stats() if concurrency_limiter is not None else None,
+        'tables': table_store.stats(),
+        'sessions': len(sessions)
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Counters, latency histograms and cache figures in Prometheus text format."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+# One request per code path the first real requests take: template rendering,
+# JSON parsing/encoding, each numeric mode, the expression compiler, history
+WARMUP_REQUESTS = (
+    ('GET', '/', None),
+    ('GET', '/operations', None),
+    ('POST', '/calculate', {'operation': 'add', 'num1': '1', 'num2': '2'}),
+    ('POST', '/calculate', {'operation': 'divide', 'num1': '1', 'num2': '3', 'mode': 'decimal'}),
+    ('POST', '/calculate', {'operation': 'multiply', 'num1': '1/2', 'num2': '3', 'mode': 'fraction'}),
+    ('POST', '/calculate/batch', [{'operation': 'subtract', 'num1': 5, 'num2': 3}]),
+    ('POST', '/evaluate', {'expression': '(x + 2) * 3', 'variables': {'x': 1}}),
+    ('GET', '/history', None),
+    ('GET', '/history?since=0', None),
+    ('POST', '/clear', None),
+    ('GET', '/health', None),
+)
+
+def warm_up():
+    """Send WARMUP_REQUESTS through the app so a new worker's first real
+    request doesn't pay for lazy initialisation; returns the seconds taken.
+
+    Runs in a throwaway session that is discarded afterwards, and resets the
+    request metrics so they only count real traffic.
+    """
+    start = perf_counter()
+    session_id = new_session_id()
+    client = app.test_client()
+    for method, path, body in WARMUP_REQUESTS:
+        client.open(path, method=method, json=body, headers={SESSION_HEADER: session_id})
+    sessions.discard(session_id)
+    expression_cache.clear()
+    metrics.reset()
+    return perf_counter() - start
+
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5001))
     print("🧮 Starting Calculator Web App...")
     print(f"📱 Open your browser to: http://localhost:{port}")
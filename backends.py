@@ -0,0 +1,75 @@
+"""
+State Backends - where the result cache and calculation history live
+
+A StateBackend pairs a result cache (the ResultCache interface: get, put,
+factorial_prefix, stats, clear) with an optional history log (the HistoryLog
+interface, used through PersistentHistory). open_backend() builds one from a
+URL, which the web app takes from CALC_STATE_BACKEND:
+
+- memory (the default): a ResultCache per process, and each session's
+  history in memory only. Nothing is shared, so run a single instance.
+- sqlite:///var/lib/calc/state.db: SharedResultCache and HistoryLog in one SQLite
+  file. Shared by the worker processes of one host, and kept across restarts.
+- redis://[:password@]host:port/db: RedisResultCache and RedisHistoryLog
+  (see redis_store.py). Shared by every instance that points at the same
+  server, so the app can run on more than one host.
+
+Backends are imported only when chosen, so the memory default never loads
+sqlite3 or the Redis client.
+"""
+
+from urllib.parse import urlsplit
+
+from cache import DEFAULT_MAX_BYTES, ResultCache
+
+SCHEMES = ('memory', 'sqlite', 'redis')
+
+
+class StateBackend:
+    """A result cache plus an optional history log (None keeps history in memory)."""
+
+    def __init__(self, name, cache, history_log=None, pool=None):
+        self.name = name
+        self.cache = cache
+        self.history_log = history_log
+        # Connection pool behind both, if any
+        self.pool = pool
+
+    @property
+    def shared(self):
+        """Whether other processes see the same state."""
+        return self.name != 'memory'
+
+    def stats(self):
+        return {'name': self.name,
+                'pool': self.pool.stats() if self.pool is not None else None}
+
+    def close(self):
+        if self.history_log is not None:
+            self.history_log.close()
+        if self.pool is not None:
+            self.pool.close()
+
+
+def open_backend(url=None, max_bytes=DEFAULT_MAX_BYTES, **options):
+    """Build the StateBackend for url (None or 'memory' for the in-process default).
+
+    options go to the Redis ConnectionPool (e.g. max_connections, timeout).
+    """
+    scheme = urlsplit(url).scheme if url and url != 'memory' else 'memory'
+    if scheme == 'memory':
+        return StateBackend('memory', ResultCache(max_bytes))
+    if scheme == 'sqlite':
+        from cache import SharedResultCache
+        from history_store import HistoryLog
+        # sqlite:///var/lib/calc/state.db is absolute, sqlite://state.db relative
+        path = url[len('sqlite://'):]
+        if not path:
+            raise ValueError(f"No file in {url!r} (e.g. sqlite:///var/lib/calc/state.db)")
+        return StateBackend('sqlite', SharedResultCache(path, max_bytes), HistoryLog(path))
+    if scheme == 'redis':
+        from redis_client import ConnectionPool
+        from redis_store import RedisHistoryLog, RedisResultCache
+        pool = ConnectionPool.from_url(url, **options)
+        return StateBackend('redis', RedisResultCache(pool, max_bytes), RedisHistoryLog(pool), pool)
+    raise ValueError(f"Unknown state backend {url!r} (choose from {', '.join(SCHEMES)})")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Load test: cheap-operation latency while heavy clients spam factorials
+
+Runs gunicorn twice, with admission control off and on (the production
+defaults from gunicorn.conf.py). In each run, paced "cheap" clients send
+`add` requests, first alone and then while "heavy" clients post
+factorial(5000+i) back to back without waiting. Each client has its own
+X-Forwarded-For address, so the rate limiter sees separate clients.
+
+With limits on, cheap p99 should stay near its unloaded value while most of
+the heavy requests get 429.
+
+Usage: python benchmarks/bench_admission.py [--duration 5] [--cheap 8] [--heavy 2]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import free_port, percentile, start_server, wait_until_up  # noqa: E402
+
+CHEAP_BODY = json.dumps({'operation': 'add', 'num1': '2', 'num2': '3'})
+HEAVY_N = 5000
+HEADERS = {'Content-Type': 'application/json'}
+
+SETTINGS = {
+    # Distinct factorials, no result cache: every heavy request really computes
+    'off': dict(CALC_RATE_LIMIT='0', CALC_MAX_CONCURRENT='0', CALC_CACHE_BYTES='0',
+                CALC_PROXY_HOPS='1'),
+    'on': dict(CALC_CACHE_BYTES='0', CALC_PROXY_HOPS='1'),
+}
+
+
+class Tally:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.lock = threading.Lock()
+
+    def add(self, status, seconds):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == 200:
+                self.latencies.append(seconds)
+
+
+def post(conn, body, address):
+    start = time.perf_counter()
+    conn.request('POST', '/calculate', body=body, headers=dict(HEADERS, **{'X-Forwarded-For': address}))
+    response = conn.getresponse()
+    response.read()
+    return response.status, time.perf_counter() - start
+
+
+def cheap_client(port, address, rate, stop_at, tally):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    next_at = time.perf_counter()
+    while next_at < stop_at:
+        tally.add(*post(conn, CHEAP_BODY, address))
+        next_at += 1 / rate
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+def heavy_client(port, address, counter, stop_at, tally):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.perf_counter() < stop_at:
+        body = json.dumps({'operation': 'factorial', 'num1': HEAVY_N + next(counter)})
+        tally.add(*post(conn, body, address))
+
+
+def phase(port, args, heavy):
+    cheap, spam = Tally(), Tally()
+    stop_at = time.perf_counter() + args.duration
+    counter = itertools.count()
+    threads = [threading.Thread(target=cheap_client,
+                                args=(port, f'10.0.0.{i + 1}', args.rate, stop_at, cheap))
+               for i in range(args.cheap)]
+    if heavy:
+        threads += [threading.Thread(target=heavy_client,
+                                     args=(port, f'10.0.1.{i + 1}', counter, stop_at, spam))
+                    for i in range(args.heavy)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return cheap, spam
+
+
+def report(label, cheap, spam):
+    line = (f"  {label:<14} cheap p50 {percentile(cheap.latencies, 0.50) * 1000:6.1f} ms  "
+            f"p99 {percentile(cheap.latencies, 0.99) * 1000:7.1f} ms  "
+            f"cheap non-200 {sum(n for s, n in cheap.statuses.items() if s != 200):4}")
+    if spam.statuses:
+        line += (f"   heavy: {spam.statuses.get(200, 0):4} done, "
+                 f"{spam.statuses.get(429, 0):5} throttled")
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--cheap', type=int, default=8, help='paced clients sending add')
+    parser.add_argument('--rate', type=float, default=20, help='requests/s per cheap client')
+    parser.add_argument('--heavy', type=int, default=2, help='clients spamming factorial')
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.cheap} cheap clients at {args.rate:g} req/s, {args.heavy} heavy clients, "
+          f"{args.duration:g}s per phase, 1 worker x {args.threads} threads")
+    for name, settings in SETTINGS.items():
+        port = free_port()
+        server = start_server('gunicorn', port, 1, args.threads, **settings)
+        try:
+            wait_until_up(port)
+            print(f"admission control {name}:")
+            report('cheap only', *phase(port, args, heavy=False))
+            report('cheap + heavy', *phase(port, args, heavy=True))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request overhead of each state backend
+
+Runs gunicorn with CALC_STATE_BACKEND set to memory, an SQLite file, and the
+fake Redis server (with no added latency and with a simulated network round
+trip), then times POST /calculate and GET /history from one client. Also
+compares writing history entries to Redis one command at a time with the
+pipelined batches the history writer sends.
+
+Usage: python benchmarks/bench_backends.py [--requests 500] [--latency 0.0005]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_redis import FakeRedisServer  # noqa: E402
+from load_test import free_port, percentile, start_server, wait_until_up  # noqa: E402
+from redis_client import ConnectionPool  # noqa: E402
+
+BODY = json.dumps({'operation': 'add', 'num1': '12.5', 'num2': '8'})
+HEADERS = {'Content-Type': 'application/json', 'X-Session-ID': 'bench'}
+
+
+def timed(conn, method, path, body=None):
+    start = time.perf_counter()
+    conn.request(method, path, body=body, headers=HEADERS)
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path} returned {response.status}")
+    return time.perf_counter() - start
+
+
+def run(backend, requests):
+    port = free_port()
+    server = start_server('gunicorn', port, 1, 4, CALC_RATE_LIMIT='0', CALC_MAX_CONCURRENT='0',
+                          CALC_STATE_BACKEND=backend)
+    try:
+        wait_until_up(port)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        calculate, history = [], []
+        for _ in range(requests):
+            calculate.append(timed(conn, 'POST', '/calculate', BODY))
+            history.append(timed(conn, 'GET', '/history?limit=10'))
+        return calculate, history
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def history_writes(latency, count):
+    """Seconds per entry written one RPUSH at a time and in one pipeline."""
+    with FakeRedisServer(latency=latency) as server:
+        pool = ConnectionPool.from_url(server.url)
+        row = json.dumps(['add', 1, 2, 3, time.time()])
+        start = time.perf_counter()
+        for _ in range(count):
+            pool.execute('RPUSH', 'one-by-one', row)
+            pool.execute('INCR', 'one-by-one:seq')
+        single = (time.perf_counter() - start) / count
+        start = time.perf_counter()
+        pool.pipeline([command for _ in range(count)
+                       for command in (('RPUSH', 'pipelined', row), ('INCR', 'pipelined:seq'))])
+        pipelined = (time.perf_counter() - start) / count
+        pool.close()
+    return single, pipelined
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0005,
+                        help='simulated Redis round trip in seconds')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results['memory'] = run('memory', args.requests)
+        results['sqlite'] = run(f"sqlite://{os.path.join(tmp, 'state.db')}", args.requests)
+    for latency in (0.0, args.latency):
+        with FakeRedisServer(latency=latency) as redis:
+            results[f'redis (+{latency * 1000:g} ms)'] = run(redis.url, args.requests)
+
+    print(f"requests per endpoint: {args.requests}")
+    print(f"{'backend':<20} {'calculate p50':>14} {'p99':>8} {'history p50':>12} {'p99':>8}  (ms)")
+    for name, (calculate, history) in results.items():
+        print(f"{name:<20} {percentile(calculate, 0.5) * 1000:14.2f} "
+              f"{percentile(calculate, 0.99) * 1000:8.2f} "
+              f"{percentile(history, 0.5) * 1000:12.2f} {percentile(history, 0.99) * 1000:8.2f}")
+
+    count = 200
+    single, pipelined = history_writes(args.latency, count)
+    print(f"\nhistory writes to Redis (+{args.latency * 1000:g} ms round trip, {count} entries)")
+    print(f"  command per write:   {single * 1e6:8.1f} us/entry")
+    print(f"  pipelined batch:     {pipelined * 1e6:8.1f} us/entry")
+
+
+if __name__ == '__main__':
+    main()
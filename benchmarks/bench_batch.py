@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /calculate/batch versus looping on /calculate
+
+Both variants run through the Flask test client so the numbers reflect
+request handling overhead without network noise.
+
+Usage: python benchmarks/bench_batch.py [num_operations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as webapp  # noqa: E402
+
+
+def make_operations(count):
+    """Build a repeatable mix of cheap binary operations."""
+    names = ['add', 'subtract', 'multiply', 'divide']
+    return [
+        {'operation': names[i % 4], 'num1': str(i + 1), 'num2': str(i % 7 + 1)}
+        for i in range(count)
+    ]
+
+
+def bench_single(client, operations):
+    start = time.perf_counter()
+    for op in operations:
+        client.post('/calculate', json=op)
+    return time.perf_counter() - start
+
+
+def bench_batch(client, operations):
+    start = time.perf_counter()
+    client.post('/calculate/batch', json=operations)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    operations = make_operations(count)
+    client = webapp.app.test_client()
+
+    webapp.sessions.clear()
+    single = bench_single(client, operations)
+    webapp.sessions.clear()
+    batch = bench_batch(client, operations)
+
+    print(f"operations:        {count}")
+    print(f"/calculate loop:   {single:.3f}s  ({count / single:,.0f} ops/s)")
+    print(f"/calculate/batch:  {batch:.3f}s  ({count / batch:,.0f} ops/s)")
+    print(f"speedup:           {single / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
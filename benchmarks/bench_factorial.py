@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: factorial engine versus the naive multiplication loop
+
+For each n the script times:
+- naive:    result *= i for i in 1..n (skipped above --naive-limit, it takes minutes)
+- engine:   FactorialEngine with no budget (uses math.factorial)
+- budgeted: FactorialEngine with a time budget (chunked binary splitting)
+
+Usage: python benchmarks/bench_factorial.py [--max-exponent 6] [--naive-limit 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from factorial import FactorialEngine  # noqa: E402
+
+
+def naive(n):
+    result = 1
+    for i in range(2, n + 1):
+        result *= i
+    return result
+
+
+def timed(func, n):
+    start = time.perf_counter()
+    func(n)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-exponent', type=int, default=6)
+    parser.add_argument('--naive-limit', type=int, default=100000)
+    args = parser.parse_args()
+
+    engine = FactorialEngine()
+    budgeted = FactorialEngine(time_budget=3600)
+
+    print(f"{'n':>10} {'naive':>10} {'engine':>10} {'budgeted':>10} {'speedup':>8}")
+    for exponent in range(3, args.max_exponent + 1):
+        n = 10 ** exponent
+        naive_time = timed(naive, n) if n <= args.naive_limit else None
+        engine_time = timed(engine.factorial, n)
+        budget_time = timed(budgeted.factorial, n)
+        naive_text = f"{naive_time:9.3f}s" if naive_time is not None else f"{'skipped':>10}"
+        speedup = f"{naive_time / engine_time:7.1f}x" if naive_time is not None else f"{'-':>8}"
+        print(f"{n:>10} {naive_text} {engine_time:9.3f}s {budget_time:9.3f}s {speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of recording history in memory, with the group-commit log,
+and with a commit (and fsync) per record
+
+Usage: python benchmarks/bench_history_store.py [num_records]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator import Calculator  # noqa: E402
+from history_store import HistoryLog, PersistentHistory  # noqa: E402
+
+
+def per_record(calc, count):
+    start = time.perf_counter()
+    for i in range(count):
+        calc.add(i, i)
+    return (time.perf_counter() - start) / count
+
+
+def commit_each(path, count):
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute("PRAGMA synchronous=FULL")
+    db.execute("CREATE TABLE history (session, operation, a, b, result, timestamp)")
+    start = time.perf_counter()
+    for i in range(count):
+        db.execute("INSERT INTO history VALUES ('s', 'add', ?, ?, ?, ?)", (i, i, i + i, time.time()))
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = per_record(Calculator(), count)
+        log = HistoryLog(os.path.join(tmp, 'history.sqlite3'))
+        grouped = per_record(Calculator(history=PersistentHistory(log, 's', 1000)), count)
+        start = time.perf_counter()
+        log.flush()
+        drain = time.perf_counter() - start
+        naive = commit_each(os.path.join(tmp, 'naive.sqlite3'), min(count, 1000))
+
+    print(f"records:                 {count}")
+    print(f"in-memory history:       {memory * 1e6:8.1f} us/record")
+    print(f"group-commit log:        {grouped * 1e6:8.1f} us/record  (final flush {drain * 1000:.1f} ms)")
+    print(f"commit per record:       {naive * 1e6:8.1f} us/record")
+
+
+if __name__ == '__main__':
+    main()
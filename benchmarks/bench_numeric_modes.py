@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the float, decimal and fraction numeric modes
+
+Runs the same mix of operations through Calculator.calculate() under each
+mode to show what exact arithmetic costs compared to floats.
+
+Usage: python benchmarks/bench_numeric_modes.py [num_operations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator import Calculator  # noqa: E402
+from numeric import get_mode  # noqa: E402
+
+
+def make_operations(count):
+    """Build a repeatable mix of arithmetic on decimal-looking inputs."""
+    names = ['add', 'subtract', 'multiply', 'divide', 'percentage']
+    return [(names[i % 5], f'{i + 1}.{i % 10}', str(i % 7 + 1)) for i in range(count)]
+
+
+def bench(mode, operations):
+    calc = Calculator(history_size=len(operations))
+    start = time.perf_counter()
+    for name, a, b in operations:
+        calc.calculate(name, a, b, mode=mode)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    operations = make_operations(count)
+    modes = [('float', get_mode('float')),
+             ('decimal (28 digits)', get_mode('decimal')),
+             ('decimal (100 digits)', get_mode('decimal', 100)),
+             ('fraction', get_mode('fraction'))]
+
+    print(f"operations: {count}")
+    baseline = None
+    for label, mode in modes:
+        elapsed = bench(mode, operations)
+        baseline = baseline or elapsed
+        print(f"{label:<22} {elapsed:.3f}s  ({count / elapsed:,.0f} ops/s, {elapsed / baseline:.1f}x float)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of cheap operations while a costly one runs in another thread
+
+Runs power(3, exponent) in a background thread while another thread does an
+addition every millisecond, and reports the longest gap between additions, first with everything in-process (the big power
+holds the GIL) and then with the power offloaded to a process pool.
+
+Usage: python benchmarks/bench_offload.py [exponent]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator import Calculator  # noqa: E402
+from offload import Offloader  # noqa: E402
+
+
+def run(offloader, exponent):
+    heavy = Calculator(offloader=offloader)
+    cheap = Calculator(offloader=offloader)
+    worker = threading.Thread(target=heavy.power, args=(3, exponent))
+    start = time.perf_counter()
+    done = [start]
+    worker.start()
+    while worker.is_alive():
+        time.sleep(0.001)
+        cheap.add(1, 2)
+        done.append(time.perf_counter())
+    elapsed = time.perf_counter() - start
+    # A stalled thread shows up as a long gap between two additions
+    gaps = [later - earlier for earlier, later in zip(done, done[1:])]
+    return elapsed, gaps
+
+
+def main():
+    exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 3000000
+    inline = Offloader(workers=0, max_result_bits=None)
+    pooled = Offloader(workers=1, max_result_bits=None, timeout=None)
+    pooled.call(pooled.min_bits, pow, 2, 2)  # start the pool outside the timing
+
+    print(f"power(3, {exponent})")
+    for label, offloader in (('in-process', inline), ('offloaded', pooled)):
+        elapsed, gaps = run(offloader, exponent)
+        print(f"{label:<11} power took {elapsed:6.2f}s; {len(gaps):5} additions meanwhile, "
+              f"longest gap {max(gaps) * 1000:7.1f} ms, median {statistics.median(gaps) * 1000:5.2f} ms")
+    pooled.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON encoding time and bytes on the wire
+
+Encodes typical API payloads (a /calculate response, /history pages and a
+/calculate/batch result list) with the standard library encoder Flask used
+before and with the fast encoder, then reports the body size uncompressed,
+gzipped and (if brotli is installed) brotli-compressed, with the time each
+compression takes.
+
+Usage: python benchmarks/bench_serialization.py [repeat]
+"""
+
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from calculator import Calculator  # noqa: E402
+from numeric import to_json  # noqa: E402
+from serialization import available_encodings, compress, get_encoder, orjson  # noqa: E402
+
+
+def flask_stdlib(obj):
+    """What jsonify produced before: sorted keys, ", " separators, ASCII escapes."""
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def payloads():
+    calc = Calculator()
+    for i in range(1000):
+        calc.multiply(i, 1.5)
+    return {
+        'calculate': {'success': True, 'result': 12.5, 'mode': 'float',
+                      'entry': calc.get_history(999)[0], 'seq': 1000},
+        'history-50': {'history': calc.get_history(950, 50), 'offset': 950, 'limit': 50,
+                       'total': 1000, 'seq': 1000},
+        'history-500': {'history': calc.get_history(500, 500), 'offset': 500, 'limit': 500,
+                        'total': 1000, 'seq': 1000},
+        'batch-1000': {'success': True, 'count': 1000,
+                       'results': [{'success': True, 'result': i * 1.5} for i in range(1000)]},
+        'factorial-3000': {'success': True, 'result': to_json(math.factorial(3000))},
+    }
+
+
+def timed(func, value, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(value)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    encoders = [('stdlib (before)', flask_stdlib), ('stdlib compact', get_encoder('stdlib'))]
+    if orjson is not None:
+        encoders.append(('orjson', get_encoder('orjson')))
+
+    print(f"{'payload':<16} {'encoder':<16} {'encode':>10} {'bytes':>9}")
+    for name, payload in payloads().items():
+        for label, dumps in encoders:
+            seconds, body = timed(dumps, payload, repeat)
+            print(f"{name:<16} {label:<16} {seconds * 1e6:8.1f}us {len(body):>9,}")
+
+    print(f"\n{'payload':<16} {'coding':<8} {'bytes':>9} {'compress':>10}")
+    for name, payload in payloads().items():
+        body = get_encoder()(payload)
+        print(f"{name:<16} {'none':<8} {len(body):>9,} {'-':>10}")
+        for encoding in available_encodings():
+            seconds, compressed = timed(lambda data: compress(data, encoding), body, max(1, repeat // 10))
+            print(f"{name:<16} {encoding:<8} {len(compressed):>9,} {seconds * 1e6:8.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: table lookups versus /calculate for a repeated operand grid
+
+Registers a percentage table (totals x rates), then requests every cell once
+through POST /calculate and once through GET /tables/<name>/<row>/<column>.
+Both run through the Flask test client, so the numbers reflect request
+handling without network noise. Also reports the table's size and the cost
+of registering it.
+
+Usage: python benchmarks/bench_tables.py [num_rows] [num_columns]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as webapp  # noqa: E402
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    totals = [str(1000 + 250 * i) for i in range(rows)]
+    rates = [f'{0.5 * (j + 1):g}' for j in range(columns)]
+    client = webapp.app.test_client()
+    # One client sending everything; measure handling, not the rate limiter
+    webapp.rate_limiter = None
+    webapp.sessions.clear()
+
+    start = time.perf_counter()
+    response = client.post('/tables', json={'name': 'rates', 'operation': 'percentage',
+                                            'rows': totals, 'columns': rates})
+    register = time.perf_counter() - start
+    table = response.get_json()
+
+    start = time.perf_counter()
+    for total in totals:
+        for rate in rates:
+            client.post('/calculate', json={'operation': 'percentage', 'num1': total, 'num2': rate})
+    calculate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(rows):
+        for j in range(columns):
+            client.get(f'/tables/rates/{i}/{j}')
+    lookup = time.perf_counter() - start
+
+    cells = rows * columns
+    print(f"cells:             {cells} ({rows} x {columns}), {table['bytes']:,} bytes")
+    print(f"register:          {register * 1000:.1f} ms")
+    print(f"/calculate:        {calculate / cells * 1e6:8.1f} us/request")
+    print(f"table lookup:      {lookup / cells * 1e6:8.1f} us/request")
+    print(f"speedup:           {calculate / lookup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Load test: Werkzeug dev server versus gunicorn
+
+Starts each server on a free local port, hammers POST /calculate from
+concurrent client threads for a fixed time, and reports requests/sec with
+p50/p99 latency.
+
+Usage: python benchmarks/load_test.py [--clients 16] [--duration 10] [--workers 2]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+BODY = json.dumps({'operation': 'multiply', 'num1': '12.5', 'num2': '8'})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def start_server(mode, port, workers, threads, **settings):
+    """Start the app; settings are extra environment variables (e.g. CALC_RATE_LIMIT='0')."""
+    env = dict(os.environ, PORT=str(port), FLASK_ENV='production',
+               WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), **settings)
+    if mode == 'dev':
+        command = [sys.executable, 'app.py']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+                   '--access-logfile', '/dev/null', 'wsgi:app']
+    return subprocess.Popen(command, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def client_loop(port, stop_at, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Content-Type': 'application/json'}
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/calculate', body=BODY, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except OSError as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(mode, args):
+    port = free_port()
+    # Every client shares one address, so measure raw throughput without rate limits
+    server = start_server(mode, port, args.workers, args.threads,
+                          CALC_RATE_LIMIT='0', CALC_MAX_CONCURRENT='0')
+    try:
+        wait_until_up(port)
+        latencies, errors = [], []
+        stop_at = time.perf_counter() + args.duration
+        clients = [threading.Thread(target=client_loop, args=(port, stop_at, latencies, errors))
+                   for _ in range(args.clients)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not latencies:
+        print(f"{mode:>9}: no successful requests ({len(errors)} errors)")
+        return
+    print(f"{mode:>9}: {len(latencies) / args.duration:8.0f} req/s   "
+          f"p50 {percentile(latencies, 0.50) * 1000:6.1f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms   errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per server, "
+          f"gunicorn: {args.workers} workers x {args.threads} threads")
+    for mode in ('dev', 'gunicorn'):
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
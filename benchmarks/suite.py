@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: Calculator methods, the Flask routes, JSON encoding and the CLI
+
+Every case is timed the way timeit does it: the loop count is raised until
+one run takes at least --min-time seconds, the run is repeated --repeat times
+and the fastest run gives the time per call. Results are written as JSON so a
+later run can be compared against a saved baseline:
+
+    python benchmarks/suite.py --output benchmarks/results/baseline.json
+    python benchmarks/suite.py --compare benchmarks/results/baseline.json
+
+With --compare the script exits with status 1 if any case got slower than the
+baseline by more than --threshold (default 25%). `make bench` and
+`make bench-baseline` wrap these two commands.
+
+Usage: python benchmarks/suite.py [--filter calculator/] [--output FILE]
+                                  [--compare FILE] [--threshold 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as webapp  # noqa: E402
+import main as cli  # noqa: E402
+from calculator import Calculator  # noqa: E402
+from history import History  # noqa: E402
+
+# Operands per size class; "big" is ~100-digit integers
+OPERANDS = {
+    'small': (7, 3),
+    'float': (12.5, 3.25),
+    'big': (10 ** 100 + 7, 10 ** 50 + 3),
+}
+BINARY_METHODS = ('add', 'subtract', 'multiply', 'divide', 'percentage')
+FACTORIAL_SIZES = (20, 200, 2000)
+HISTORY_LENGTHS = (10, 100, 1000)
+CLI_CALCULATIONS = 100
+
+CASES = {}
+
+
+def case(name):
+    """Register a benchmark; the decorated factory returns the callable to time."""
+    def register(factory):
+        CASES[name] = factory
+        return factory
+    return register
+
+
+def _calculator_cases():
+    for size, (a, b) in OPERANDS.items():
+        for method in BINARY_METHODS:
+            case(f'calculator/{method}/{size}')(
+                lambda method=method, a=a, b=b: lambda calc=Calculator(): getattr(calc, method)(a, b))
+        case(f'calculator/power/{size}')(
+            lambda a=a: lambda calc=Calculator(): calc.power(a, 3))
+        case(f'calculator/square_root/{size}')(
+            lambda a=a: lambda calc=Calculator(): calc.square_root(float(a)))
+    for n in FACTORIAL_SIZES:
+        case(f'calculator/factorial/{n}')(
+            lambda n=n: lambda calc=Calculator(): calc.factorial(n))
+
+
+_calculator_cases()
+
+
+def _client_with_history(length):
+    """A test client whose session history is full at `length` entries.
+
+    The history is a ring buffer of that capacity, so timed requests keep
+    its length fixed instead of growing it.
+    """
+    session_id = f'bench-{length}'
+    client = webapp.app.test_client()
+    client.set_cookie(webapp.SESSION_COOKIE, session_id)
+    calc = webapp.sessions.get(session_id)
+    calc.history = History(length)
+    for i in range(length):
+        calc.add(i, i)
+    return client
+
+
+def _route_cases():
+    body = {'operation': 'multiply', 'num1': '12.5', 'num2': '8'}
+    for length in HISTORY_LENGTHS:
+        case(f'routes/calculate/history-{length}')(
+            lambda length=length: lambda client=_client_with_history(length):
+                client.post('/calculate', json=body))
+        case(f'routes/history/history-{length}')(
+            lambda length=length: lambda client=_client_with_history(length):
+                client.get('/history?offset=0&limit=50'))
+    case('routes/history/history-1000-limit-500')(
+        lambda: lambda client=_client_with_history(1000):
+            client.get('/history?offset=0&limit=500'))
+
+    def batch():
+        client = webapp.app.test_client()
+        operations = [{'operation': 'add', 'num1': i, 'num2': i} for i in range(100)]
+        return lambda: client.post('/calculate/batch', json=operations)
+    case('routes/batch/100')(batch)
+
+
+_route_cases()
+
+
+def _json_cases():
+    calc = Calculator()
+    for i in range(1000):
+        calc.multiply(i, 1.5)
+    pages = {50: calc.get_history(950, 50), 500: calc.get_history(500, 500)}
+    for size, page in pages.items():
+        case(f'json/history-{size}')(lambda page=page: lambda: json.dumps({'history': page}))
+    results = [{'success': True, 'result': i * 1.5} for i in range(1000)]
+    case('json/batch-results-1000')(lambda: lambda: json.dumps({'results': results}))
+
+    def jsonify_page():
+        page = pages[50]
+        def run():
+            with webapp.app.app_context():
+                webapp.jsonify({'success': True, 'result': 1, 'history': page}).get_data()
+        return run
+    case('json/jsonify-history-50')(jsonify_page)
+
+
+_json_cases()
+
+
+@case(f'cli/interactive/{CLI_CALCULATIONS}-calculations')
+def cli_session():
+    # Menu choice 1 is addition: choice, first operand, second operand
+    script = '1\n2\n3\n' * CLI_CALCULATIONS + '0\n'
+    def run():
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(script)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.interactive_calculator()
+        finally:
+            sys.stdin = stdin
+    return run
+
+
+def measure(func, min_time, repeat):
+    """Return (seconds per call, loops) from the fastest of `repeat` runs."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / loops, loops
+
+
+def run_suite(names, min_time, repeat):
+    results = {}
+    for name in names:
+        seconds, loops = measure(CASES[name](), min_time, repeat)
+        results[name] = {'seconds': seconds, 'loops': loops, 'repeat': repeat}
+        print(f"{name:<48} {format_time(seconds):>12}")
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline for shared cases; return the names that regressed."""
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['seconds'], result['seconds']
+        change = after / before - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<48} {format_time(before):>12} {format_time(after):>12} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown before a case counts as a regression')
+    parser.add_argument('--min-time', type=float, default=0.05)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--list', action='store_true', help='list case names and exit')
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.filter in name]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+
+    results = run_suite(names, args.min_time, args.repeat)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"\nNo baseline at {args.compare}; run `make bench-baseline` to create one.")
+            return 0
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Result Cache - memoization for expensive Calculator operations
+
+Calculator looks results up here before computing factorial, power and
+square_root. Two implementations share the same small interface:
+
+- ResultCache: in-process LRU bounded by the approximate size of the cached
+  results in bytes (large factorials are big integers, so counting entries
+  is not enough).
+- SharedResultCache: the same interface stored in an SQLite file, so several
+  worker processes on one host can share results.
+
+Both can also hand back the largest cached factorial at or below n, which
+lets Calculator.factorial extend a known k! instead of starting from 1.
+"""
+
+import bisect
+import decimal
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(operation, *operands):
+    """Build a cache key; operand types are included so 2 and 2.0 differ."""
+    key = (operation,) + tuple((type(x).__name__, x) for x in operands)
+    if any(isinstance(x, Decimal) for x in operands):
+        # Decimal results depend on the active precision
+        key += (('prec', decimal.getcontext().prec),)
+    return key
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by the total size of cached results."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._factorials = []  # sorted n for which ('factorial', n) is cached
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            elif key[0] == 'factorial':
+                bisect.insort(self._factorials, key[1][1])
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        key, (_, size) = self._entries.popitem(last=False)
+        self._bytes -= size
+        if key[0] == 'factorial':
+            del self._factorials[bisect.bisect_left(self._factorials, key[1][1])]
+
+    def factorial_prefix(self, n):
+        """Return (k, k!) for the largest cached k <= n, or (0, 1)."""
+        with self._lock:
+            i = bisect.bisect_right(self._factorials, n)
+            if i == 0:
+                return 0, 1
+            k = self._factorials[i - 1]
+            key = make_key('factorial', k)
+            self._entries.move_to_end(key)
+            return k, self._entries[key][0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._factorials = []
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+# sqlite3, json and the encoding are imported only once a shared cache is used,
+# so plain Calculator use never pays for them. Values are stored as tagged JSON
+# (the encoding history_store.py and redis_store.py use), never pickled: anyone
+# able to write the cache file could otherwise run code in every worker.
+
+def dump_value(value):
+    """value as JSON text, or None if it can't be stored (e.g. a complex result)."""
+    import json
+    from history_store import encode_value
+    try:
+        return json.dumps(encode_value(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_value(blob):
+    """The value dump_value() stored, or None for anything else."""
+    import json
+    from history_store import decode_value
+    try:
+        return decode_value(json.loads(blob))
+    except ValueError:
+        # e.g. a pickle written by an older version
+        logger.warning("Ignoring an unreadable cached result")
+        return None
+
+
+class SharedResultCache:
+    """ResultCache interface backed by an SQLite file shared between processes.
+
+    Hit/miss counters are kept per process; entries and the byte budget are
+    shared. Eviction drops the least recently used rows.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, factorial_n INTEGER,"
+                " value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_factorial ON results (factorial_n)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            import sqlite3
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def get(self, key):
+        db = self._connect()
+        row = db.execute("SELECT value FROM results WHERE key = ?", (repr(key),)).fetchone()
+        value = None if row is None else load_value(row[0])
+        if value is None:
+            self.misses += 1
+            return None
+        db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), repr(key)))
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        blob = dump_value(value)
+        if blob is None or len(blob) > self.max_bytes:
+            return
+        factorial_n = key[1][1] if key[0] == 'factorial' else None
+        db = self._connect()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (repr(key), factorial_n, blob, len(blob), time.time()),
+            )
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            for row_key, size in db.execute("SELECT key, size FROM results ORDER BY used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM results WHERE key = ?", (row_key,))
+                total -= size
+
+    def factorial_prefix(self, n):
+        row = self._connect().execute(
+            "SELECT factorial_n, value FROM results WHERE factorial_n <= ?"
+            " ORDER BY factorial_n DESC LIMIT 1", (n,)
+        ).fetchone()
+        prefix = None if row is None else load_value(row[1])
+        return (0, 1) if prefix is None else (row[0], prefix)
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        self._connect().execute("DELETE FROM results")
+        self.hits = 0
+        self.misses = 0
@@ -4,34 +4,185 @@ Simple Calculator Class - Student Implementation Required
 Students need to implement all the methods below.
 """
 
+import operator
+
+from aggregates import DEFAULT_SKETCH_SIZE, Aggregate
+from cache import make_key
+from expression import default_cache as expression_cache
+from factorial import FactorialEngine, compute as compute_factorial
+from history import DEFAULT_CAPACITY, History
+from numeric import FLOAT, sqrt
+from operations import registry
+
+
+def percentage(a, b):
+    """b percent of a (module level so the offloader can pickle it)"""
+    return a * b / 100
+
 
 class Calculator:
-    def __init__(self):
-        self.history = []
+    # Operation table shared by the web app, the CLI and the expression evaluator
+    registry = registry
+
+    def __init__(self, history_size=DEFAULT_CAPACITY, cache=None, factorial_engine=None,
+                 history=None, offloader=None, single_flight=None):
+        # Pass history= to use another History implementation (e.g. PersistentHistory)
+        self.history = history if history is not None else History(history_size)
+        # Optional ResultCache/SharedResultCache for power, square_root and factorial
+        self.cache = cache
+        self.factorial_engine = factorial_engine or FactorialEngine()
+        # Optional Offloader: size limits and a process pool for costly operations
+        self.offloader = offloader
+        # Optional SingleFlight shared between calculators: concurrent identical
+        # cached or costly operations are computed once
+        self.single_flight = single_flight
+        self._vector = None
+
+    @property
+    def vector(self):
+        """Array mode: the same operations over lists/NumPy arrays (needs NumPy)."""
+        if self._vector is None:
+            # Imported lazily so the scalar calculator never pulls in NumPy
+            from vector_calculator import VectorCalculator
+            self._vector = VectorCalculator(self.factorial_engine, self.offloader)
+        return self._vector
 
     def add(self, a, b):
         """Add two numbers"""
-        return a + b
-
-        # TODO: Implement addition
-        # Hint: result = a + b, then add to history
-        return a + b
+        result = a + b
+        self.history.record('add', a, b, result)
+        return result
 
     def subtract(self, a, b):
         """Subtract b from a"""
-        return a -b
+        result = a - b
+        self.history.record('subtract', a, b, result)
+        return result
 
     def multiply(self, a, b):
-        return a * b
+        result = self._heavy('multiply', (a, b), operator.mul, a, b)
+        self.history.record('multiply', a, b, result)
+        return result
 
     def divide(self, a, b):
-        # TODO: Implement division
-        return a / b
-    
-    def get_history(self):     
-        """Return calculation history"""
-        return self.history
+        if b == 0:
+            raise ValueError("Cannot divide by zero")
+        result = self._heavy('divide', (a, b), operator.truediv, a, b)
+        self.history.record('divide', a, b, result)
+        return result
+
+    def power(self, a, b):
+        """Raise a to the power of b"""
+        if a < 0 and not isinstance(b, int) and b % 1 != 0:
+            # The result would be complex
+            raise ValueError("Cannot raise a negative number to a fractional power")
+        result = self._cached(make_key('power', a, b),
+                              lambda: self._heavy('power', (a, b), operator.pow, a, b))
+        self.history.record('power', a, b, result)
+        return result
+
+    def square_root(self, a):
+        """Return the square root of a"""
+        if a < 0:
+            raise ValueError("Cannot calculate square root of negative number")
+        result = self._cached(make_key('square_root', a), lambda: sqrt(a))
+        self.history.record('square_root', a, None, result)
+        return result
+
+    def factorial(self, n):
+        """Return n! for a non-negative integer n"""
+        if isinstance(n, float):
+            if not n.is_integer():
+                raise ValueError("Factorial requires an integer")
+            n = int(n)
+        if not isinstance(n, int):
+            raise ValueError("Factorial requires an integer")
+        if n < 0:
+            raise ValueError("Cannot calculate factorial of negative number")
+        self.factorial_engine.check(n)
+        result = self._cached(make_key('factorial', n), lambda: self._factorial(n))
+        self.history.record('factorial', n, None, result)
+        return result
+
+    def _factorial(self, n):
+        # Continue from the largest cached k! <= n rather than from 1
+        k, prefix = self.cache.factorial_prefix(n) if self.cache is not None else (0, 1)
+        engine = self.factorial_engine
+        if self.offloader is not None and self.offloader.workers:
+            return self._heavy('factorial', (n,), compute_factorial, n, k, prefix, engine.time_budget)
+        return engine.factorial(n, k, prefix)
+
+    def _heavy(self, name, values, func, *args):
+        """Return func(*args), through the offloader (if any) using name's cost estimate"""
+        if self.offloader is None:
+            return func(*args)
+        return self.offloader.call(self.registry.get(name).cost(*values), func, *args)
+
+    def percentage(self, a, b):
+        """Return b percent of a"""
+        result = self._heavy('percentage', (a, b), percentage, a, b)
+        self.history.record('percentage', a, b, result)
+        return result
+
+    def calculate(self, name, *operands, mode=FLOAT):
+        """Run any registered operation by name; raw operands are parsed first
+
+        mode (see numeric.py) picks float, Decimal or Fraction arithmetic.
+        """
+        operation = self.registry.get(name)
+        return self.run(operation, operation.coerce(operands, mode.parse), mode)
+
+    def run(self, operation, values, mode=FLOAT):
+        """Run a registered Operation on already coerced values"""
+        with mode.context():
+            if operation.method is not None:
+                return getattr(self, operation.method)(*values)
+            if operation.cost is not None and self.offloader is not None:
+                result = self._coalesced(
+                    make_key(operation.name, *values),
+                    lambda: self.offloader.call(operation.cost(*values), operation.func, *values))
+            else:
+                result = operation.func(*values)
+        a, b = values if len(values) == 2 else (values[0], None)
+        self.history.record(operation.name, a, b, result)
+        return result
+
+    def aggregate(self, values, sketch_size=DEFAULT_SKETCH_SIZE):
+        """Summarise a sequence or stream of numbers in one pass (see aggregates.py)
+
+        Returns an Aggregate: count, sum, mean, variance(), stddev(), min, max,
+        percentile(p) and histogram(bins), mergeable with others.
+        """
+        return Aggregate(sketch_size).update(values)
+
+    def evaluate(self, expression, variables=None):
+        """Evaluate an expression such as "2^10 + sqrt(x) * 5!" (see expression.py)"""
+        return expression_cache.compile(expression).evaluate(self, variables)
+
+    def _cached(self, key, compute):
+        if self.cache is None:
+            return self._coalesced(key, compute)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._coalesced(key, lambda: self._compute_and_store(key, compute))
+        return result
+
+    def _compute_and_store(self, key, compute):
+        # Stored before the waiters are released, so callers arriving after
+        # this flight ends hit the cache instead of starting another one
+        result = compute()
+        self.cache.put(key, result)
+        return result
+
+    def _coalesced(self, key, compute):
+        if self.single_flight is None:
+            return compute()
+        return self.single_flight.do(key, compute)
+
+    def get_history(self, offset=0, limit=None):
+        """Return calculation history as text, oldest first (optionally one page)"""
+        return [str(entry) for entry in self.history.entries(offset, limit)]
 
     def clear_history(self):
         """Clear calculation history"""
-        self.history = []
+        self.history.clear()
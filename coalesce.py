@@ -0,0 +1,72 @@
+"""
+Request Coalescing - one computation for identical concurrent operations
+
+When several requests ask for the same expensive result at once (say, the
+factorial of the same large n) the result cache doesn't help: each of them
+misses before any has finished. SingleFlight.do(key, compute) lets the first
+caller for a key run compute() while later callers with the same key wait
+for it and receive the same result, or the same exception.
+
+A key is in flight only while it is being computed; once it finishes the
+next caller starts a new computation (by then the result cache normally has
+the answer). Calculator keys its cached and costly operations with
+cache.make_key(), so coalesced callers always agree on operand types and,
+for Decimals, on precision.
+"""
+
+import threading
+
+
+class _Call:
+    """One in-flight computation and the outcome its waiters receive."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe de-duplication of concurrent calls with equal keys."""
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute):
+        """Return compute(), sharing one run among concurrent callers with this key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        return {'executions': self.executions, 'coalesced': self.coalesced,
+                'in_flight': self.in_flight()}
@@ -0,0 +1,473 @@
+"""
+Conformance - randomized correctness checks for Calculator and its engines
+
+Feeds random operands to every Calculator method and compares each answer
+with an independent reference. The operands include small and huge
+integers, ordinary floats, and edge cases such as -0.0, subnormals and
+values near overflow. The references are:
+
+- exact Fraction arithmetic, rounded once, for +, -, ×, ÷ and percentages
+- 50-digit Decimal arithmetic for powers and square roots
+- math.factorial for factorials
+
+Errors must match too. Where the reference raises, the calculator must
+raise the same kind of exception (ValueError, OverflowError or
+ZeroDivisionError), and the other way round. Results must have the right
+type (int or float) and be within the listed number of ulps of the
+reference, or equal exactly where IEEE arithmetic is correctly rounded.
+
+The accelerated engines are held to the same references:
+- FactorialEngine (the split product) against math.factorial.
+- With NumPy installed, VectorCalculator element by element on arrays of
+  VECTOR_LENGTH operands.
+
+Each check counts one comparison (one array element for the vector checks).
+The checks are split into shards. Each shard has its own seed and runs in a
+process pool across the cores. A failure reports the shard's seed, so it can
+be replayed on its own:
+
+    python conformance.py --checks 2000000            # every core
+    python conformance.py --checks 1000 --seed 17 --workers 1
+
+Methods a student hasn't implemented yet (they return None) are skipped.
+is_implemented() probes each method once per process and caches the answer,
+and test_calculator.py uses the same probes.
+"""
+
+import decimal
+import functools
+import math
+import random
+import sys
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+from calculator import Calculator
+from factorial import FactorialEngine
+
+DEFAULT_CHECKS = 1_000_000
+# Shards per worker: small enough to balance the load, large enough to amortise startup
+SHARDS_PER_WORKER = 4
+# Failures kept in a report
+MAX_FAILURES = 20
+VECTOR_LENGTH = 64
+# Allowed error, in units in the last place, for results that are rounded more than once
+ULPS = {'percentage': 2, 'power': 2, 'vector': 2}
+# Digits carried by the Decimal references (double rounding to float is then negligible)
+REFERENCE_PRECISION = 50
+
+MAX_FLOAT = sys.float_info.max
+EDGE_FLOATS = (0.0, -0.0, 5e-324, -5e-324, 2.2250738585072014e-308, MAX_FLOAT, -MAX_FLOAT,
+               sys.float_info.epsilon, 0.1, 0.5, 1.0, -1.0, 1e16, 2.0 ** 53, 1e308, 1e-308)
+EDGE_INTS = (0, 1, -1, 2, 2 ** 53 - 1, 2 ** 53 + 1, -(2 ** 53 + 1), 2 ** 63 - 1, -(2 ** 63),
+             2 ** 64, 10 ** 308, 2 ** 1024, -(2 ** 1024))
+
+# Arguments each method is probed with; a None result means "not implemented yet"
+PROBES = {
+    'add': (1, 1),
+    'subtract': (2, 1),
+    'multiply': (2, 2),
+    'divide': (4, 2),
+    'power': (2, 2),
+    'square_root': (4,),
+    'factorial': (3,),
+    'percentage': (100, 10),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def is_implemented(cls, method_name):
+    """Whether cls().method_name returns something for the probe arguments.
+
+    Probed once per class and method; exceptions other than AttributeError
+    and TypeError count as implemented (the method exists and validates).
+    """
+    if method_name not in PROBES or not hasattr(cls, method_name):
+        return False
+    try:
+        return getattr(cls(), method_name)(*PROBES[method_name]) is not None
+    except (AttributeError, TypeError):
+        return False
+    except Exception:
+        return True
+
+
+# Operand generators: each takes a random.Random
+
+def random_int(rng):
+    kind = rng.random()
+    if kind < 0.5:
+        return rng.randint(-1000, 1000)
+    if kind < 0.75:
+        return rng.randint(-2 ** 63, 2 ** 63)
+    if kind < 0.9:
+        return rng.choice(EDGE_INTS)
+    return rng.getrandbits(rng.randint(64, 4096)) * rng.choice((1, -1))
+
+
+def random_float(rng):
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.uniform(-1e6, 1e6)
+    if kind < 0.8:
+        # Any exponent, subnormals included
+        return math.ldexp(rng.uniform(-1, 1), rng.randint(-1074, 1024))
+    if kind < 0.9:
+        return float(rng.randint(-10 ** 6, 10 ** 6))
+    return rng.choice(EDGE_FLOATS)
+
+
+def random_number(rng):
+    return random_int(rng) if rng.random() < 0.5 else random_float(rng)
+
+
+# References: return the expected result or raise the expected exception
+
+def _floats(*values):
+    """Operands as Python converts them for mixed arithmetic (OverflowError for huge ints)."""
+    return tuple(float(value) for value in values)
+
+
+def _round(exact):
+    """Round an exact result to a float the way IEEE +, -, × and ÷ do: overflow gives inf."""
+    try:
+        return float(exact)
+    except OverflowError:
+        return math.inf if exact > 0 else -math.inf
+
+
+def _exact_binary(op):
+    def reference(a, b):
+        if type(a) is int and type(b) is int:
+            return op(Fraction(a), Fraction(b)).numerator
+        x, y = _floats(a, b)
+        return _round(op(Fraction(x), Fraction(y)))
+    return reference
+
+
+def reference_divide(a, b):
+    if b == 0:
+        raise ValueError("Cannot divide by zero")
+    if type(a) is int and type(b) is int:
+        # True division of ints is rounded once, and raises when out of range
+        return float(Fraction(a, b))
+    x, y = _floats(a, b)
+    return _round(Fraction(x) / Fraction(y))
+
+
+def reference_percentage(a, b):
+    if type(a) is int and type(b) is int:
+        return float(Fraction(a * b, 100))
+    x, y = _floats(a, b)
+    product = Fraction(x) * Fraction(y)
+    if abs(product) > MAX_FLOAT:
+        # a * b overflows before it is divided by 100
+        return math.inf if product > 0 else -math.inf
+    return _round(product / 100)
+
+
+def _decimal_to_float(value):
+    if abs(value) > MAX_FLOAT:
+        raise OverflowError("Numerical result out of range")
+    return float(value)
+
+
+def reference_power(a, b):
+    if type(a) is int and type(b) is int and b >= 0:
+        return math.prod([a] * b)
+    if a < 0 and type(b) is float and not b.is_integer():
+        raise ValueError("Negative numbers have no real fractional powers")
+    x, y = _floats(a, b)
+    if y == 0:
+        # IEEE pow: x ** 0 is 1, even for 0 (Decimal calls 0 ** 0 undefined)
+        return 1.0
+    if x == 0 and y < 0:
+        raise ZeroDivisionError("0.0 cannot be raised to a negative power")
+    context = decimal.Context(prec=REFERENCE_PRECISION)
+    # create_decimal rounds to the context: exact tiny or huge floats have hundreds of digits
+    return _decimal_to_float(context.power(context.create_decimal(x), context.create_decimal(y)))
+
+
+def reference_square_root(a):
+    if a < 0:
+        raise ValueError("Cannot calculate square root of negative number")
+    (x,) = _floats(a)
+    return float(decimal.Context(prec=REFERENCE_PRECISION).sqrt(Decimal(x)))
+
+
+def reference_factorial(n):
+    if isinstance(n, float):
+        if not n.is_integer():
+            raise ValueError("Factorial requires an integer")
+        n = int(n)
+    if n < 0:
+        raise ValueError("Cannot calculate factorial of negative number")
+    return math.factorial(n)
+
+
+def power_operands(rng):
+    kind = rng.random()
+    if kind < 0.4:
+        base = random_int(rng)
+        # Keep results of huge bases to a few hundred thousand bits
+        return base, rng.randint(-20, 64 if abs(base) < 2 ** 64 else 4)
+    if kind < 0.7:
+        return abs(random_float(rng)), rng.uniform(-50, 50)
+    if kind < 0.85:
+        return random_float(rng), float(rng.randint(-40, 40))
+    if kind < 0.95:
+        return rng.uniform(0, 1e3), random_int(rng) % 200 - 100
+    # Complex results: negative bases with fractional exponents
+    return -abs(random_number(rng)), rng.uniform(-50, 50)
+
+
+def factorial_operand(rng):
+    kind = rng.random()
+    if kind < 0.7:
+        return rng.randint(0, 300)
+    if kind < 0.8:
+        return rng.randint(-10, -1)
+    if kind < 0.9:
+        n = rng.randint(0, 100)
+        return float(n) if rng.random() < 0.5 else n + rng.random()
+    return rng.randint(300, 6000)
+
+
+def _pair(rng):
+    return random_number(rng), random_number(rng)
+
+
+# name -> (operand generator, reference)
+CASES = {
+    'add': (_pair, _exact_binary(lambda a, b: a + b)),
+    'subtract': (_pair, _exact_binary(lambda a, b: a - b)),
+    'multiply': (_pair, _exact_binary(lambda a, b: a * b)),
+    'divide': (_pair, reference_divide),
+    'power': (power_operands, reference_power),
+    'square_root': (lambda rng: (random_number(rng),), reference_square_root),
+    'factorial': (lambda rng: (factorial_operand(rng),), reference_factorial),
+    'percentage': (_pair, reference_percentage),
+}
+# Share of the steps that check a whole VectorCalculator call (VECTOR_LENGTH checks each)
+VECTOR_SHARE = 0.01
+# Share of the steps that call FactorialEngine directly
+ENGINE_SHARE = 0.05
+
+
+def vector_operands(rng, name):
+    """Two same-length lists (one for unary operations) in the vector calculator's domain."""
+    def ints(low, high):
+        return [rng.randint(low, high) for _ in range(VECTOR_LENGTH)]
+
+    def floats(low, high):
+        return [rng.uniform(low, high) for _ in range(VECTOR_LENGTH)]
+
+    def numbers(low, high):
+        return ints(int(low), int(high)) if rng.random() < 0.5 else floats(low, high)
+
+    if name == 'factorial':
+        return (ints(0, 25),)
+    if name == 'square_root':
+        return (numbers(0, 2 ** 62),)
+    if name == 'power':
+        kind = rng.random()
+        if kind < 0.5:
+            return ints(-2 ** 20, 2 ** 20), ints(0, 8)
+        if kind < 0.9:
+            return floats(1e-3, 1e3), numbers(-20, 20)
+        # Some negative bases with fractional exponents: the whole call fails
+        return floats(-1e3, 1e3), floats(-20, 20)
+    bound = 2 ** rng.choice((10, 31, 62))
+    a, b = numbers(-bound, bound), numbers(-bound, bound)
+    if name == 'divide':
+        b = [value or 1 for value in b]
+    return a, b
+
+
+def _error_kind(error):
+    for kind in (ZeroDivisionError, OverflowError, ValueError):
+        if isinstance(error, kind):
+            return kind.__name__
+    return type(error).__name__
+
+
+def _outcome(func, args):
+    """(True, result) or (False, kind of exception)."""
+    try:
+        return True, func(*args)
+    except Exception as e:
+        return False, _error_kind(e)
+
+
+def _agrees(expected, actual, ulps):
+    if type(expected) is not type(actual):
+        return False
+    if expected == actual or type(expected) is not float:
+        return expected == actual
+    if not (ulps and math.isfinite(expected) and math.isfinite(actual)):
+        return False
+    return abs(expected - actual) <= ulps * math.ulp(max(abs(expected), abs(actual)))
+
+
+def _short(value):
+    if type(value) is int and value.bit_length() > 128:
+        return f"<{value.bit_length()}-bit int>"
+    text = repr(value)
+    return text if len(text) <= 80 else text[:77] + '...'
+
+
+def _describe(name, args, expected, actual):
+    def show(outcome):
+        ok, value = outcome
+        return _short(value) if ok else f'raises {value}'
+    return f"{name}({', '.join(map(_short, args))}): expected {show(expected)}, got {show(actual)}"
+
+
+class Report:
+    """Totals from one or more shards."""
+
+    def __init__(self):
+        self.checks = 0
+        self.counts = {}
+        self.failures = []
+        self.skipped = set()
+        self.seconds = 0.0
+
+    def record(self, name, ok, describe, seed, checks):
+        self.checks += 1
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if not ok and len(self.failures) < MAX_FAILURES:
+            self.failures.append(f"{describe()}  [replay: --seed {seed} --shards 1 --checks {checks}]")
+
+    def merge(self, other):
+        self.checks += other.checks
+        for name, count in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + count
+        self.failures.extend(other.failures[:max(0, MAX_FAILURES - len(self.failures))])
+        self.skipped |= other.skipped
+        return self
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def summary(self):
+        rate = self.checks / self.seconds if self.seconds else 0
+        lines = [f"{self.checks:,} checks in {self.seconds:.1f}s ({rate:,.0f}/s): "
+                 f"{'all passed' if self.ok else f'{len(self.failures)}+ failed'}"]
+        lines += [f"  {name:<20} {count:>12,}" for name, count in sorted(self.counts.items())]
+        if self.skipped:
+            lines.append(f"  not implemented, skipped: {', '.join(sorted(self.skipped))}")
+        return '\n'.join(lines + self.failures)
+
+
+def _vector_calculator():
+    try:
+        from vector_calculator import VectorCalculator
+        return VectorCalculator()
+    except (ImportError, RuntimeError):
+        return None
+
+
+def run_shard(seed, checks, calculator_class=Calculator, vector=True):
+    """Run about `checks` checks with operands drawn from random.Random(seed)."""
+    rng = random.Random(seed)
+    calc = calculator_class(history_size=1)
+    engine = FactorialEngine()
+    vectors = _vector_calculator() if vector else None
+    report = Report()
+    report.skipped = {name for name in CASES if not is_implemented(calculator_class, name)}
+    names = [name for name in CASES if name not in report.skipped]
+    if not names:
+        return report
+    while report.checks < checks:
+        step = rng.random()
+        if vectors is not None and step < VECTOR_SHARE:
+            name = rng.choice(names)
+            reference = CASES[name][1]
+            args = vector_operands(rng, name)
+            ok, result = _outcome(getattr(vectors, name), args)
+            rows = list(zip(*args))
+            if not ok:
+                # A call fails as a whole, so some element must fail the same way
+                outcomes = [_outcome(reference, row) for row in rows]
+                failed = next((i for i, outcome in enumerate(outcomes) if not outcome[0]), 0)
+                report.record(f'vector.{name}', (False, result) in outcomes,
+                              lambda: _describe(f'vector.{name}', rows[failed], outcomes[failed],
+                                                (False, result)),
+                              seed, checks)
+                continue
+            result = result.tolist()
+            for i, row in enumerate(rows):
+                expected = _outcome(reference, row)
+                actual = (True, result[i])
+                report.record(f'vector.{name}', expected[0] and
+                              _agrees(expected[1], actual[1], ULPS['vector']),
+                              lambda: _describe(f'vector.{name}', row, expected, actual),
+                              seed, checks)
+            continue
+        if step < VECTOR_SHARE + ENGINE_SHARE:
+            name, func = 'engine.factorial', engine.factorial
+            args = (rng.randint(0, 300) if rng.random() < 0.9 else rng.randint(300, 6000),)
+            reference = reference_factorial
+        else:
+            name = rng.choice(names)
+            operands, reference = CASES[name]
+            func = getattr(calc, name)
+            args = operands(rng)
+        expected = _outcome(reference, args)
+        actual = _outcome(func, args)
+        ok = expected[0] == actual[0] and (_agrees(expected[1], actual[1], ULPS.get(name, 0))
+                                           if expected[0] else expected[1] == actual[1])
+        report.record(name, ok, lambda: _describe(name, args, expected, actual), seed, checks)
+    return report
+
+
+def _run_task(task):
+    return run_shard(*task)
+
+
+def run(checks=DEFAULT_CHECKS, workers=1, seed=0, shards=None, calculator_class=Calculator,
+        vector=True):
+    """Split `checks` into shards seeded seed, seed+1, ... and run them on `workers` processes."""
+    shards = shards or max(1, workers) * SHARDS_PER_WORKER
+    tasks = [(seed + i, checks // shards + (i < checks % shards), calculator_class, vector)
+             for i in range(shards)]
+    start = time.perf_counter()
+    report = Report()
+    if workers > 1:
+        # Imported here so the single-process path stays light
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_run_task, tasks))
+    else:
+        parts = map(_run_task, tasks)
+    for part in parts:
+        report.merge(part)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checks', '-n', type=int, default=DEFAULT_CHECKS)
+    parser.add_argument('--workers', '-j', type=int, default=0,
+                        help=f'processes (0 = one per core: {os.cpu_count()})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shards', type=int, help=f'default: {SHARDS_PER_WORKER} per worker')
+    parser.add_argument('--no-vector', dest='vector', action='store_false',
+                        help='skip VectorCalculator')
+    args = parser.parse_args(argv)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    report = run(args.checks, workers, args.seed, args.shards, vector=args.vector)
+    print(report.summary())
+    return 0 if report.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+Expression Evaluator - parse once, evaluate many times
+
+Supports a small, safe calculator language:
+
+    2^10 + sqrt(49) * 5!        numbers, + - * / ^, postfix !, parentheses
+    rate * total / 100          variables, bound at evaluation time
+    power(2, 8) + percentage(200, x) + gcd(12, 18)
+
+An expression is parsed into a tree of closures once; evaluating it again
+with different variables only runs those closures. Every arithmetic step is
+dispatched to the Calculator methods, so results land in history and errors
+(divide by zero, negative square root, ...) are the same as calling the
+methods directly. Compiled expressions are kept in an LRU cache keyed by the
+source text.
+
+Nothing is passed to Python's eval(); only operations in the registry (plus
+ALIASES) and the caller's variables are reachable.
+"""
+
+import re
+from functools import lru_cache
+
+from operations import registry
+
+DEFAULT_CACHE_SIZE = 512
+
+# Binary operator symbol -> (precedence, registered operation name)
+BINARY_OPERATORS = {
+    '+': (1, 'add'),
+    '-': (1, 'subtract'),
+    '*': (2, 'multiply'),
+    '×': (2, 'multiply'),
+    '/': (2, 'divide'),
+    '÷': (2, 'divide'),
+}
+
+# Extra function names; every operation in the registry is callable by its own name
+ALIASES = {
+    'pow': 'power',
+    'sqrt': 'square_root',
+}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<op>[-+*/^!(),×÷√])
+    )""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    """Raised for syntax errors, unknown names and missing variables."""
+
+
+def tokenize(source):
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = TOKEN_PATTERN.match(source, position)
+        if match is None:
+            raise ExpressionError(f"Unexpected character {source[position:].lstrip()[:1]!r} "
+                                  f"at position {position}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+    tokens.append(('end', '', len(source)))
+    return tokens
+
+
+def _number(text):
+    value = float(text) if any(c in text for c in '.eE') else int(text)
+    return lambda calc, env: value
+
+
+def _variable(name):
+    def load(calc, env):
+        try:
+            return env[name]
+        except KeyError:
+            raise ExpressionError(f"Unknown variable: {name}")
+    return load
+
+
+def _negate(operand):
+    return lambda calc, env: -operand(calc, env)
+
+
+def _call(name, operands):
+    operation = registry.get(name)
+    if operation.method is None:
+        # Function-backed operations go through Calculator.calculate for coercion/history
+        if len(operands) == 1:
+            (a,) = operands
+            return lambda calc, env: calc.calculate(name, a(calc, env))
+        a, b = operands
+        return lambda calc, env: calc.calculate(name, a(calc, env), b(calc, env))
+    method = operation.method
+    if len(operands) == 1:
+        (a,) = operands
+        return lambda calc, env: getattr(calc, method)(a(calc, env))
+    a, b = operands
+    return lambda calc, env: getattr(calc, method)(a(calc, env), b(calc, env))
+
+
+class Parser:
+    """Recursive-descent parser producing a closure for each syntax node.
+
+    Grammar (lowest to highest precedence):
+        expr    := term (('+' | '-') term)*
+        term    := unary (('*' | '/') unary)*
+        unary   := ('-' | '+') unary | power
+        power   := postfix ('^' unary)?          # right associative
+        postfix := primary '!'*
+        primary := number | name | name '(' args ')' | '√' postfix | '(' expr ')'
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.variables = set()
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, text, position = self.advance()
+        if text != value:
+            found = 'end of expression' if kind == 'end' else repr(text)
+            raise ExpressionError(f"Expected {value!r} at position {position}, found {found}")
+
+    def parse(self):
+        node = self.expr(1)
+        kind, text, position = self.peek()
+        if kind != 'end':
+            raise ExpressionError(f"Unexpected {text!r} at position {position}")
+        return node
+
+    def expr(self, min_precedence):
+        left = self.unary()
+        while True:
+            kind, text, _ = self.peek()
+            if kind != 'op' or text not in BINARY_OPERATORS:
+                return left
+            precedence, name = BINARY_OPERATORS[text]
+            if precedence < min_precedence:
+                return left
+            self.advance()
+            right = self.expr(precedence + 1)
+            left = _call(name, (left, right))
+
+    def unary(self):
+        kind, text, _ = self.peek()
+        if kind == 'op' and text in '+-':
+            self.advance()
+            operand = self.unary()
+            return operand if text == '+' else _negate(operand)
+        return self.power()
+
+    def power(self):
+        base = self.postfix()
+        kind, text, _ = self.peek()
+        if kind == 'op' and text == '^':
+            self.advance()
+            return _call('power', (base, self.unary()))
+        return base
+
+    def postfix(self):
+        node = self.primary()
+        while self.peek()[:2] == ('op', '!'):
+            self.advance()
+            node = _call('factorial', (node,))
+        return node
+
+    def primary(self):
+        kind, text, position = self.advance()
+        if kind == 'number':
+            return _number(text)
+        if kind == 'name':
+            if self.peek()[:2] == ('op', '('):
+                return self.function(text, position)
+            self.variables.add(text)
+            return _variable(text)
+        if kind == 'op' and text == '√':
+            return _call('square_root', (self.postfix(),))
+        if kind == 'op' and text == '(':
+            node = self.expr(1)
+            self.expect(')')
+            return node
+        found = 'end of expression' if kind == 'end' else repr(text)
+        raise ExpressionError(f"Unexpected {found} at position {position}")
+
+    def function(self, name, position):
+        operation = ALIASES.get(name, name)
+        if operation not in registry:
+            raise ExpressionError(f"Unknown function: {name}")
+        arity = registry.get(operation).arity
+        self.expect('(')
+        args = [self.expr(1)]
+        while self.peek()[:2] == ('op', ','):
+            self.advance()
+            args.append(self.expr(1))
+        self.expect(')')
+        if len(args) != arity:
+            raise ExpressionError(f"{name}() takes {arity} argument(s), got {len(args)} "
+                                  f"at position {position}")
+        return _call(operation, args)
+
+
+class CompiledExpression:
+    """A parsed expression ready to evaluate against any Calculator."""
+
+    __slots__ = ('source', 'variables', '_root')
+
+    def __init__(self, source):
+        parser = Parser(source)
+        self._root = parser.parse()
+        self.source = source
+        self.variables = frozenset(parser.variables)
+
+    def evaluate(self, calc, variables=None):
+        return self._root(calc, variables or {})
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+class ExpressionCache:
+    """LRU cache of CompiledExpression objects keyed by source text."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.compile = lru_cache(maxsize=maxsize)(CompiledExpression)
+
+    def stats(self):
+        info = self.compile.cache_info()
+        return {'hits': info.hits, 'misses': info.misses,
+                'entries': info.currsize, 'max_entries': info.maxsize}
+
+    def clear(self):
+        self.compile.cache_clear()
+
+
+# Shared by every Calculator; compiled expressions don't depend on the instance
+default_cache = ExpressionCache()
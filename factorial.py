@@ -0,0 +1,115 @@
+"""
+Factorial Engine - big-integer factorials with limits
+
+Multiplying 1 * 2 * ... * n one step at a time keeps multiplying a huge
+number by a tiny one, which is slow for large n. The engine instead builds
+the product by binary splitting: it multiplies balanced halves, so most
+multiplications are between numbers of similar size and Python's fast
+big-int multiplication does most of the work.
+
+On top of that the engine can enforce:
+
+- max_n: reject inputs above a configured size before doing any work.
+- time_budget: stop with FactorialTimeoutError once the budget (seconds) is
+  spent. The product is built in chunks and the deadline is checked between
+  chunks, so a long computation stops early instead of finishing late.
+- workers: run large factorials in a process pool so the calling thread (for
+  example a Flask worker) is not held by the GIL while they compute.
+"""
+
+import math
+import time
+
+# Ranges at most this long are multiplied directly
+SPLIT_THRESHOLD = 32
+# Integers per chunk between deadline checks
+CHUNK_SIZE = 4096
+# Below this n a pool round-trip costs more than the computation itself
+POOL_MIN_N = 20000
+
+
+class FactorialTimeoutError(TimeoutError):
+    """Raised when a factorial does not finish within its time budget."""
+
+
+def range_product(lo, hi):
+    """Return the product of the integers in [lo, hi) by binary splitting."""
+    if hi - lo <= SPLIT_THRESHOLD:
+        return math.prod(range(lo, hi))
+    mid = (lo + hi) // 2
+    return range_product(lo, mid) * range_product(mid, hi)
+
+
+def _check(deadline, n):
+    if deadline is not None and time.monotonic() > deadline:
+        raise FactorialTimeoutError(f"Factorial of {n} exceeded its time budget")
+
+
+def product_until(lo, hi, deadline=None):
+    """range_product(lo, hi) that gives up once time.monotonic() passes deadline."""
+    parts = []
+    for start in range(lo, hi, CHUNK_SIZE):
+        _check(deadline, hi - 1)
+        parts.append(range_product(start, min(start + CHUNK_SIZE, hi)))
+    # Combine chunk products pairwise so the final multiplications stay balanced
+    while len(parts) > 1:
+        _check(deadline, hi - 1)
+        paired = [parts[i] * parts[i + 1] for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            paired.append(parts[-1])
+        parts = paired
+    return parts[0] if parts else 1
+
+
+def compute(n, k=0, prefix=1, time_budget=None):
+    """Return n! given prefix == k! (k <= n), within an optional time budget."""
+    if time_budget is None:
+        if k == 0:
+            # CPython's own factorial is a C binary-splitting implementation
+            return math.factorial(n)
+        return prefix * range_product(k + 1, n + 1)
+    deadline = time.monotonic() + time_budget
+    return prefix * product_until(k + 1, n + 1, deadline)
+
+
+class FactorialEngine:
+    """Computes factorials with an optional size limit, time budget and process pool."""
+
+    def __init__(self, max_n=None, time_budget=None, workers=0):
+        self.max_n = max_n
+        self.time_budget = time_budget
+        self.workers = workers
+        self._pool = None
+
+    def check(self, n):
+        """Raise ValueError if n is above the configured limit."""
+        if self.max_n is not None and n > self.max_n:
+            raise ValueError(f"Factorial input too large (limit is {self.max_n})")
+
+    def factorial(self, n, k=0, prefix=1):
+        """Return n!, optionally continuing from a known prefix == k!."""
+        self.check(n)
+        if self.workers and n - k >= POOL_MIN_N:
+            return self._offload(n, k, prefix)
+        return compute(n, k, prefix, self.time_budget)
+
+    def _offload(self, n, k, prefix):
+        # Imported here: multiprocessing is slow to import and most callers never offload
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        future = self._pool.submit(compute, n, k, prefix, self.time_budget)
+        try:
+            # The worker enforces the budget itself; the margin covers transfer time
+            timeout = None if self.time_budget is None else self.time_budget + 1
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise FactorialTimeoutError(f"Factorial of {n} exceeded its time budget")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,271 @@
+"""
+Fake Redis - an in-process stand-in server for tests and benchmarks
+
+Speaks the Redis protocol (RESP) over TCP and implements the commands
+redis_store.py uses, keeping everything in memory. It is not a Redis
+replacement: there is no persistence, expiry or eviction, and there is one
+global lock. It lets the Redis backend be tested and benchmarked without a
+Redis server:
+
+    with FakeRedisServer() as server:
+        pool = ConnectionPool.from_url(server.url)
+
+latency adds that many seconds to every round trip (each batch of commands
+read from a connection in one go), to show what pipelining saves on a real
+network. Run it on its own with `python fake_redis.py --port 6379`.
+"""
+
+import fnmatch
+import socketserver
+import threading
+import time
+
+from redis_client import DEFAULT_PORT
+
+
+class _Error(Exception):
+    pass
+
+
+def _parse(buffer, start):
+    """Parse one command (a RESP array) at buffer[start:].
+
+    Returns (args, next start), or None if the command isn't complete yet.
+    """
+    end = buffer.find(b'\r\n', start)
+    if end < 0:
+        return None
+    if buffer[start:start + 1] != b'*':
+        # Inline command, e.g. "PING" typed into telnet
+        return bytes(buffer[start:end]).split(), end + 2
+    count, position, args = int(buffer[start + 1:end]), end + 2, []
+    for _ in range(count):
+        end = buffer.find(b'\r\n', position)
+        if end < 0:
+            return None
+        length = int(buffer[position + 1:end])
+        position = end + 2
+        if len(buffer) < position + length + 2:
+            return None
+        args.append(bytes(buffer[position:position + length]))
+        position += length + 2
+    return args, position
+
+
+def _reply(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, _Error):
+        return b'-ERR %s\r\n' % str(value).encode()
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(_reply(item) for item in value)
+
+
+def _score(text):
+    text = text.decode().lstrip('(')
+    return {'-inf': float('-inf'), '+inf': float('inf'), 'inf': float('inf')}.get(text) or float(text)
+
+
+class FakeRedis:
+    """The data and the commands, independent of the network."""
+
+    def __init__(self):
+        self.strings = {}
+        self.lists = {}
+        self.sorted_sets = {}
+        self.commands = 0
+        self.lock = threading.Lock()
+
+    def _keyspaces(self):
+        return (self.strings, self.lists, self.sorted_sets)
+
+    def execute(self, args):
+        name = args[0].decode().upper() if args else ''
+        handler = getattr(self, 'cmd_' + name.lower(), None)
+        if handler is None:
+            return _Error(f"unknown command '{name}'")
+        with self.lock:
+            self.commands += 1
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError, IndexError):
+                return _Error(f"wrong arguments for '{name}'")
+
+    def cmd_ping(self, message=None):
+        return 'PONG' if message is None else message
+
+    def cmd_auth(self, *credentials):
+        return 'OK'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self.strings.get(key)
+
+    def cmd_set(self, key, value):
+        self.cmd_del(key)
+        self.strings[key] = value
+        return 'OK'
+
+    def cmd_incr(self, key):
+        value = int(self.strings.get(key, b'0')) + 1
+        self.strings[key] = b'%d' % value
+        return value
+
+    def cmd_del(self, *keys):
+        return sum(space.pop(key, None) is not None for key in keys for space in self._keyspaces())
+
+    def cmd_exists(self, *keys):
+        return sum(any(key in space for space in self._keyspaces()) for key in keys)
+
+    def cmd_rpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items.extend(values)
+        return len(items)
+
+    def cmd_llen(self, key):
+        return len(self.lists.get(key, ()))
+
+    def cmd_lrange(self, key, start, stop):
+        items = self.lists.get(key, [])
+        start, stop = int(start), int(stop)
+        if start < 0:
+            start = max(0, len(items) + start)
+        stop = len(items) + stop if stop < 0 else stop
+        return items[start:stop + 1]
+
+    def cmd_zadd(self, key, *pairs):
+        members = self.sorted_sets.setdefault(key, {})
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in members
+            members[member] = float(score)
+        return added
+
+    def cmd_zrem(self, key, *members):
+        scores = self.sorted_sets.get(key, {})
+        return sum(scores.pop(member, None) is not None for member in members)
+
+    def cmd_zcard(self, key):
+        return len(self.sorted_sets.get(key, ()))
+
+    def cmd_zrevrangebyscore(self, key, high, low, *options):
+        high, low = _score(high), _score(low)
+        members = sorted(((score, member) for member, score in self.sorted_sets.get(key, {}).items()
+                          if low <= score <= high), reverse=True)
+        result = [member for _, member in members]
+        if options and options[0].upper() == b'LIMIT':
+            offset, count = int(options[1]), int(options[2])
+            result = result[offset:offset + count if count >= 0 else None]
+        return result
+
+    def cmd_scan(self, cursor, *options):
+        pattern = '*'
+        for option, value in zip(options[::2], options[1::2]):
+            if option.upper() == b'MATCH':
+                pattern = value.decode()
+        keys = sorted({key for space in self._keyspaces() for key in space})
+        return [b'0', [key for key in keys if fnmatch.fnmatchcase(key.decode(), pattern)]]
+
+    def cmd_dbsize(self):
+        return len({key for space in self._keyspaces() for key in space})
+
+    def cmd_flushdb(self, *options):
+        for space in self._keyspaces():
+            space.clear()
+        return 'OK'
+
+    def cmd_info(self, *sections):
+        used = (sum(len(key) + len(value) for key, value in self.strings.items())
+                + sum(len(key) + sum(map(len, items)) for key, items in self.lists.items()))
+        return b'# Memory\r\nused_memory:%d\r\n' % used
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        buffer = bytearray()
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            buffer += data
+            replies, position = [], 0
+            while True:
+                parsed = _parse(buffer, position)
+                if parsed is None:
+                    break
+                args, position = parsed
+                replies.append(_reply(server.redis.execute(args)))
+            del buffer[:position]
+            if replies:
+                server.round_trips += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                self.request.sendall(b''.join(replies))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """FakeRedis on a TCP port (port 0 picks a free one), served from a background thread."""
+
+    daemon_threads = True
+    # Don't wait for clients (e.g. pooled connections) to hang up on stop()
+    block_on_close = False
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        super().__init__((host, port), _Handler)
+        self.redis = FakeRedis()
+        self.latency = latency
+        self.round_trips = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        # A short poll interval keeps stop() quick
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), name='fake-redis',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='In-memory stand-in for a Redis server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added per round trip')
+    args = parser.parse_args(argv)
+    server = FakeRedisServer(args.host, args.port, args.latency)
+    print(f"Fake Redis listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Gunicorn settings for running the calculator web app in production
+
+Start with: gunicorn --config gunicorn.conf.py wsgi:app
+
+Environment variables:
+- PORT               port to bind (Render.com sets this), default 5001
+- WEB_CONCURRENCY    worker processes, default 1
+- GUNICORN_THREADS   threads per worker, default 8
+- GUNICORN_TIMEOUT   seconds before a stuck worker is restarted, default 30
+- CALC_PREWARM       0 to skip warming each worker up before it serves, default 1
+
+Unlike the development server, production turns admission control on (see
+ratelimit.py): CALC_RATE_LIMIT defaults to 50 tokens per second per client
+with bursts of CALC_RATE_BURST=100, and CALC_MAX_CONCURRENT to all but two of
+the worker's threads, leaving those to answer health checks and turn excess
+requests away with 429 instead of queueing them.
+
+Each worker process has its own session store. With the default memory
+state backend and more than one worker, the history shown to a user depends
+on which worker served the request, and the result cache is shared between
+workers through an SQLite file (see CALC_CACHE_PATH below). Set
+CALC_STATE_BACKEND to sqlite:///file (one host) or redis://host:port/db
+(several hosts) to share both; see backends.py. Lookup tables (POST /tables)
+are never shared, so they are refused when there is more than one worker.
+"""
+
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+accesslog = '-'
+errorlog = '-'
+
+# Admission control (see above)
+os.environ.setdefault('CALC_RATE_LIMIT', '50')
+os.environ.setdefault('CALC_RATE_BURST', '100')
+os.environ.setdefault('CALC_MAX_CONCURRENT', str(max(1, threads - 2)))
+
+# Share cached factorial/power/square_root results between worker processes.
+# The file goes in a new directory only this user can open (mkdtemp uses mode
+# 0700): a fixed name in the shared temp dir could be planted by anyone.
+CACHE_DIR_PREFIX = 'calculator-cache-'
+if (workers > 1 and not os.environ.get('CALC_STATE_BACKEND')
+        and not os.environ.get('CALC_CACHE_PATH')):
+    os.environ['CALC_CACHE_PATH'] = os.path.join(
+        tempfile.mkdtemp(prefix=CACHE_DIR_PREFIX), 'cache.sqlite3')
+
+
+def post_worker_init(worker):
+    """Run app.warm_up() so the first real request a new worker gets (e.g. the
+    first /calculate after a deploy) isn't slowed by lazy initialisation.
+
+    Lookup tables are kept in each worker's memory, so with more than one
+    worker POST /tables is refused: a table would only exist in the worker
+    that happened to register it.
+    """
+    if worker.cfg.workers > 1:
+        from app import table_store
+        table_store.disabled = (f'Lookup tables need a single worker process; this server '
+                                f'runs {worker.cfg.workers} (set WEB_CONCURRENCY=1)')
+    if os.environ.get('CALC_PREWARM', '1').lower() in ('0', 'false', 'no'):
+        return
+    from app import warm_up
+    worker.log.info("Worker warmed up in %.1f ms", warm_up() * 1000)
+
+
+def on_exit(server):
+    """Remove the cache directory created above, if it was."""
+    cache_dir = os.path.dirname(os.environ.get('CALC_CACHE_PATH', ''))
+    if (os.path.dirname(cache_dir) == tempfile.gettempdir()
+            and os.path.basename(cache_dir).startswith(CACHE_DIR_PREFIX)):
+        shutil.rmtree(cache_dir, ignore_errors=True)
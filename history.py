@@ -0,0 +1,196 @@
+"""
+Calculation History - bounded ring buffer of compact records
+
+Each calculation is stored as a small HistoryEntry (operation code, operands,
+result, timestamp) rather than a pre-formatted string. Entries are only turned
+into text when someone reads them, and once the buffer is full the oldest entry
+is overwritten, so memory stays fixed no matter how long the app runs.
+
+Every recorded entry gets the next sequence number (History.seq), which lets
+a client that has seen everything up to seq N ask for just the entries after
+it (History.changes).
+"""
+
+import itertools
+import math
+import threading
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+DEFAULT_CAPACITY = 1000
+
+# Distinguishes History objects, so a client's seq isn't applied to another one
+_epochs = itertools.count(1)
+
+# Operation codes stored in each entry, indexed by HistoryEntry.op
+OPERATIONS = []
+OPERATION_CODES = {}
+# Operation name -> str.format template with {a}, {b} and {result}
+FORMATS = {}
+DEFAULT_FORMAT = "{name}({a}, {b}) = {result}"
+
+# Integers longer than this many bits are summarised instead of printed in full
+MAX_PRINTED_BITS = 3000
+MAX_PRINTED_DIGITS = int(MAX_PRINTED_BITS * math.log10(2)) + 1
+
+
+def register_format(name, template=DEFAULT_FORMAT):
+    """Give an operation a history code and the template used to display it."""
+    if name not in OPERATION_CODES:
+        OPERATION_CODES[name] = len(OPERATIONS)
+        OPERATIONS.append(name)
+    FORMATS[name] = template
+
+
+def _short(value):
+    """Render value, summarising huge integers, Fractions and Decimals (e.g. big factorials)."""
+    if isinstance(value, int) and value.bit_length() > MAX_PRINTED_BITS:
+        digits = int(value.bit_length() * math.log10(2)) + 1
+        return f"<{digits}-digit integer>"
+    if isinstance(value, Fraction):
+        # str() of a Fraction fails past the int-to-str digit limit
+        if value.denominator == 1:
+            return _short(value.numerator)
+        return f"{_short(value.numerator)}/{_short(value.denominator)}"
+    if isinstance(value, Decimal) and value.is_finite():
+        digits = len(value.as_tuple().digits)
+        if digits > MAX_PRINTED_DIGITS:
+            return f"<{digits}-digit decimal>"
+    return value
+
+
+def _format(name, a, b, result):
+    template = FORMATS.get(name, DEFAULT_FORMAT)
+    return template.format(name=name, a=_short(a), b=_short(b), result=_short(result))
+
+
+register_format('add', "{a} + {b} = {result}")
+register_format('subtract', "{a} - {b} = {result}")
+register_format('multiply', "{a} × {b} = {result}")
+register_format('divide', "{a} ÷ {b} = {result}")
+register_format('power', "{a} ^ {b} = {result}")
+register_format('square_root', "√{a} = {result}")
+register_format('factorial', "{a}! = {result}")
+register_format('percentage', "{b}% of {a} = {result}")
+
+
+class HistoryEntry:
+    """One recorded calculation."""
+
+    __slots__ = ('op', 'a', 'b', 'result', 'timestamp')
+
+    def __init__(self, op, a, b, result, timestamp):
+        self.op = op
+        self.a = a
+        self.b = b
+        self.result = result
+        self.timestamp = timestamp
+
+    @property
+    def operation(self):
+        return OPERATIONS[self.op]
+
+    def __str__(self):
+        return _format(self.operation, self.a, self.b, self.result)
+
+    def __repr__(self):
+        return f"HistoryEntry({str(self)!r})"
+
+
+class History:
+    """Fixed-capacity ring buffer of HistoryEntry objects, oldest first."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._start = 0
+        self._size = 0
+        # Sequence number of the newest entry; clear() also advances it
+        self.seq = 0
+        self.epoch = next(_epochs)
+        # The web app serves requests from several threads at once
+        self._lock = threading.Lock()
+        # (seq, entry) of each thread's latest record(), see recorded()
+        self._recorded = threading.local()
+
+    def record(self, operation, a, b, result):
+        """Append a calculation, overwriting the oldest one when full."""
+        entry = HistoryEntry(OPERATION_CODES[operation], a, b, result, time.time())
+        with self._lock:
+            self._push(entry)
+            self._recorded.value = self.seq, entry
+        return entry
+
+    def _push(self, entry):
+        # Caller holds self._lock
+        self.seq += 1
+        if self._size < self.capacity:
+            self._slots[(self._start + self._size) % self.capacity] = entry
+            self._size += 1
+        else:
+            self._slots[self._start] = entry
+            self._start = (self._start + 1) % self.capacity
+
+    def entries(self, offset=0, limit=None):
+        """Return up to `limit` entries starting `offset` entries after the oldest."""
+        offset = max(0, offset)
+        with self._lock:
+            stop = self._size if limit is None else min(self._size, offset + max(0, limit))
+            slots, start, capacity = self._slots, self._start, self.capacity
+            return [slots[(start + i) % capacity] for i in range(offset, stop)]
+
+    def last(self):
+        """Return (seq, newest entry), or (seq, None) when empty."""
+        with self._lock:
+            if self._size == 0:
+                return self.seq, None
+            return self.seq, self._slots[(self._start + self._size - 1) % self.capacity]
+
+    def recorded(self):
+        """Return (seq, entry) of the calling thread's latest record() and forget it.
+
+        Unlike last(), this can't pick up an entry another request in the same
+        session recorded in the meantime. (seq, None) if nothing was recorded.
+        """
+        value = getattr(self._recorded, 'value', None)
+        self._recorded.value = None
+        return value or (self.seq, None)
+
+    def changes(self, since, limit):
+        """Return (seq, entries recorded after sequence number `since`), oldest first.
+
+        The entries are None when no delta can be given: `since` predates a
+        clear() or some of the entries were overwritten (the caller should
+        reload a page), or more than `limit` entries are new.
+        """
+        with self._lock:
+            missed = self.seq - since
+            if not 0 <= missed <= min(self._size, limit):
+                return self.seq, None
+            slots, start, capacity = self._slots, self._start, self.capacity
+            first = self._size - missed
+            return self.seq, [slots[(start + i) % capacity] for i in range(first, self._size)]
+
+    def refresh(self):
+        """Catch up with changes made elsewhere; nothing to do for an in-memory history."""
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        # Caller holds self._lock; a clear uses up a sequence number so
+        # clients holding the old seq know their copy is stale
+        self.seq += 1
+        self._slots = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self.entries())
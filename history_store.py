@@ -0,0 +1,337 @@
+"""
+Persistent History - durable calculation history in SQLite
+
+HistoryLog is an append-only table of calculations keyed by session, written
+by a single background thread. Requests only put records on a queue; the
+writer commits everything that arrived within flush_interval seconds (or up
+to batch_size records) in one transaction, so many calculations share each
+disk sync ("group commit") and /calculate never waits for the disk.
+
+PersistentHistory is a History whose ring buffer is loaded from the log and
+which writes every new entry through to it. On startup nothing is replayed
+up front: when a session is first used only its newest `capacity` entries
+are read (via the (session, id) index). Older pages are read from SQLite on
+demand.
+
+The in-memory window belongs to one process, but other processes (several
+gunicorn workers on one SQLite file, or every host on one Redis server, see
+redis_store.py) may write to the same session. Both logs are `shared`: they
+keep a sequence number per session that moves on with every append and
+clear, and refresh() reloads the window when another process has moved it on.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+from history import OPERATION_CODES, History, HistoryEntry, register_format
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+logger = logging.getLogger(__name__)
+
+
+def encode_value(value):
+    """Store big integers, Decimals and Fractions as tagged text."""
+    if isinstance(value, int) and not INT64_MIN <= value <= INT64_MAX:
+        # Hex has no int-to-str digit limit and is cheaper than decimal
+        return 'x' + format(value, 'x')
+    if isinstance(value, Decimal):
+        return 'd' + str(value)
+    if isinstance(value, Fraction):
+        # Hex terms, like big integers: str() fails past 4300 digits
+        return f'q{value.numerator:x}/{value.denominator:x}'
+    return value
+
+
+def decode_value(value):
+    """The number encode_value() stored; other values are returned unchanged."""
+    if isinstance(value, str):
+        tag, text = value[:1], value[1:]
+        if tag == 'x':
+            return int(text, 16)
+        if tag == 'd':
+            return Decimal(text)
+        if tag == 'q':
+            numerator, denominator = text.split('/')
+            return Fraction(int(numerator, 16), int(denominator, 16))
+        if tag == 'f':
+            # Written before fractions were stored in hex
+            return Fraction(text)
+    return value
+
+
+def encode_entry(entry):
+    """The (operation, a, b, result, timestamp) row stored for an entry."""
+    return (entry.operation, encode_value(entry.a), encode_value(entry.b),
+            encode_value(entry.result), entry.timestamp)
+
+
+def decode_entry(row):
+    operation, a, b, result, timestamp = row
+    if operation not in OPERATION_CODES:
+        register_format(operation)
+    return HistoryEntry(OPERATION_CODES[operation], decode_value(a), decode_value(b),
+                        decode_value(result), timestamp)
+
+
+class QueuedLog:
+    """Base for history logs that are written by one background thread in batches.
+
+    append() and clear() only queue a record. The writer collects everything
+    that arrives within flush_interval seconds (or up to batch_size records)
+    and passes it to _write() in one go. Subclasses provide _open_writer(),
+    _write(connection, records) and the read methods (count, tail, page).
+    `shared` is True for logs that other processes or hosts write to as well,
+    whose sessions must be re-read (see PersistentHistory.refresh()); such logs
+    also provide state(session_id).
+    """
+
+    shared = False
+    # Errors that fail one batch but leave the writer running
+    errors = ()
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def append(self, session_id, entry):
+        """Queue an entry for the writer thread; returns without waiting for the store."""
+        self._queue.put(('append', session_id, entry))
+
+    def clear(self, session_id):
+        self._queue.put(('clear', session_id, None))
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written."""
+        done = threading.Event()
+        self._queue.put(('flush', None, done))
+        return done.wait(timeout)
+
+    def close(self):
+        done = threading.Event()
+        self._queue.put(('close', None, done))
+        done.wait()
+
+    def _open_writer(self):
+        return None
+
+    def _close_writer(self, connection):
+        pass
+
+    def _write(self, connection, records):
+        raise NotImplementedError
+
+    def _write_loop(self):
+        connection = self._open_writer()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] == 'append':
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(connection, batch)
+            if batch[-1][0] == 'close':
+                self._close_writer(connection)
+                return
+
+    def _commit(self, connection, batch):
+        records = [record for record in batch if record[0] in ('append', 'clear')]
+        try:
+            if records:
+                self._write(connection, records)
+        except self.errors:
+            # Keep the writer alive; the in-memory history is unaffected
+            logger.exception("Failed to write %d history records", len(records))
+        finally:
+            for kind, _, done in batch:
+                if kind in ('flush', 'close'):
+                    done.set()
+
+
+class HistoryLog(QueuedLog):
+    """Append-only SQLite history for all sessions with a group-commit writer."""
+
+    # Every worker process on the host may write to the same file
+    shared = True
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self._local = threading.local()
+        db = self._reader()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " id INTEGER PRIMARY KEY, session TEXT NOT NULL, operation TEXT NOT NULL,"
+            " a, b, result, timestamp REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS history_session ON history (session, id)")
+        numbered = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_seq'"
+        ).fetchone()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS history_seq ("
+            " session TEXT PRIMARY KEY, seq INTEGER NOT NULL)"
+        )
+        if not numbered:
+            # Logs written before sequence numbers were kept start at their entry counts
+            db.execute("INSERT OR IGNORE INTO history_seq"
+                       " SELECT session, COUNT(*) FROM history GROUP BY session")
+        super().__init__(batch_size, flush_interval)
+
+    def _reader(self):
+        # sqlite3 connections must not be shared across threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def _open_writer(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        # WAL + NORMAL syncs at checkpoints, not on every commit
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _close_writer(self, db):
+        db.close()
+
+    def _write(self, db, records):
+        db.execute("BEGIN")
+        try:
+            for kind, session_id, entry in records:
+                if kind == 'append':
+                    db.execute(
+                        "INSERT INTO history (session, operation, a, b, result, timestamp)"
+                        " VALUES (?, ?, ?, ?, ?, ?)", (session_id,) + encode_entry(entry),
+                    )
+                else:
+                    db.execute("DELETE FROM history WHERE session = ?", (session_id,))
+                db.execute(
+                    "INSERT INTO history_seq (session, seq) VALUES (?, 1)"
+                    " ON CONFLICT (session) DO UPDATE SET seq = seq + 1", (session_id,),
+                )
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+
+    def state(self, session_id):
+        """(sequence number, number of entries) of a session, read together."""
+        seq, count = self._reader().execute(
+            "SELECT (SELECT seq FROM history_seq WHERE session = ?),"
+            " (SELECT COUNT(*) FROM history WHERE session = ?)", (session_id, session_id)
+        ).fetchone()
+        return seq or 0, count
+
+    def count(self, session_id):
+        return self._reader().execute(
+            "SELECT COUNT(*) FROM history WHERE session = ?", (session_id,)
+        ).fetchone()[0]
+
+    def tail(self, session_id, limit):
+        """Return the newest `limit` entries of a session, oldest first."""
+        rows = self._reader().execute(
+            "SELECT operation, a, b, result, timestamp FROM history"
+            " WHERE session = ? ORDER BY id DESC LIMIT ?", (session_id, limit)
+        ).fetchall()
+        return [decode_entry(row) for row in reversed(rows)]
+
+    def page(self, session_id, offset, limit):
+        rows = self._reader().execute(
+            "SELECT operation, a, b, result, timestamp FROM history"
+            " WHERE session = ? ORDER BY id LIMIT ? OFFSET ?", (session_id, limit, offset)
+        ).fetchall()
+        return [decode_entry(row) for row in rows]
+
+
+class PersistentHistory(History):
+    """History that keeps its newest `capacity` entries in memory and all of them in a HistoryLog."""
+
+    def __init__(self, log, session_id, capacity):
+        super().__init__(capacity)
+        self.log = log
+        self.session_id = session_id
+        # Entries of this session may still be queued (e.g. it was just evicted)
+        log.flush()
+        self._load()
+
+    def _load(self):
+        entries = self.log.tail(self.session_id, self.capacity)
+        seq, total = self.log.state(self.session_id) if self.log.shared else (None, None)
+        with self._lock:
+            self._slots = [None] * self.capacity
+            self._start = self._size = 0
+            for entry in entries:
+                self._push(entry)
+            self._total = total if total is not None else self.log.count(self.session_id)
+            self.seq = seq if seq is not None else self._total
+
+    def refresh(self):
+        """Pick up entries that other processes or hosts added to a shared log."""
+        if not self.log.shared:
+            return
+        self.log.flush()
+        seq, total = self.log.state(self.session_id)
+        with self._lock:
+            current = seq == self.seq and total == self._total
+        if not current:
+            self._load()
+
+    def record(self, operation, a, b, result):
+        entry = HistoryEntry(OPERATION_CODES[operation], a, b, result, time.time())
+        with self._lock:
+            self._push(entry)
+            self._total += 1
+            self._recorded.value = self.seq, entry
+            # Queued under the lock so the log keeps this session's order
+            self.log.append(self.session_id, entry)
+        return entry
+
+    def entries(self, offset=0, limit=None):
+        offset = max(0, offset)
+        with self._lock:
+            total, cached = self._total, self._size
+        stop = total if limit is None else min(total, offset + max(0, limit))
+        if offset >= stop:
+            return []
+        first_cached = total - cached
+        if offset >= first_cached:
+            return super().entries(offset - first_cached, stop - offset)
+        # Older than the in-memory window: read it back from the log
+        self.log.flush()
+        return self.log.page(self.session_id, offset, stop - offset)
+
+    def changes(self, since, limit):
+        with self._lock:
+            seq, total = self.seq, self._total
+        missed = seq - since
+        if not 0 <= missed <= min(total, limit):
+            return seq, None
+        return seq, self.entries(total - missed, missed)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._total = 0
+            self.log.clear(self.session_id)
+
+    def __len__(self):
+        return self._total
@@ -0,0 +1,136 @@
+"""
+Background Jobs - submit now, stream results as they finish
+
+Long calculations (big factorials, large batches) are queued as jobs instead
+of holding a web request open. A job runs its operations one after another
+on a bounded thread pool and publishes each result as soon as it is ready;
+clients read them back incrementally (see /jobs/<id>/stream in app.py).
+
+Backpressure:
+- at most max_pending jobs may be queued or running in total, and
+- at most max_per_client of them may belong to one client (the app keys
+  this by request address: session ids cost nothing to mint),
+so a single heavy user can occupy only part of the pool and new work is
+refused with JobRejected instead of piling up in an unbounded queue.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 100
+DEFAULT_MAX_PER_CLIENT = 2
+# Finished jobs stay readable for this many seconds
+DEFAULT_RETENTION = 300
+
+
+class JobRejected(Exception):
+    """Raised when a job cannot be queued because of the backpressure limits."""
+
+
+class Job:
+    """One submitted list of operations and the results produced so far."""
+
+    def __init__(self, client, operations):
+        self.id = uuid.uuid4().hex
+        self.client = client
+        self.operations = operations
+        self.total = len(operations)
+        self.results = []
+        self.status = 'queued'
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    def publish(self, result):
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def set_status(self, status):
+        with self._changed:
+            self.status = status
+            if status in ('done', 'failed'):
+                self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def wait(self, seen, timeout=None):
+        """Block until there are more than `seen` results or the job finishes.
+
+        Returns (new_results, finished).
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.results) > seen or self.finished, timeout)
+            return self.results[seen:], self.finished
+
+    def describe(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'completed': len(self.results),
+            'total': self.total,
+        }
+
+
+class JobManager:
+    """Queues jobs on a bounded thread pool with global and per-client limits."""
+
+    def __init__(self, run_operation, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 max_per_client=DEFAULT_MAX_PER_CLIENT, retention=DEFAULT_RETENTION):
+        # run_operation(calc, item) -> JSON-friendly result dict for one operation
+        self.run_operation = run_operation
+        self.max_pending = max_pending
+        self.max_per_client = max_per_client
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calc-job')
+        self._jobs = {}
+        self._active = {}  # client -> number of queued/running jobs
+        self._lock = threading.Lock()
+
+    def submit(self, client, calc, operations):
+        """Queue operations to run on calc; client is who the per-client limit counts."""
+        job = Job(client, operations)
+        with self._lock:
+            self._purge()
+            active_total = sum(self._active.values())
+            if active_total >= self.max_pending:
+                raise JobRejected('Too many jobs in progress, try again later')
+            if self._active.get(client, 0) >= self.max_per_client:
+                raise JobRejected(f'At most {self.max_per_client} jobs per client may run at once')
+            self._active[client] = self._active.get(client, 0) + 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, calc)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _run(self, job, calc):
+        job.set_status('running')
+        status = 'failed'
+        try:
+            for item in job.operations:
+                job.publish(self.run_operation(calc, item))
+            status = 'done'
+        finally:
+            # Free the client's slot before waking readers so they can resubmit at once
+            with self._lock:
+                self._active[job.client] -= 1
+                if not self._active[job.client]:
+                    del self._active[job.client]
+            job.set_status(status)
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -6,9 +6,15 @@ This script demonstrates how to use the Calculator class.
 Students can run this script to test their implementations interactively.
 
 Usage: python main.py
+       python main.py run --input ops.ndjson --output results.ndjson
+       python main.py stats --input values.txt [--column price]
 """
 
+import os
+import sys
+
 from calculator import Calculator
+from cache import ResultCache
 
 
 def demo_calculator():
@@ -56,65 +62,24 @@ def interactive_calculator():
     print("\n🎮 Interactive Calculator Mode")
     print("=" * 30)
     print("Available operations:")
-    print("1. Addition (a + b)")
-    print("2. Subtraction (a - b)")
-    print("3. Multiplication (a * b)")
-    print("4. Division (a / b)")
-    print("5. Power (a ^ b)")
-    print("6. Square root (√a)")
-    print("7. Factorial (a!)")
-    print("8. Percentage (b% of a)")
-    print("9. Show history")
-    print("0. Exit")
     
-    calc = Calculator()
+    # Cache results so repeated factorial/power/square root inputs are instant
+    calc = Calculator(cache=ResultCache())
+    # Menu choices come straight from the operation registry
+    operations = list(calc.registry)
+    for number, operation in enumerate(operations, 1):
+        print(f"{number}. {operation.label}")
+    print("h. Show history")
+    print("0. Exit")
     
     while True:
         try:
-            choice = input("\nEnter your choice (0-9): ").strip()
+            choice = input(f"\nEnter your choice (0-{len(operations)}, h): ").strip().lower()
             
             if choice == "0":
                 print("👋 Goodbye!")
                 break
-            elif choice == "1":
-                a = float(input("Enter first number: "))
-                b = float(input("Enter second number: "))
-                result = calc.add(a, b)
-                print(f"Result: {a} + {b} = {result}")
-            elif choice == "2":
-                a = float(input("Enter first number: "))
-                b = float(input("Enter second number: "))
-                result = calc.subtract(a, b)
-                print(f"Result: {a} - {b} = {result}")
-            elif choice == "3":
-                a = float(input("Enter first number: "))
-                b = float(input("Enter second number: "))
-                result = calc.multiply(a, b)
-                print(f"Result: {a} * {b} = {result}")
-            elif choice == "4":
-                a = float(input("Enter dividend: "))
-                b = float(input("Enter divisor: "))
-                result = calc.divide(a, b)
-                print(f"Result: {a} / {b} = {result}")
-            elif choice == "5":
-                a = float(input("Enter base: "))
-                b = float(input("Enter exponent: "))
-                result = calc.power(a, b)
-                print(f"Result: {a} ^ {b} = {result}")
-            elif choice == "6":
-                a = float(input("Enter number: "))
-                result = calc.square_root(a)
-                print(f"Result: √{a} = {result}")
-            elif choice == "7":
-                a = int(input("Enter non-negative integer: "))
-                result = calc.factorial(a)
-                print(f"Result: {a}! = {result}")
-            elif choice == "8":
-                a = float(input("Enter total value: "))
-                b = float(input("Enter percentage: "))
-                result = calc.percentage(a, b)
-                print(f"Result: {b}% of {a} = {result}")
-            elif choice == "9":
+            elif choice == "h":
                 history = calc.get_history()
                 if history:
                     print("\n📋 Calculation History:")
@@ -122,8 +87,13 @@ def interactive_calculator():
                         print(f"{i}. {calculation}")
                 else:
                     print("No calculations in history yet.")
+            elif choice.isdigit() and 1 <= int(choice) <= len(operations):
+                operation = operations[int(choice) - 1]
+                operands = [input(f"Enter {label.lower()}: ") for label, _ in operation.inputs]
+                calc.calculate(operation.name, *operands)
+                print(f"Result: {calc.get_history(len(calc.history) - 1)[0]}")
             else:
-                print("❌ Invalid choice. Please enter a number from 0-9.")
+                print(f"❌ Invalid choice. Please enter a number from 0-{len(operations)} or h.")
                 
         except ValueError as e:
             print(f"❌ Error: {e}")
@@ -132,8 +102,108 @@ def interactive_calculator():
             print("💡 This might mean the method is not implemented yet!")
 
 
-def main():
+def run_command(argv):
+    """Calculate a whole file (or stdin) of operations: `python main.py run ...`."""
+    import argparse
+
+    import streaming
+    from numeric import MODES
+
+    parser = argparse.ArgumentParser(
+        prog='main.py run',
+        description='Stream operations from NDJSON/CSV and write one result per line.')
+    parser.add_argument('--input', '-i', default='-', help='input file (default: stdin)')
+    parser.add_argument('--output', '-o', default='-', help='output file (default: stdout)')
+    parser.add_argument('--input-format', choices=streaming.FORMATS,
+                        help='default: from the file extension, else ndjson')
+    parser.add_argument('--output-format', choices=streaming.FORMATS,
+                        help='default: from the file extension, else ndjson')
+    parser.add_argument('--mode', choices=MODES, default='float')
+    parser.add_argument('--precision', type=int, help='significant digits for --mode decimal')
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                        help=f'processes to calculate with (0 = one per core: {os.cpu_count()})')
+    args = parser.parse_args(argv)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    source = streaming.open_input(args.input)
+    sink = streaming.open_output(args.output)
+    try:
+        stats = streaming.run(
+            source, sink,
+            input_format=args.input_format or streaming.guess_format(args.input),
+            output_format=args.output_format or streaming.guess_format(args.output),
+            mode=args.mode, precision=args.precision,
+            chunk_size=max(1, args.chunk_size), workers=workers)
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+def _float_list(text):
+    return [float(value) for value in text.split(',') if value.strip()]
+
+
+def stats_command(argv):
+    """Summarise a file (or stdin) of numbers: `python main.py stats ...`."""
+    import argparse
+    import time
+
+    import streaming
+    from aggregates import DEFAULT_BINS, DEFAULT_PERCENTILES
+    from serialization import dumps
+
+    parser = argparse.ArgumentParser(
+        prog='main.py stats',
+        description='Count, sum, mean, variance, min/max, percentiles and a histogram '
+                    'of a stream of numbers, in one pass and constant memory.')
+    parser.add_argument('--input', '-i', default='-', help='input file (default: stdin)')
+    parser.add_argument('--column', help='read this column of a CSV file with a header row '
+                                         '(default: one number per line)')
+    parser.add_argument('--percentiles', type=_float_list, default=list(DEFAULT_PERCENTILES),
+                        help='comma-separated, e.g. 50,90,99')
+    parser.add_argument('--bins', type=int, default=DEFAULT_BINS, help='histogram bins')
+    parser.add_argument('--ddof', type=int, choices=(0, 1), default=0,
+                        help='1 for the sample variance instead of the population variance')
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                        help=f'processes to summarise with (0 = one per core: {os.cpu_count()})')
+    args = parser.parse_args(argv)
+
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+    source = streaming.open_input(args.input)
+    start = time.perf_counter()
+    try:
+        total = streaming.aggregate(source, column=args.column,
+                                    chunk_size=max(1, args.chunk_size), workers=workers)
+        summary = total.to_dict(args.percentiles, args.bins, args.ddof)
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(dumps(summary).decode())
+    print(f"Summarised {total.count:,} values in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
     """Main function to run the calculator demo."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'run':
+        return run_command(argv[1:])
+    if argv and argv[0] == 'stats':
+        return stats_command(argv[1:])
+
     print("🐍 Python Calculator Practice Project")
     print("=" * 50)
     print("This project helps students practice Python programming")
@@ -158,4 +228,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
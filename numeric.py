@@ -0,0 +1,188 @@
+"""
+Numeric Modes - choose how operands are represented for a calculation
+
+- float:    ints stay ints, anything with a decimal point becomes a float.
+            Fastest; the default and the only mode before this module existed.
+- decimal:  operands become decimal.Decimal and every operation runs under a
+            context with the requested precision (significant digits), so
+            0.1 + 0.2 == 0.3 and big values don't collapse into floats.
+- fraction: operands become fractions.Fraction; + - * / and percentages are
+            exact (1 / 3 stays 1/3). Square roots are exact when both parts
+            are perfect squares, otherwise they fall back to float.
+
+Calculator.calculate(..., mode=...) applies a mode; the Calculator methods
+themselves just work with whatever number types they are given.
+"""
+
+import contextlib
+import decimal
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+from operations import InputError, parse_number
+
+DEFAULT_PRECISION = 28
+MAX_PRECISION = 10000
+# Longest operand, and largest exponent, that decimal and fraction modes accept:
+# Fraction('1e1000000') would build a million-digit integer
+MAX_OPERAND_DIGITS = 10000
+
+# Larger integers lose digits as JavaScript numbers, so they are sent as strings
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+
+class NumericMode:
+    """How raw inputs are parsed and which decimal context calculations use."""
+
+    name = 'float'
+
+    def parse(self, value, label):
+        return parse_number(value, label)
+
+    def context(self):
+        return contextlib.nullcontext()
+
+
+class DecimalMode(NumericMode):
+    name = 'decimal'
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+
+    def parse(self, value, label):
+        if value is None:
+            return None
+        text = _operand_text(value, label)
+        try:
+            number = Decimal(text)
+        except decimal.InvalidOperation:
+            raise InputError(f'Invalid {label} number: {value}')
+        if not number.is_finite():
+            raise InputError(f'Invalid {label} number: {value}')
+        return number
+
+    def context(self):
+        return decimal.localcontext(prec=self.precision)
+
+
+class FractionMode(NumericMode):
+    name = 'fraction'
+
+    def parse(self, value, label):
+        if value is None:
+            return None
+        text = _operand_text(value, label)
+        try:
+            return Fraction(text)
+        except (ValueError, ZeroDivisionError):
+            raise InputError(f'Invalid {label} number: {value}')
+
+
+def _operand_text(value, label):
+    """str(value) for Decimal() or Fraction(), rejecting operands too large to build."""
+    text = str(value).strip()
+    _, e, exponent = text.lower().partition('e')
+    digits = exponent.lstrip('+-')
+    if len(text) > MAX_OPERAND_DIGITS or e and (
+            len(digits) > len(str(MAX_OPERAND_DIGITS))
+            or digits.isdigit() and int(digits) > MAX_OPERAND_DIGITS):
+        raise InputError(f'{label.capitalize()} number is too large '
+                         f'(limit is {MAX_OPERAND_DIGITS} digits)')
+    return text
+
+
+FLOAT = NumericMode()
+FRACTION = FractionMode()
+MODES = ('float', 'decimal', 'fraction')
+
+
+def get_mode(name=None, precision=None):
+    """Look up a mode by name ('float' when name is empty)."""
+    if not name or name == 'float':
+        return FLOAT
+    if name == 'fraction':
+        return FRACTION
+    if name == 'decimal':
+        if precision is None:
+            return DecimalMode()
+        try:
+            precision = int(precision)
+        except (TypeError, ValueError):
+            raise InputError(f'Invalid precision: {precision}')
+        if not 1 <= precision <= MAX_PRECISION:
+            raise InputError(f'Precision must be between 1 and {MAX_PRECISION}')
+        return DecimalMode(precision)
+    raise InputError(f"Unknown mode: {name} (choose from {', '.join(MODES)})")
+
+
+def sqrt(value):
+    """Square root that keeps Decimal precision and exact Fractions when possible."""
+    if isinstance(value, Decimal):
+        return value.sqrt()
+    if isinstance(value, Fraction):
+        numerator, denominator = math.isqrt(value.numerator), math.isqrt(value.denominator)
+        if numerator * numerator == value.numerator and denominator * denominator == value.denominator:
+            return Fraction(numerator, denominator)
+    return math.sqrt(value)
+
+
+# Integers up to this many bits are converted to Decimal in one step
+SPLIT_BITS = 2048
+
+
+def int_to_str(value):
+    """Decimal digits of an integer of any size.
+
+    Going through Decimal skips the int-to-str digit limit (4300 digits).
+    Both str() and Decimal(int) take time quadratic in the length (about 30s
+    for a million digits), so big integers are split in halves by bits and
+    reassembled with Decimal arithmetic, whose large multiplications are
+    subquadratic: a million digits then take a fraction of a second.
+    """
+    if value.bit_length() <= SPLIT_BITS:
+        return str(Decimal(value))
+    powers = {}
+
+    def power_of_two(bits):
+        result = powers.get(bits)
+        if result is None:
+            if bits <= SPLIT_BITS:
+                result = Decimal(1 << bits)
+            else:
+                half = bits >> 1
+                result = power_of_two(half) * power_of_two(bits - half)
+            powers[bits] = result
+        return result
+
+    def convert(n, bits):
+        if bits <= SPLIT_BITS:
+            return Decimal(n)
+        half = bits >> 1
+        high = n >> half
+        return convert(n - (high << half), half) + convert(high, bits - half) * power_of_two(half)
+
+    with decimal.localcontext() as context:
+        # Exact: every digit is kept, and an inexact step would be a bug
+        context.prec = decimal.MAX_PREC
+        context.Emax = decimal.MAX_EMAX
+        context.traps[decimal.Inexact] = True
+        digits = str(convert(abs(value), abs(value).bit_length()))
+    return '-' + digits if value < 0 else digits
+
+
+def to_json(value):
+    """Decimals, Fractions and integers beyond 2**53 are sent as strings so
+    no precision is lost."""
+    if type(value) is int:
+        if -MAX_SAFE_INTEGER <= value <= MAX_SAFE_INTEGER:
+            return value
+        return int_to_str(value)
+    if isinstance(value, Fraction):
+        # str() would hit the int-to-str digit limit for huge terms
+        if value.denominator == 1:
+            return int_to_str(value.numerator)
+        return f'{int_to_str(value.numerator)}/{int_to_str(value.denominator)}'
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
@@ -0,0 +1,108 @@
+"""
+Offloader - run CPU-heavy operations in a process pool
+
+Big-integer work such as 3 ** 10_000_000 holds the GIL for seconds, which
+stalls every other request thread in the same process. Operations registered
+with a cost function (see operations.py) report the estimated size of their
+result in bits; Calculator hands that estimate to Offloader.call(), which:
+
+- rejects the call outright if the result would exceed max_result_bits,
+- runs it inline when the estimate is below min_bits (the common case, so
+  cheap calls never pay for a pool round trip),
+- otherwise runs it in a ProcessPoolExecutor and waits at most `timeout`
+  seconds. A call that is still queued at its deadline is cancelled; one that
+  is already running is stopped by terminating the pool's processes, and a
+  fresh pool is started for the next call.
+
+With workers=0 nothing is offloaded, but the size limit still applies.
+"""
+
+import math
+import threading
+
+DEFAULT_MIN_BITS = 50000
+DEFAULT_MAX_RESULT_BITS = 100000
+DEFAULT_TIMEOUT = 10.0
+
+LOG10_2 = math.log10(2)
+
+
+class OffloadTimeoutError(TimeoutError):
+    """Raised when an offloaded operation does not finish within its timeout."""
+
+
+class Offloader:
+    """Routes expensive calls to a process pool with timeouts and a result size limit."""
+
+    def __init__(self, workers=0, min_bits=DEFAULT_MIN_BITS,
+                 max_result_bits=DEFAULT_MAX_RESULT_BITS, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.min_bits = min_bits
+        self.max_result_bits = max_result_bits
+        self.timeout = timeout
+        self.offloaded = 0
+        self.timeouts = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def check(self, bits):
+        """Raise ValueError if a result of `bits` bits is over the limit."""
+        if self.max_result_bits is not None and bits > self.max_result_bits:
+            raise ValueError(
+                f"Result too large: about {int(bits * LOG10_2):,} digits "
+                f"(limit is {int(self.max_result_bits * LOG10_2):,})"
+            )
+
+    def call(self, bits, func, *args):
+        """Return func(*args), offloaded when its result is estimated at >= min_bits.
+
+        func must be picklable (a module-level function) to be offloaded.
+        """
+        self.check(bits)
+        if not self.workers or bits < self.min_bits:
+            return func(*args)
+        # Imported here: concurrent.futures pulls in logging and multiprocessing,
+        # which the inline path above never needs
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self._get_pool()
+        future = pool.submit(func, *args)
+        self.offloaded += 1
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            if not future.cancel():
+                self._discard_pool(pool)
+            raise OffloadTimeoutError(f"Calculation exceeded its time limit ({self.timeout:g}s)")
+        except BrokenProcessPool:
+            # Another call's timeout stopped the pool while this one was in it
+            self._discard_pool(pool)
+            raise RuntimeError("Calculation was interrupted; please try again")
+
+    def _get_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # ProcessPoolExecutor can't stop a running call, so stop its processes
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {'workers': self.workers, 'offloaded': self.offloaded, 'timeouts': self.timeouts}
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
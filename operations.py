@@ -0,0 +1,231 @@
+"""
+Operation Registry - one table describing every calculator operation
+
+Each Operation records how to run it (a Calculator method or a plain
+function), how many operands it takes, how raw inputs are converted to
+numbers, and how it is labelled in the web UI and the CLI menu. The web app,
+main.py, the expression evaluator and the /operations endpoint all read this
+table, so adding an operation is a single register() call:
+
+    registry.register('gcd', func=math.gcd, label='Greatest Common Divisor',
+                      icon='🔗', integer=True, template="gcd({a}, {b}) = {result}",
+                      inputs=(('First Integer', 'Enter first integer'),
+                              ('Second Integer', 'Enter second integer')))
+"""
+
+import math
+from fractions import Fraction
+
+from history import register_format
+
+ORDINALS = ('first', 'second', 'third')
+
+BINARY_INPUTS = (('First Number', 'Enter first number'),
+                 ('Second Number', 'Enter second number'))
+
+
+class InputError(ValueError):
+    """Raised when a request carries an unknown operation or unusable operands."""
+
+
+def parse_number(value, label):
+    """Convert a raw input value to an int or float (None passes through)."""
+    if value is None or type(value) in (int, float):
+        return value
+    try:
+        return float(value) if '.' in str(value) else int(value)
+    except (TypeError, ValueError):
+        # TypeError: JSON lists and objects
+        raise InputError(f'Invalid {label} number: {value}')
+
+
+class Operation:
+    """Everything the front ends need to know about one operation."""
+
+    __slots__ = ('name', 'method', 'func', 'arity', 'label', 'icon',
+                 'inputs', 'integer', 'validate', 'cost')
+
+    def __init__(self, name, method=None, func=None, label=None, icon='',
+                 inputs=BINARY_INPUTS, integer=False, validate=None, cost=None):
+        self.name = name
+        self.method = method
+        self.func = func
+        self.arity = len(inputs)
+        self.label = label or name.replace('_', ' ').title()
+        self.icon = icon
+        self.inputs = inputs
+        self.integer = integer
+        self.validate = validate
+        # cost(*values) -> estimated result size in bits, for the offloader
+        self.cost = cost
+
+    def coerce(self, operands, parse=parse_number):
+        """Parse raw operands into numbers, enforcing arity and integer inputs."""
+        values = []
+        for i in range(self.arity):
+            raw = operands[i] if i < len(operands) else None
+            value = parse(raw, ORDINALS[i])
+            if value is None:
+                raise InputError(f'Missing {ORDINALS[i]} number for {self.name}')
+            if self.integer and not isinstance(value, int):
+                if value != int(value):
+                    raise InputError(f'{self.label} requires an integer')
+                value = int(value)
+            values.append(value)
+        if self.validate is not None:
+            self.validate(*values)
+        return values
+
+    def describe(self):
+        """JSON-friendly description used by /operations."""
+        return {
+            'name': self.name,
+            'label': self.label,
+            'icon': self.icon,
+            'arity': self.arity,
+            'integer': self.integer,
+            'inputs': [{'label': label, 'placeholder': placeholder}
+                       for label, placeholder in self.inputs],
+        }
+
+
+class OperationRegistry:
+    """Name -> Operation table with O(1) lookup."""
+
+    def __init__(self):
+        self._operations = {}
+
+    def register(self, name, method=None, func=None, template=None, **options):
+        """Add an operation backed by a Calculator method or a plain function.
+
+        Operations backed by a plain function are recorded in history by
+        Calculator.calculate(); template controls how they are displayed.
+        """
+        if (method is None) == (func is None):
+            raise ValueError("Register exactly one of method= or func=")
+        operation = Operation(name, method=method, func=func, **options)
+        self._operations[name] = operation
+        if template is not None:
+            register_format(name, template)
+        elif func is not None:
+            register_format(name)
+        return operation
+
+    def get(self, name):
+        try:
+            return self._operations[name]
+        except (KeyError, TypeError):
+            raise InputError(f'Unknown operation: {name}')
+
+    def __contains__(self, name):
+        return name in self._operations
+
+    def __iter__(self):
+        return iter(self._operations.values())
+
+    def __len__(self):
+        return len(self._operations)
+
+    def describe(self):
+        return [operation.describe() for operation in self]
+
+
+def _nonzero_divisor(a, b):
+    if b == 0:
+        raise ValueError("Cannot divide by zero")
+
+
+def _log_domain(a, base):
+    if a <= 0:
+        raise ValueError("Logarithm requires a positive number")
+    if base <= 0 or base == 1:
+        raise ValueError("Logarithm base must be positive and not 1")
+
+
+def _root_domain(a, n):
+    if n == 0:
+        raise ValueError("Root degree cannot be zero")
+    if a < 0 and not (float(n).is_integer() and int(n) % 2 == 1):
+        raise ValueError("Cannot calculate even root of negative number")
+
+
+def _bits(x):
+    # Numerator plus denominator bits of an int or Fraction; integers store no denominator
+    if x.denominator == 1:
+        return x.numerator.bit_length()
+    return x.numerator.bit_length() + x.denominator.bit_length()
+
+
+def _power_cost(a, b):
+    # Only exact powers grow with the exponent; float and Decimal results are bounded.
+    # Fraction mode parses integers as Fractions with denominator 1
+    if isinstance(b, Fraction) and b.denominator == 1:
+        b = b.numerator
+    if not isinstance(b, int):
+        return 0
+    if isinstance(a, Fraction) and abs(b) > 1 and a not in (0, 1, -1):
+        # Negative exponents stay exact too: Fraction(3) ** -n == 1 / 3 ** n
+        return _bits(a) * abs(b)
+    if isinstance(a, int) and abs(a) > 1 and b > 1:
+        return a.bit_length() * b
+    return 0
+
+
+def _product_cost(a, b):
+    # An exact product is about as long as both operands together
+    if isinstance(a, (int, Fraction)) and isinstance(b, (int, Fraction)):
+        return _bits(a) + _bits(b)
+    return 0
+
+
+def _quotient_cost(a, b):
+    # int / int is a float; only Fraction operands keep a quotient exact
+    if isinstance(a, Fraction) or isinstance(b, Fraction):
+        return _product_cost(a, b)
+    return 0
+
+
+def _factorial_cost(n):
+    # log2(n!) < n * log2(n)
+    return n * n.bit_length()
+
+
+def nth_root(a, n):
+    """Real n-th root; odd roots of negative numbers stay negative."""
+    if a < 0:
+        return -((-a) ** (1 / n))
+    return a ** (1 / n)
+
+
+registry = OperationRegistry()
+
+registry.register('add', method='add', label='Addition', icon='➕')
+registry.register('subtract', method='subtract', label='Subtraction', icon='➖')
+registry.register('multiply', method='multiply', label='Multiplication', icon='✖️',
+                  cost=_product_cost)
+registry.register('divide', method='divide', label='Division', icon='➗', cost=_quotient_cost,
+                  inputs=(('Dividend', 'Enter dividend'), ('Divisor', 'Enter divisor')))
+registry.register('power', method='power', label='Power', icon='🔢', cost=_power_cost,
+                  inputs=(('Base', 'Enter base number'), ('Exponent', 'Enter exponent')))
+registry.register('square_root', method='square_root', label='Square Root', icon='√',
+                  inputs=(('Number', 'Enter number to find square root'),))
+registry.register('factorial', method='factorial', label='Factorial', icon='❗', integer=True,
+                  cost=_factorial_cost,
+                  inputs=(('Integer', 'Enter non-negative integer'),))
+registry.register('percentage', method='percentage', label='Percentage', icon='📊',
+                  cost=_quotient_cost,
+                  inputs=(('Total Value', 'Enter total value'),
+                          ('Percentage', 'Enter percentage (e.g., 25 for 25%)')))
+registry.register('modulo', func=lambda a, b: a % b, label='Modulo', icon='🔁',
+                  validate=_nonzero_divisor, template="{a} mod {b} = {result}",
+                  inputs=(('Dividend', 'Enter dividend'), ('Divisor', 'Enter divisor')))
+registry.register('log', func=math.log, label='Logarithm', icon='📈',
+                  validate=_log_domain, template="log_{b}({a}) = {result}",
+                  inputs=(('Number', 'Enter a positive number'), ('Base', 'Enter base (e.g., 10)')))
+registry.register('nth_root', func=nth_root, label='Nth Root', icon='ⁿ√',
+                  validate=_root_domain, template="{b}√{a} = {result}",
+                  inputs=(('Number', 'Enter number'), ('Root', 'Enter root degree (e.g., 3)')))
+registry.register('gcd', func=math.gcd, label='Greatest Common Divisor', icon='🔗',
+                  integer=True, template="gcd({a}, {b}) = {result}",
+                  inputs=(('First Integer', 'Enter first integer'),
+                          ('Second Integer', 'Enter second integer')))
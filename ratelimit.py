@@ -0,0 +1,152 @@
+"""
+Rate Limiting and Admission Control - keep one client from slowing everyone
+
+Two independent checks run before a calculation request is handled:
+
+- RateLimiter: a token bucket per client. Each client's bucket refills at
+  `rate` tokens per second up to `burst`, and every request takes as many
+  tokens as it is estimated to cost. A client that runs out gets HTTP 429
+  with a Retry-After telling it when enough tokens will be back.
+- ConcurrencyLimiter: a cap on the requests being calculated at once across
+  all clients. Past it, requests are turned away straight away with 429
+  rather than queueing behind the ones already running, so latency stays
+  bounded when the server is overloaded.
+
+Costs are estimated from the operands before anything is computed (see
+operation_tokens()): a request costs REQUEST_TOKENS, plus ITEM_TOKENS per
+operation it contains, plus a share that grows with the estimated size of
+the result for operations with a cost function (power, factorial). One token
+is roughly the server time of one cheap request (~0.5 ms): `add` costs about
+1, factorial(5000) about 17 and factorial(20000) about 350.
+
+A request is charged at most `burst` tokens, so any single request can run
+once the client's bucket is full. While a huge result is being converted to
+decimal it holds the GIL, so the limiter bounds how often a client can do
+that, not how long each one takes; CALC_MAX_RESULT_BITS bounds the latter.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from numeric import get_mode
+from operations import registry
+
+DEFAULT_MAX_CLIENTS = 10000
+
+# Fixed cost of handling one HTTP request
+REQUEST_TOKENS = 1.0
+# Each operation in a request (a batch of 100 adds costs 1 + 100 * 0.01)
+ITEM_TOKENS = 0.01
+# Data summarised by /aggregate: ~2 µs and ~15 bytes per number
+STREAM_BYTES_PER_TOKEN = 4000
+# Big results are dominated by their conversion to a decimal string, which
+# is quadratic in the number of digits: tokens = (bits / BITS_PER_TOKEN) ** 2
+BITS_PER_TOKEN = 16000
+COST_EXPONENT = 2
+
+
+def operation_tokens(name, operands, mode=None, precision=None):
+    """Estimate the cost in tokens of running one operation on raw operands.
+
+    mode and precision are as in numeric.get_mode(). Invalid input is cheap:
+    it is rejected before any work is done.
+    """
+    try:
+        operation = registry.get(name)
+        if operation.cost is None:
+            return ITEM_TOKENS
+        parse = get_mode(mode, precision).parse
+        bits = operation.cost(*operation.coerce(operands, parse))
+    except (ValueError, ArithmeticError, TypeError):
+        return ITEM_TOKENS
+    return ITEM_TOKENS + (max(0, bits) / BITS_PER_TOKEN) ** COST_EXPONENT
+
+
+class RateLimiter:
+    """Per-client token buckets refilled at `rate` tokens per second up to `burst`.
+
+    At most max_clients buckets are kept; the least recently seen client's
+    bucket is dropped first (it starts full again when that client returns).
+    """
+
+    def __init__(self, rate, burst=None, max_clients=DEFAULT_MAX_CLIENTS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.max_clients = max_clients
+        self.clock = clock
+        self.admitted = 0
+        self.rejected = 0
+        self._buckets = OrderedDict()  # key -> [tokens, last refill time]
+        self._lock = threading.Lock()
+
+    def acquire(self, key, tokens=REQUEST_TOKENS):
+        """Take tokens from key's bucket.
+
+        Returns 0 if the request is admitted, otherwise the seconds until the
+        bucket will hold enough tokens. A request costing more than `burst`
+        needs a full bucket and empties it.
+        """
+        tokens = min(tokens, self.burst)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= tokens:
+                bucket[0] -= tokens
+                self.admitted += 1
+                return 0.0
+            self.rejected += 1
+            return (tokens - bucket[0]) / self.rate
+
+    def tokens(self, key):
+        """Tokens currently available to key (a full bucket for unknown clients)."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return self.burst
+            return min(self.burst, bucket[0] + (self.clock() - bucket[1]) * self.rate)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def stats(self):
+        return {'rate': self.rate, 'burst': self.burst, 'clients': len(self),
+                'admitted': self.admitted, 'rejected': self.rejected}
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on the number of requests being handled at once."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a slot and return True, or return False at once if all are in use."""
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self):
+        return {'limit': self.limit, 'active': self.active, 'rejected': self.rejected}
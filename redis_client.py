@@ -0,0 +1,202 @@
+"""
+Redis Client - a small pooled client for the Redis protocol (RESP)
+
+Just enough of the protocol for redis_store.py, with no third-party
+dependency: commands are arrays of bulk strings, and replies are simple
+strings, errors, integers, bulk strings or arrays.
+
+ConnectionPool keeps idle connections for reuse, and at most max_connections
+are open at once (callers wait up to `timeout` for one to be free). A
+connection that fails mid-command (a socket error or a garbled reply) is
+closed instead of being returned, so a half-read reply never reaches the
+next caller.
+
+pipeline() sends several commands in one write and then reads all the
+replies, so a batch costs one network round trip instead of one per command:
+
+    pool = ConnectionPool.from_url('redis://localhost:6379/0')
+    pool.execute('SET', 'key', b'value')
+    pool.pipeline([('INCR', 'hits'), ('GET', 'key')])   # -> [1, b'value']
+"""
+
+import socket
+import threading
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+DEFAULT_PORT = 6379
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_TIMEOUT = 5.0
+
+
+class RedisError(Exception):
+    """An error reply from the server."""
+
+
+def _bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value).encode()
+    raise TypeError(f"Cannot send {type(value).__name__} to Redis")
+
+
+def encode_command(args):
+    """Encode one command as a RESP array of bulk strings."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        data = _bytes(arg)
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+class Connection:
+    """One socket to the server; not thread-safe (the pool hands it to one caller at a time)."""
+
+    def __init__(self, host, port, timeout=DEFAULT_TIMEOUT):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def _read_line(self):
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by the Redis server")
+        return line[:-2]
+
+    def read_reply(self):
+        """Read one reply; an error reply is returned as a RedisError, not raised."""
+        line = self._read_line()
+        kind, rest = line[:1], line[1:]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            return RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the Redis server")
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the Redis server: {line[:50]!r}")
+
+    def pipeline(self, commands):
+        """Send every command at once, then return their replies in order."""
+        self.sock.sendall(b''.join(encode_command(args) for args in commands))
+        return [self.read_reply() for _ in commands]
+
+    def execute(self, *args):
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of Connections to one Redis server."""
+
+    def __init__(self, host='localhost', port=DEFAULT_PORT, db=0, password=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.created = 0
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **options):
+        """Pool for redis://[:password@]host[:port][/db]."""
+        parts = urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f"Not a redis:// URL: {url}")
+        path = parts.path.strip('/')
+        return cls(parts.hostname or 'localhost', parts.port or DEFAULT_PORT,
+                   db=int(path) if path else 0,
+                   password=unquote(parts.password) if parts.password else None, **options)
+
+    def _connect(self):
+        connection = Connection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        for reply in connection.pipeline(setup) if setup else ():
+            if isinstance(reply, RedisError):
+                connection.close()
+                raise reply
+        with self._lock:
+            self.created += 1
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless it failed."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No free Redis connection after {self.timeout}s")
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self._connect()
+            healthy = False
+            try:
+                yield connection
+                healthy = True
+            except RedisError:
+                # An error reply was read in full; the connection is still in step
+                healthy = True
+                raise
+            finally:
+                if healthy:
+                    with self._lock:
+                        self._idle.append(connection)
+                else:
+                    # Part of a reply may still be unread
+                    connection.close()
+        finally:
+            self._slots.release()
+
+    def execute(self, *args):
+        with self.connection() as connection:
+            return connection.execute(*args)
+
+    def pipeline(self, commands):
+        """Run commands in one round trip; raises the first error reply after reading them all."""
+        if not commands:
+            return []
+        with self.connection() as connection:
+            replies = connection.pipeline(commands)
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def stats(self):
+        with self._lock:
+            return {'max_connections': self.max_connections, 'created': self.created,
+                    'idle': len(self._idle)}
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
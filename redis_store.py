@@ -0,0 +1,208 @@
+"""
+Redis Store - result cache and history shared by every instance of the app
+
+The Redis counterparts of cache.SharedResultCache and history_store.HistoryLog,
+for running more than one host (or container) against the same state:
+
+- RedisResultCache: the ResultCache interface. Each result is stored as JSON
+  under a string key, with big integers, Decimals and Fractions as the tagged
+  text the history logs use (nothing read from the network is unpickled).
+  Cached factorials are also indexed in a sorted set by n, for
+  factorial_prefix(). Memory is bounded by the server's maxmemory with an
+  LRU policy (e.g. allkeys-lru). max_bytes only turns away single results
+  larger than it.
+- RedisHistoryLog: the HistoryLog interface. Each session's entries are a
+  list, and a per-session counter moves on with every append and clear, so
+  instances can tell when their copy of a session is stale (see
+  PersistentHistory.refresh()). A background writer sends everything
+  queued within flush_interval as one pipeline: a single round trip for many
+  requests' entries.
+
+Both use a redis_client.ConnectionPool and keep their keys under a prefix.
+Cache lookups that fail because the server can't be reached count as misses,
+and failed cache writes are logged, so an outage slows requests down instead
+of failing them.
+"""
+
+import json
+import logging
+
+from cache import DEFAULT_MAX_BYTES, make_key
+from history_store import (DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL, QueuedLog, decode_entry,
+                           decode_value, encode_entry, encode_value)
+from redis_client import RedisError
+
+DEFAULT_PREFIX = 'calc'
+
+logger = logging.getLogger(__name__)
+
+# Server or network trouble, as opposed to a bug in the caller
+UNAVAILABLE = (RedisError, OSError)
+
+
+class RedisResultCache:
+    """ResultCache interface backed by a Redis server shared between hosts.
+
+    Hit/miss counters are kept per process; entries are shared.
+    """
+
+    def __init__(self, pool, max_bytes=DEFAULT_MAX_BYTES, prefix=DEFAULT_PREFIX):
+        self.pool = pool
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._factorials = f'{prefix}:factorials'
+
+    def _key(self, key):
+        return f'{self.prefix}:result:{key!r}'
+
+    def get(self, key):
+        try:
+            blob = self.pool.execute('GET', self._key(key))
+        except UNAVAILABLE:
+            logger.warning("Result cache unavailable", exc_info=True)
+            self.errors += 1
+            blob = None
+        value = None if blob is None else _loads(blob)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        try:
+            blob = json.dumps(encode_value(value))
+        except (TypeError, ValueError):
+            # e.g. a complex result; it just isn't cached
+            return
+        if len(blob) > self.max_bytes:
+            return
+        commands = [('SET', self._key(key), blob)]
+        if key[0] == 'factorial':
+            n = key[1][1]
+            commands.append(('ZADD', self._factorials, n, n))
+        try:
+            self.pool.pipeline(commands)
+        except UNAVAILABLE:
+            logger.warning("Failed to store a result", exc_info=True)
+            self.errors += 1
+
+    def factorial_prefix(self, n):
+        try:
+            found = self.pool.execute('ZREVRANGEBYSCORE', self._factorials, n, '-inf',
+                                      'LIMIT', 0, 1)
+            if not found:
+                return 0, 1
+            k = int(found[0])
+            blob = self.pool.execute('GET', self._key(make_key('factorial', k)))
+            if blob is None:
+                # The server evicted it; drop it from the index too
+                self.pool.execute('ZREM', self._factorials, k)
+                return 0, 1
+        except UNAVAILABLE:
+            self.errors += 1
+            return 0, 1
+        prefix = _loads(blob)
+        return (0, 1) if prefix is None else (k, prefix)
+
+    def stats(self):
+        try:
+            entries, info = self.pool.pipeline([('DBSIZE',), ('INFO', 'memory')])
+            size = next((int(line.split(b':')[1]) for line in info.splitlines()
+                         if line.startswith(b'used_memory:')), 0)
+        except UNAVAILABLE:
+            entries = size = 0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            # Whole-database figures: the server may hold other data too
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        cursor = b'0'
+        while True:
+            cursor, keys = self.pool.execute('SCAN', cursor, 'MATCH', f'{self.prefix}:result:*',
+                                             'COUNT', 1000)
+            if keys:
+                self.pool.execute('DEL', *keys)
+            if cursor in (b'0', 0):
+                break
+        self.pool.execute('DEL', self._factorials)
+        self.hits = 0
+        self.misses = 0
+
+
+def _loads(blob):
+    """The value RedisResultCache.put() stored, or None for anything else."""
+    try:
+        return decode_value(json.loads(blob))
+    except ValueError:
+        # e.g. a pickle written by an older version
+        logger.warning("Ignoring an unreadable cached result")
+        return None
+
+
+class RedisHistoryLog(QueuedLog):
+    """HistoryLog interface on a Redis server, written with pipelined batches."""
+
+    shared = True
+    errors = UNAVAILABLE
+
+    def __init__(self, pool, prefix=DEFAULT_PREFIX, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.pool = pool
+        self.prefix = prefix
+        super().__init__(batch_size, flush_interval)
+
+    def _entries_key(self, session_id):
+        return f'{self.prefix}:history:{session_id}'
+
+    def _seq_key(self, session_id):
+        return f'{self.prefix}:seq:{session_id}'
+
+    def _write(self, connection, records):
+        commands = []
+        for kind, session_id, entry in records:
+            if kind == 'append':
+                try:
+                    row = json.dumps(encode_entry(entry))
+                except (TypeError, ValueError):
+                    # e.g. a complex result; skip it rather than the whole batch
+                    logger.warning("Cannot store history entry %r", entry)
+                    continue
+                commands.append(('RPUSH', self._entries_key(session_id), row))
+            else:
+                commands.append(('DEL', self._entries_key(session_id)))
+            commands.append(('INCR', self._seq_key(session_id)))
+        self.pool.pipeline(commands)
+
+    def state(self, session_id):
+        """(sequence number, number of entries) of a session, in one round trip."""
+        seq, count = self.pool.pipeline([('GET', self._seq_key(session_id)),
+                                         ('LLEN', self._entries_key(session_id))])
+        return int(seq or 0), count
+
+    def count(self, session_id):
+        return self.pool.execute('LLEN', self._entries_key(session_id))
+
+    def _range(self, session_id, start, stop):
+        rows = self.pool.execute('LRANGE', self._entries_key(session_id), start, stop)
+        return [decode_entry(json.loads(row)) for row in rows]
+
+    def tail(self, session_id, limit):
+        """Return the newest `limit` entries of a session, oldest first."""
+        if limit <= 0:
+            return []
+        return self._range(session_id, -limit, -1)
+
+    def page(self, session_id, offset, limit):
+        if limit <= 0:
+            return []
+        return self._range(session_id, offset, offset + limit - 1)
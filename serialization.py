@@ -0,0 +1,94 @@
+"""
+JSON Serialization and Compression - how API responses are put on the wire
+
+dumps() uses orjson when it is installed (several times faster than the
+standard library encoder) and falls back to json.dumps otherwise; set
+CALC_JSON_ENCODER=stdlib to force the fallback. app.FastJSONProvider plugs
+it into Flask so every jsonify() call goes through it; this module itself
+does not import Flask, so the command-line runner can use it cheaply.
+
+Responses above a size threshold are compressed with brotli (if the brotli
+package is installed and the client accepts it) or gzip; see compress().
+
+Big integers are not handled here: numeric.to_json() turns results outside
+the JavaScript-safe range into strings before they reach the encoder.
+"""
+
+import json
+import os
+from decimal import Decimal
+from fractions import Fraction
+
+from numeric import to_json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+ENCODERS = ('orjson', 'stdlib')
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Only text-like bodies are worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css',
+                          'application/javascript')
+
+
+def _default(value):
+    if isinstance(value, (Decimal, Fraction)):
+        return to_json(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _dumps_stdlib(obj):
+    return json.dumps(obj, default=_default, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def _dumps_orjson(obj):
+    try:
+        return orjson.dumps(obj, default=_default)
+    except TypeError:
+        # orjson rejects integers beyond 64 bits; the stdlib encoder doesn't
+        return _dumps_stdlib(obj)
+
+
+def get_encoder(name=None):
+    """Return the dumps(obj) -> bytes function for an encoder name."""
+    name = name or ('orjson' if orjson is not None else 'stdlib')
+    if name == 'orjson':
+        if orjson is None:
+            raise ValueError("The orjson encoder requires orjson (pip install orjson)")
+        return _dumps_orjson
+    if name == 'stdlib':
+        return _dumps_stdlib
+    raise ValueError(f"Unknown JSON encoder: {name} (choose from {', '.join(ENCODERS)})")
+
+
+dumps = get_encoder(os.environ.get('CALC_JSON_ENCODER'))
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        import gzip
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
@@ -0,0 +1,88 @@
+"""
+Session Store - one Calculator per client session
+
+The web app keeps a separate Calculator (and therefore a separate history)
+for each session id, so one user's /clear no longer wipes everybody's
+history. The store is bounded: sessions idle for longer than idle_timeout
+seconds are dropped, and when max_sessions is reached the least recently
+used session is evicted.
+
+The store lock is held only for the dictionary bookkeeping; calculations run
+outside it and each History has its own lock, so different sessions never
+wait on each other while computing.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_IDLE_TIMEOUT = 3600
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def is_valid_session_id(session_id):
+    return isinstance(session_id, str) and SESSION_ID_PATTERN.match(session_id) is not None
+
+
+class SessionStore:
+    """Bounded mapping of session id -> Calculator with idle eviction.
+
+    factory(session_id) builds the Calculator for a session seen for the first time.
+    """
+
+    def __init__(self, factory, max_sessions=DEFAULT_MAX_SESSIONS,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, clock=time.monotonic):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._sessions = OrderedDict()  # id -> [calculator, last_seen], oldest first
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the session's Calculator, creating it on first use."""
+        now = self.clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+                return entry[0]
+        # Build outside the lock; if another thread won the race, keep its calculator
+        calculator = self.factory(session_id)
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, [calculator, now])
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return entry[0]
+
+    def _evict(self, now):
+        sessions = self._sessions
+        while sessions:
+            oldest_id, (_, last_seen) = next(iter(sessions.items()))
+            if len(sessions) > self.max_sessions or now - last_seen > self.idle_timeout:
+                del sessions[oldest_id]
+            else:
+                break
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
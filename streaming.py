@@ -0,0 +1,227 @@
+"""
+Streaming Batch Runner - calculate whole files of operations
+
+Reads operations from NDJSON (one {"operation", "num1", "num2"} object per
+line) or CSV (header row with operation,num1,num2) and writes one result per
+input record, in input order, as NDJSON ({"success", "result" | "error"}) or
+CSV (success,result,error).
+
+The input is consumed as a stream of lines in fixed-size chunks, so memory
+use depends on chunk_size, not on the size of the file. Each chunk is parsed,
+calculated and encoded by process_chunk(); with workers > 1 chunks go to a
+process pool, at most two per worker in flight, and results are written in
+order as they come back.
+
+aggregate() streams a file of numbers (one per line, or one column of a CSV)
+into an Aggregate the same way, with each chunk summarised by aggregate_chunk()
+and the chunk summaries merged in order.
+
+Used by `python main.py run --input ops.ndjson --output results.ndjson` and
+`python main.py stats --input values.txt`.
+"""
+
+import csv
+import io
+import itertools
+import sys
+import time
+from collections import deque
+
+from aggregates import DEFAULT_SKETCH_SIZE, Aggregate
+from calculator import Calculator
+from numeric import get_mode, to_json
+from serialization import dumps, loads
+
+FORMATS = ('ndjson', 'csv')
+CSV_FIELDS = ('operation', 'num1', 'num2')
+CSV_OUTPUT_FIELDS = ('success', 'result', 'error')
+DEFAULT_CHUNK_SIZE = 2000
+# Chunks queued per worker; bounds memory while keeping workers busy
+CHUNKS_PER_WORKER = 2
+
+_calculator = None
+
+
+def guess_format(path, default='ndjson'):
+    """Pick a format from a file name (.csv -> csv, anything else -> default)."""
+    if path and path != '-' and path.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def _get_calculator():
+    # One per process. History isn't needed, so keep just the newest entry, and
+    # no result cache: file inputs rarely repeat and its keys would cost memory
+    global _calculator
+    if _calculator is None:
+        _calculator = Calculator(history_size=1)
+    return _calculator
+
+
+def _records(lines, input_format, fieldnames):
+    """Yield an operation dict (or None if unreadable) per input line."""
+    if input_format == 'csv':
+        for row in csv.reader(lines):
+            yield dict(zip(fieldnames, row)) if row else None
+        return
+    for line in lines:
+        try:
+            record = loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def _calculate(calc, record, mode):
+    if record is None:
+        return {'success': False, 'error': 'Unreadable record'}
+    try:
+        operands = (record.get('num1'), record.get('num2'))
+        operands = tuple(None if value == '' else value for value in operands)
+        result = calc.calculate(record.get('operation'), *operands, mode=mode)
+        return {'success': True, 'result': to_json(result)}
+    except Exception as e:
+        return {'success': False, 'error': str(e) or type(e).__name__}
+
+
+def process_chunk(lines, input_format='ndjson', output_format='ndjson',
+                  fieldnames=CSV_FIELDS, mode='float', precision=None):
+    """Calculate a chunk of raw input lines; returns (output text, count, errors)."""
+    calc = _get_calculator()
+    numeric_mode = get_mode(mode, precision)
+    results = [_calculate(calc, record, numeric_mode)
+               for record in _records(lines, input_format, fieldnames)]
+    errors = sum(1 for result in results if not result['success'])
+    if output_format == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        for result in results:
+            writer.writerow((str(result['success']).lower(), result.get('result', ''),
+                             result.get('error', '')))
+        return out.getvalue(), len(results), errors
+    return ''.join(dumps(result).decode() + '\n' for result in results), len(results), errors
+
+
+def chunks(lines, size):
+    """Group an iterable of lines into lists of at most `size`, skipping blank lines."""
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_chunks(func, pending, options, workers=1):
+    """Yield func(chunk, *options) for each chunk, in order.
+
+    With workers > 1 chunks go to a process pool, at most CHUNKS_PER_WORKER
+    per worker in flight.
+    """
+    if workers <= 1:
+        for chunk in pending:
+            yield func(chunk, *options)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in pending:
+            in_flight.append(pool.submit(func, chunk, *options))
+            if len(in_flight) >= workers * CHUNKS_PER_WORKER:
+                yield in_flight.popleft().result()
+        for future in in_flight:
+            yield future.result()
+
+
+class RunStats:
+    """Totals reported when a run finishes."""
+
+    def __init__(self):
+        self.records = 0
+        self.errors = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def summary(self):
+        elapsed = self.elapsed or 1e-9
+        return (f"Processed {self.records:,} operations ({self.errors:,} failed) in "
+                f"{self.elapsed:.2f}s: {self.records / elapsed:,.0f} ops/s, "
+                f"{self.bytes / elapsed / 1e6:.1f} MB/s")
+
+
+def run(source, sink, input_format='ndjson', output_format='ndjson', mode='float',
+        precision=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """Stream operations from the `source` file object to `sink`; returns RunStats."""
+    get_mode(mode, precision)  # fail fast on a bad mode before reading anything
+    stats = RunStats()
+    fieldnames = CSV_FIELDS
+    if input_format == 'csv':
+        header = next(csv.reader([source.readline()]), None)
+        fieldnames = tuple(name.strip() for name in header) if header else CSV_FIELDS
+    if output_format == 'csv':
+        sink.write(','.join(CSV_OUTPUT_FIELDS) + '\n')
+
+    def counted(lines):
+        for line in lines:
+            stats.bytes += len(line)
+            yield line
+
+    options = (input_format, output_format, fieldnames, mode, precision)
+    pending = chunks(counted(source), chunk_size)
+
+    def write(output):
+        text, count, errors = output
+        sink.write(text)
+        stats.records += count
+        stats.errors += errors
+
+    for output in map_chunks(process_chunk, pending, options, workers):
+        write(output)
+
+    sink.flush()
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
+
+
+def aggregate_chunk(lines, column=None, sketch_size=DEFAULT_SKETCH_SIZE):
+    """Summarise a chunk of raw lines: a number per line, or CSV field `column` (an index)."""
+    if column is None:
+        values = [line.strip() for line in lines]
+    else:
+        values = [row[column] for row in csv.reader(lines) if len(row) > column]
+    return Aggregate.from_chunk(values, sketch_size)
+
+
+def aggregate(source, column=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+              sketch_size=DEFAULT_SKETCH_SIZE):
+    """Summarise the numbers in `source` into an Aggregate.
+
+    With column set the input is CSV and column names its header field.
+    Raises ValueError (InputError) for a missing column or a value that
+    isn't a number.
+    """
+    index = None
+    if column is not None:
+        header = next(csv.reader([source.readline()]), [])
+        header = [name.strip() for name in header]
+        if column not in header:
+            raise ValueError(f"No column named {column!r} (columns: {', '.join(header)})")
+        index = header.index(column)
+    total = Aggregate(sketch_size)
+    for part in map_chunks(aggregate_chunk, chunks(source, chunk_size), (index, sketch_size), workers):
+        total.merge(part)
+    return total
+
+
+def open_input(path):
+    if path in (None, '-'):
+        return sys.stdin
+    return open(path, newline='', encoding='utf-8')
+
+
+def open_output(path):
+    if path in (None, '-'):
+        return sys.stdout
+    return open(path, 'w', newline='', encoding='utf-8')
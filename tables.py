@@ -0,0 +1,237 @@
+"""
+Lookup Tables - precomputed results for a fixed grid of operands
+
+Dashboards tend to ask for the same few calculations over and over (e.g. a
+set of totals against a rotating set of rates). A LookupTable runs one
+operation over every (row, column) pair of two operand lists once, up front,
+and keeps the results in a flat array, so a lookup is an index into it: no
+parsing, coercion or history.
+
+    table = LookupTable.build('tips', calculator, 'percentage',
+                              rows=[20, 50, 120], columns=[10, 15, 18, 20])
+    table.lookup(2, 1)   # 120 * 15 / 100 -> 18.0
+
+Results are stored as they are sent in JSON (numeric.to_json), in an
+array('q') when they are all integers, an array('d') when they are all
+floats, and a tuple otherwise (strings for Decimals, Fractions and big
+integers). Cells whose calculation failed (e.g. a division by zero) keep the
+error message instead.
+
+TableStore holds the tables registered by name, bounded by their approximate
+total size in bytes: registering past the limit evicts the least recently
+used tables. It lives in one process's memory, so a server running several
+worker processes sets TableStore.disabled to refuse new tables rather than
+have each worker answer from its own (see gunicorn.conf.py).
+"""
+
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from numeric import FLOAT, to_json
+from operations import InputError
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+# Largest grid (rows x columns) a single table may have
+DEFAULT_MAX_CELLS = 100000
+# Table names are used in URLs: /tables/<name>/<row>/<column>
+VALID_NAME = re.compile(r'[A-Za-z0-9_.-]{1,64}')
+
+
+def is_valid_name(name):
+    return isinstance(name, str) and VALID_NAME.fullmatch(name) is not None
+
+
+class LookupTable:
+    """One operation's results over a grid of operands, stored row by row."""
+
+    def __init__(self, name, operation, rows, columns, values, errors, mode=FLOAT):
+        self.name = name
+        self.operation = operation
+        self.rows = rows
+        self.columns = columns
+        self.mode = mode
+        self._values = values
+        self._errors = errors  # cell index -> error message
+        self._width = len(columns)
+        self.nbytes = (_size(values) + _size(rows) + _size(columns)
+                       + sum(sys.getsizeof(message) for message in errors.values()))
+
+    @classmethod
+    def build(cls, name, calculator, operation, rows, columns=None, mode=FLOAT):
+        """Compute operation for every pair of raw operands in rows x columns.
+
+        Unary operations (square_root, factorial) take no columns. Each operand
+        is parsed once with mode.parse, and a bad one rejects the whole table
+        with InputError; a cell whose calculation fails only records its
+        error. Anything else (e.g. the RuntimeError of an interrupted offloaded
+        calculation, which would succeed on a retry) propagates rather than
+        being stored in the table. Calculator methods record every cell in calculator's history,
+        so give it one of its own.
+        """
+        op = calculator.registry.get(operation)
+        if not rows:
+            raise InputError('rows must be a non-empty list of numbers')
+        if op.arity == 1:
+            if columns:
+                raise InputError(f'{op.label} takes one operand; leave out the columns')
+            columns = [None]
+        elif not columns:
+            raise InputError('columns must be a non-empty list of numbers')
+        rows = tuple(_parse(a, mode, 'row') for a in rows)
+        columns = tuple(b if b is None else _parse(b, mode, 'column') for b in columns)
+        results, errors = [], {}
+        for a in rows:
+            for b in columns:
+                try:
+                    values = op.coerce((a, b), _parsed)
+                    results.append(to_json(calculator.run(op, values, mode)))
+                except (ValueError, ArithmeticError, TimeoutError) as e:
+                    errors[len(results)] = str(e)
+                    results.append(0)
+        return cls(name, operation, rows, columns, _pack(results), errors, mode)
+
+    def lookup(self, row, column=0):
+        """Return the result at (row, column); raises IndexError outside the grid
+        and ValueError with the cell's error if its calculation failed."""
+        if not (0 <= row < len(self.rows) and 0 <= column < self._width):
+            raise IndexError(f'No cell ({row}, {column}) in a {len(self.rows)} x {self._width} table')
+        index = row * self._width + column
+        if index in self._errors:
+            raise ValueError(self._errors[index])
+        return self._values[index]
+
+    def __len__(self):
+        return len(self._values)
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'operation': self.operation,
+            'mode': self.mode.name,
+            'rows': len(self.rows),
+            'columns': self._width,
+            'cells': len(self),
+            'errors': len(self._errors),
+            'bytes': self.nbytes,
+        }
+
+
+def _parse(value, mode, label):
+    number = mode.parse(value, label)
+    if number is None:
+        raise InputError(f'Missing {label} number')
+    return number
+
+
+def _parsed(value, label):
+    # Operands are parsed up front; coerce() only applies the integer and validate checks
+    return value
+
+
+def _pack(results):
+    """The most compact container that holds results unchanged."""
+    kinds = {type(value) for value in results}
+    if kinds == {int}:
+        return array('q', results)
+    if kinds == {float}:
+        return array('d', results)
+    return tuple(results)
+
+
+def _size(container):
+    size = sys.getsizeof(container)
+    if not isinstance(container, array):
+        size += sum(sys.getsizeof(item) for item in container)
+    return size
+
+
+class TableStore:
+    """Thread-safe name -> LookupTable map bounded by the tables' total size (LRU)."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_cells=DEFAULT_MAX_CELLS):
+        self.max_bytes = max_bytes
+        self.max_cells = max_cells
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Why new tables are refused, if they are
+        self.disabled = None
+        self._tables = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def check_size(self, rows, columns):
+        """Raise InputError if a rows x columns grid is larger than max_cells."""
+        cells = rows * max(1, columns)
+        if cells > self.max_cells:
+            raise InputError(f'Table too large: {cells} cells (limit {self.max_cells})')
+
+    def add(self, table):
+        """Register table under its name, replacing any table of that name.
+
+        Returns the names of the tables evicted to make room. A table larger
+        than max_bytes on its own is rejected with InputError.
+        """
+        if table.nbytes > self.max_bytes:
+            raise InputError(f'Table too large: {table.nbytes} bytes (limit {self.max_bytes})')
+        evicted = []
+        with self._lock:
+            self._discard(table.name)
+            self._tables[table.name] = table
+            self._bytes += table.nbytes
+            while self._bytes > self.max_bytes:
+                name, old = self._tables.popitem(last=False)
+                self._bytes -= old.nbytes
+                self.evictions += 1
+                evicted.append(name)
+        return evicted
+
+    def get(self, name):
+        """Return the table called name, or None if it isn't (or no longer) registered."""
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                self.misses += 1
+                return None
+            self._tables.move_to_end(name)
+            self.hits += 1
+            return table
+
+    def remove(self, name):
+        with self._lock:
+            return self._discard(name)
+
+    def _discard(self, name):
+        # Caller holds self._lock
+        table = self._tables.pop(name, None)
+        if table is not None:
+            self._bytes -= table.nbytes
+        return table is not None
+
+    def describe(self):
+        with self._lock:
+            return [table.describe() for table in self._tables.values()]
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def stats(self):
+        return {
+            'tables': len(self),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
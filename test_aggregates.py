@@ -0,0 +1,170 @@
+"""
+Test file for one-pass aggregate statistics
+
+Run tests with: python -m pytest test_aggregates.py
+"""
+
+import math
+import random
+import statistics
+
+import pytest
+
+import app as webapp
+from aggregates import Aggregate, QuantileSketch
+from calculator import Calculator
+from operations import InputError
+
+
+def sample(n, seed=1):
+    rng = random.Random(seed)
+    return [rng.gauss(1e9, 3.0) for _ in range(n)]
+
+
+class TestAggregate:
+    """Test cases for the running sum, mean, variance and extremes."""
+
+    def test_matches_exact_statistics(self):
+        values = sample(20000)
+        total = Aggregate().update(values)
+        assert total.count == len(values)
+        assert total.sum == math.fsum(values)
+        assert total.mean == pytest.approx(statistics.fmean(values), rel=1e-15)
+        # The large offset ruins the naive sum-of-squares formula, not this one
+        assert total.variance() == pytest.approx(statistics.pvariance(values), rel=1e-9)
+        assert total.stddev(ddof=1) == pytest.approx(statistics.stdev(values), rel=1e-9)
+        assert (total.min, total.max) == (min(values), max(values))
+
+    def test_add_and_update_agree(self):
+        values = sample(5000)
+        one_by_one = Aggregate()
+        for value in values:
+            one_by_one.add(value)
+        chunked = Aggregate().update(values)
+        assert one_by_one.sum == chunked.sum
+        # Welford's per-value update rounds a little more than the chunked fsum
+        assert one_by_one.variance() == pytest.approx(chunked.variance(), rel=1e-6)
+
+    def test_compensated_sum(self):
+        total = Aggregate().update([1e16, 1.0, -1e16] * 1000)
+        assert total.sum == 1000.0
+
+    def test_merge_equals_whole(self):
+        values = sample(30000, seed=2)
+        parts = [Aggregate().update(values[i:i + 7000]) for i in range(0, len(values), 7000)]
+        merged = Aggregate()
+        for part in parts:
+            merged.merge(part)
+        whole = Aggregate().update(values)
+        assert merged.count == whole.count and merged.sum == whole.sum
+        assert merged.variance() == pytest.approx(whole.variance(), rel=1e-9)
+        assert (merged.min, merged.max) == (whole.min, whole.max)
+        assert merged.percentile(50) == pytest.approx(statistics.median(values), abs=0.1)
+
+    def test_empty_and_single_value(self):
+        assert Aggregate().to_dict()['mean'] is None
+        one = Aggregate().update(['2.5'])
+        assert (one.mean, one.variance(), one.variance(ddof=1)) == (2.5, 0.0, None)
+        assert one.histogram(3) == {'edges': [2.5, 2.5], 'counts': [1]}
+
+    @pytest.mark.parametrize('value', ['abc', None, True, float('nan'), 'inf', [1]])
+    def test_invalid_values(self, value):
+        with pytest.raises(InputError):
+            Aggregate().update([1, value])
+
+
+    @pytest.mark.parametrize('values', [[1e308, 1e308, -1e308], [1e200, -1e200]])
+    def test_overflow_is_an_input_error(self, values):
+        with pytest.raises(InputError, match='out of range'):
+            Aggregate().update(values)
+        total = Aggregate()
+        with pytest.raises(InputError, match='out of range'):
+            for value in values:
+                total.add(value)
+
+
+class TestQuantiles:
+    """Test cases for percentiles and histograms from the quantile sketch."""
+
+    def test_rank_error_is_small(self):
+        values = list(range(100000))
+        random.Random(3).shuffle(values)
+        total = Aggregate().update(values)
+        assert len(total.sketch) < 1000
+        for p in (1, 10, 50, 90, 99, 99.9):
+            assert abs(total.percentile(p) - p / 100 * len(values)) < 0.01 * len(values)
+        assert (total.percentile(0), total.percentile(100)) == (0, 99999)
+
+    def test_sketch_weights_add_up(self):
+        sketch = QuantileSketch(k=50)
+        for i in range(10000):
+            sketch.add(i)
+        assert sum(weight for _, weight in sketch.items()) == sketch.count == 10000
+        assert sketch.quantile(0.5) == pytest.approx(5000, abs=300)
+
+    def test_histogram(self):
+        total = Aggregate().update(range(1000))
+        counts = total.histogram(4)['counts']
+        assert sum(counts) == 1000
+        assert all(abs(count - 250) <= 20 for count in counts)
+        outside = total.histogram(2, bounds=(0, 499.5))
+        assert sum(outside['counts']) == pytest.approx(500, abs=20)
+        with pytest.raises(InputError):
+            total.histogram(2, bounds=(5, 5))
+        with pytest.raises(InputError):
+            total.histogram(2, bounds=(-1e308, 1e308))
+        with pytest.raises(InputError):
+            total.histogram(10 ** 9)
+
+    def test_percentile_out_of_range(self):
+        with pytest.raises(InputError):
+            Aggregate().update([1]).percentile(101)
+
+
+def test_calculator_aggregate():
+    calc = Calculator()
+    total = calc.aggregate(['1', '2', '3', '4'])
+    assert (total.count, total.mean, total.max) == (4, 2.5, 4)
+
+
+class TestAggregateEndpoint:
+    """Test cases for POST /aggregate."""
+
+    @pytest.fixture
+    def client(self):
+        webapp.sessions.clear()
+        return webapp.app.test_client()
+
+    def test_json_body(self, client):
+        response = client.post('/aggregate', json={'values': [1, 2, 3, 4, '5'],
+                                                   'percentiles': [50], 'bins': 2, 'ddof': 1})
+        data = response.get_json()
+        assert response.status_code == 200 and data['success'] is True
+        assert (data['count'], data['sum'], data['mean'], data['variance']) == (5, 15, 3, 2.5)
+        assert data['percentiles'] == {'50': 3}
+        assert data['histogram'] == {'edges': [1, 3, 5], 'counts': [2, 3]}
+
+    def test_streamed_lines(self, client):
+        body = ''.join(f'{i}\n' for i in range(10001))
+        response = client.post('/aggregate?percentiles=25,75&bins=5', data=body,
+                               content_type='text/plain')
+        data = response.get_json()
+        assert data['count'] == 10001 and data['mean'] == 5000
+        assert data['percentiles']['25'] == pytest.approx(2500, abs=100)
+        assert sum(data['histogram']['counts']) == 10001
+
+    @pytest.mark.parametrize('kwargs', [
+        {'json': {'values': [1, 'x']}},
+        {'json': {'numbers': [1, 2]}},
+        {'json': {'values': [1], 'percentiles': [150]}},
+        {'json': {'values': [1], 'bounds': [0, 1, 2]}},
+        {'json': {'values': [1], 'bins': 10 ** 9}},
+        {'json': {'values': [1], 'percentiles': [50] * 1000}},
+        {'json': {'values': [1e308, 1e308, -1e308]}},
+        {'data': '1\n2\n', 'content_type': 'text/plain', 'query_string': {'bins': 10 ** 9}},
+        {'data': '1\nabc\n', 'content_type': 'text/plain'},
+    ])
+    def test_bad_input(self, client, kwargs):
+        response = client.post('/aggregate', **kwargs)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
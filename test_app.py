@@ -0,0 +1,251 @@
+"""
+Test file for the Flask web app
+
+Run tests with: python -m pytest test_app.py
+"""
+
+import json
+import threading
+
+import pytest
+
+import app as webapp
+
+
+@pytest.fixture
+def client():
+    webapp.app.config['TESTING'] = True
+    webapp.sessions.clear()
+    with webapp.app.test_client() as client:
+        yield client
+
+
+class TestBatch:
+    """Test cases for the /calculate/batch endpoint."""
+
+    def test_json_array(self, client):
+        ops = [
+            {'operation': 'add', 'num1': '2', 'num2': '3'},
+            {'operation': 'multiply', 'num1': '2.5', 'num2': '4'},
+            {'operation': 'subtract', 'num1': 1, 'num2': 5},
+        ]
+        data = client.post('/calculate/batch', json=ops).get_json()
+        assert data['success'] is True
+        assert data['count'] == 3
+        assert [r['result'] for r in data['results']] == [5, 10.0, -4]
+
+    def test_operations_key(self, client):
+        body = {'operations': [{'operation': 'add', 'num1': 1, 'num2': 1}]}
+        data = client.post('/calculate/batch', json=body).get_json()
+        assert data['results'] == [{'success': True, 'result': 2}]
+
+    def test_per_item_errors_keep_order(self, client):
+        ops = [
+            {'operation': 'add', 'num1': 'x', 'num2': 1},
+            {'operation': 'nope', 'num1': 1, 'num2': 1},
+            'not an object',
+            {'operation': 'add', 'num1': 1, 'num2': 2},
+        ]
+        results = client.post('/calculate/batch', json=ops).get_json()['results']
+        assert results[0] == {'success': False, 'error': 'Invalid first number: x'}
+        assert results[1] == {'success': False, 'error': 'Unknown operation: nope'}
+        assert results[2]['success'] is False
+        assert results[3] == {'success': True, 'result': 3}
+
+    def test_complex_power_is_an_item_error(self, client):
+        ops = [{'operation': 'power', 'num1': -8, 'num2': 0.5},
+               {'operation': 'power', 'num1': '-1', 'num2': '1/3', 'mode': 'fraction'}]
+        results = client.post('/calculate/batch', json=ops).get_json()['results']
+        assert [result['success'] for result in results] == [False, False]
+        assert 'fractional power' in results[0]['error']
+
+    def test_ndjson(self, client):
+        body = '\n'.join([
+            json.dumps({'operation': 'add', 'num1': 1, 'num2': 2}),
+            '',
+            '{broken',
+            json.dumps({'operation': 'multiply', 'num1': 3, 'num2': 4}),
+        ])
+        response = client.post('/calculate/batch', data=body,
+                               content_type='application/x-ndjson')
+        results = response.get_json()['results']
+        assert len(results) == 3
+        assert results[0]['result'] == 3
+        assert results[1]['success'] is False
+        assert results[2]['result'] == 12
+
+    def test_rejects_non_list(self, client):
+        response = client.post('/calculate/batch', json={'operation': 'add'})
+        assert response.status_code == 400
+
+    def test_batch_limit(self, client, monkeypatch):
+        monkeypatch.setattr(webapp, 'MAX_BATCH_SIZE', 2)
+        ops = [{'operation': 'add', 'num1': 1, 'num2': 1}] * 3
+        response = client.post('/calculate/batch', json=ops)
+        assert response.status_code == 413
+
+
+class TestVector:
+    """Test cases for the /calculate/vector endpoint."""
+
+    def test_vector_add(self, client):
+        pytest.importorskip("numpy")
+        body = {'operation': 'add', 'num1': [1, 2, 3], 'num2': 10}
+        data = client.post('/calculate/vector', json=body).get_json()
+        assert data == {'success': True, 'result': [11, 12, 13]}
+
+    def test_vector_unary(self, client):
+        pytest.importorskip("numpy")
+        body = {'operation': 'factorial', 'num1': [0, 5]}
+        assert client.post('/calculate/vector', json=body).get_json()['result'] == [1, 120]
+
+    def test_vector_limits_match_scalar(self, client):
+        pytest.importorskip("numpy")
+        for body in ({'operation': 'factorial', 'num1': [200000]},
+                     {'operation': 'power', 'num1': [3], 'num2': [5000000]}):
+            scalar = client.post('/calculate', json=dict(body, num1=body['num1'][0],
+                                                         num2=(body.get('num2') or [None])[0]))
+            vector = client.post('/calculate/vector', json=body)
+            assert scalar.get_json()['success'] is False
+            assert vector.get_json() == {'success': False, 'error': scalar.get_json()['error']}
+
+    def test_vector_error(self, client):
+        pytest.importorskip("numpy")
+        body = {'operation': 'divide', 'num1': [1, 2], 'num2': [1, 0]}
+        data = client.post('/calculate/vector', json=body).get_json()
+        assert data == {'success': False, 'error': 'Cannot divide by zero'}
+
+    def test_vector_unknown_operation(self, client):
+        for body in ({'operation': 'nope'}, ['add'], {'operation': ['add']}):
+            response = client.post('/calculate/vector', json=body)
+            assert response.status_code == 400
+
+    def test_vector_overflow_is_an_error(self, client):
+        pytest.importorskip("numpy")
+        body = {'operation': 'power', 'num1': [10.0], 'num2': [400]}
+        scalar = client.post('/calculate', json=dict(body, num1=10.0, num2=400)).get_json()
+        vector = client.post('/calculate/vector', json=body).get_json()
+        assert scalar['success'] is vector['success'] is False
+        assert vector['error'] in scalar['error']
+
+
+class TestHistoryPages:
+    """Test cases for the paginated /history endpoint."""
+
+    def test_pagination(self, client):
+        for i in range(5):
+            client.post('/calculate', json={'operation': 'add', 'num1': i, 'num2': 0})
+        data = client.get('/history?offset=1&limit=2').get_json()
+        assert data['history'] == ['1 + 0 = 1', '2 + 0 = 2']
+        assert data['total'] == 5
+
+    def test_calculate_returns_only_new_entry(self, client):
+        for i in range(4):
+            data = client.post('/calculate', json={'operation': 'add', 'num1': i, 'num2': 0}).get_json()
+        assert data['entry'] == '3 + 0 = 3' and data['seq'] == 4
+        assert 'history' not in data
+
+    def test_calculate_entry_ignores_concurrent_requests(self, client, monkeypatch):
+        run_operation = webapp.run_operation
+
+        def interleaved(calc, *args):
+            result = run_operation(calc, *args)
+            # Another request of the same session finishes in between
+            other = threading.Thread(target=calc.add, args=(100, 0))
+            other.start()
+            other.join()
+            return result
+
+        monkeypatch.setattr(webapp, 'run_operation', interleaved)
+        data = client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 0}).get_json()
+        assert data['entry'] == '1 + 0 = 1' and data['seq'] == 1
+        assert client.get('/history').get_json()['history'] == ['1 + 0 = 1', '100 + 0 = 100']
+
+    def test_since_returns_delta(self, client):
+        for i in range(3):
+            client.post('/calculate', json={'operation': 'add', 'num1': i, 'num2': 0})
+        data = client.get('/history?since=1').get_json()
+        assert data['history'] == ['1 + 0 = 1', '2 + 0 = 2']
+        assert data['seq'] == 3 and data['reset'] is False
+        assert client.get('/history?since=3').get_json()['history'] == []
+
+    def test_since_resets_after_clear_or_gap(self, client, monkeypatch):
+        client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 0})
+        seq = client.post('/clear').get_json()['seq']
+        data = client.get('/history?since=1').get_json()
+        assert data['reset'] is True and data['history'] == []
+        assert client.get(f'/history?since={seq}').get_json()['reset'] is False
+
+        monkeypatch.setattr(webapp, 'HISTORY_PAGE_SIZE', 2)
+        for i in range(3):
+            client.post('/calculate', json={'operation': 'add', 'num1': i, 'num2': 0})
+        data = client.get(f'/history?since={seq}').get_json()
+        assert data['reset'] is True and data['history'] == ['1 + 0 = 1', '2 + 0 = 2']
+
+    def test_etag_not_modified(self, client):
+        client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 0})
+        response = client.get('/history?since=1')
+        etag = response.headers['ETag']
+        again = client.get('/history?since=1', headers={'If-None-Match': etag})
+        assert again.status_code == 304 and again.get_data() == b''
+        client.post('/calculate', json={'operation': 'add', 'num1': 2, 'num2': 0})
+        changed = client.get('/history?since=1', headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.get_json()['history'] == ['2 + 0 = 2']
+
+    def test_limit_is_capped(self, client):
+        data = client.get('/history?limit=100000').get_json()
+        assert data['limit'] == webapp.MAX_HISTORY_PAGE_SIZE
+
+
+class TestEvaluate:
+    """Test cases for the /evaluate endpoint."""
+
+    def test_expression(self, client):
+        data = client.post('/evaluate', json={'expression': '2^10 + sqrt(49) * 5!'}).get_json()
+        assert data['success'] is True
+        assert data['result'] == 1864.0
+
+    def test_variables(self, client):
+        body = {'expression': 'x * 2', 'variables': {'x': '2.5'}}
+        assert client.post('/evaluate', json=body).get_json()['result'] == 5.0
+
+    def test_bindings(self, client):
+        body = {'expression': '100 / x', 'bindings': [{'x': 4}, {'x': 0}]}
+        results = client.post('/evaluate', json=body).get_json()['results']
+        assert results[0] == {'success': True, 'result': 25.0}
+        assert results[1]['success'] is False
+
+    def test_syntax_error(self, client):
+        response = client.post('/evaluate', json={'expression': '1 +'})
+        assert response.status_code == 400
+        assert 'Unexpected' in response.get_json()['error']
+
+    def test_missing_expression(self, client):
+        assert client.post('/evaluate', json={}).status_code == 400
+
+    @pytest.mark.parametrize('body', [['1 + 1'], '1 + 1', {'expression': 'x', 'bindings': 5}])
+    def test_malformed_body(self, client, body):
+        response = client.post('/evaluate', json=body)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+class TestOperations:
+    """Test cases for registry-driven dispatch in the web app."""
+
+    def test_operations_endpoint(self, client):
+        operations = client.get('/operations').get_json()['operations']
+        names = [op['name'] for op in operations]
+        assert 'add' in names and 'gcd' in names
+        factorial = next(op for op in operations if op['name'] == 'factorial')
+        assert factorial['arity'] == 1 and factorial['integer'] is True
+
+    def test_registered_operation_via_calculate(self, client):
+        data = client.post('/calculate', json={'operation': 'gcd', 'num1': '12', 'num2': '18'}).get_json()
+        assert data['result'] == 6
+        assert data['entry'] == 'gcd(12, 18) = 6'
+
+    def test_factorial_requires_integer(self, client):
+        data = client.post('/calculate', json={'operation': 'factorial', 'num1': '3.5'}).get_json()
+        assert data == {'success': False, 'error': 'Factorial requires an integer'}
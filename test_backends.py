@@ -0,0 +1,290 @@
+"""
+Test file for the state backends, the Redis client and the Redis store
+
+The Redis pieces run against fake_redis.FakeRedisServer, so no Redis server
+is needed.
+
+Run tests with: python -m pytest test_backends.py
+"""
+
+import math
+import pickle
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+import app as webapp
+from backends import open_backend
+from cache import ResultCache, SharedResultCache, make_key
+from calculator import Calculator
+from fake_redis import FakeRedisServer
+from history_store import HistoryLog, PersistentHistory
+from redis_client import ConnectionPool, RedisError, encode_command
+from redis_store import RedisHistoryLog, RedisResultCache
+
+
+@pytest.fixture
+def server():
+    with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture
+def pool(server):
+    pool = ConnectionPool.from_url(server.url, timeout=2)
+    yield pool
+    pool.close()
+
+
+def make_calc(log, session_id='s', capacity=5):
+    return Calculator(history=PersistentHistory(log, session_id, capacity))
+
+
+class TestRedisClient:
+    """Test cases for the RESP client and its connection pool."""
+
+    def test_encode_command(self):
+        assert encode_command(('SET', 'k', b'v', 12)) == b'*4\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\nv\r\n$2\r\n12\r\n'
+
+    def test_from_url(self):
+        pool = ConnectionPool.from_url('redis://:s%40cret@cache.internal:6380/2')
+        assert (pool.host, pool.port, pool.db, pool.password) == ('cache.internal', 6380, 2, 's@cret')
+        with pytest.raises(ValueError):
+            ConnectionPool.from_url('http://localhost')
+
+    def test_pipeline_is_one_round_trip(self, server, pool):
+        pool.execute('PING')
+        before = server.round_trips
+        assert pool.pipeline([('SET', 'a', b'1'), ('INCR', 'a'), ('GET', 'a')]) == ['OK', 2, b'2']
+        assert server.round_trips == before + 1
+
+    def test_error_reply_keeps_connection(self, pool):
+        with pytest.raises(RedisError):
+            pool.execute('NOSUCHCOMMAND')
+        assert pool.execute('PING') == 'PONG'
+        assert pool.stats()['created'] == 1
+
+    def test_pipeline_reads_every_reply_before_raising(self, pool):
+        with pytest.raises(RedisError):
+            pool.pipeline([('NOSUCHCOMMAND',), ('SET', 'k', b'v')])
+        assert pool.execute('GET', 'k') == b'v'
+
+    def test_connections_are_reused(self, pool):
+        for _ in range(20):
+            pool.execute('PING')
+        assert pool.stats() == {'max_connections': 16, 'created': 1, 'idle': 1}
+
+    def test_waits_for_a_free_connection(self, server):
+        pool = ConnectionPool.from_url(server.url, max_connections=1, timeout=0.1)
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                pool.execute('PING')
+        assert pool.execute('PING') == 'PONG'
+
+    def test_broken_connection_is_dropped(self, server, pool):
+        with pool.connection() as connection:
+            connection.sock.close()
+        # The closed socket wasn't returned; the next call opens a fresh one
+        assert pool.execute('PING') == 'PONG'
+        assert pool.stats()['created'] == 1 and server.round_trips >= 1
+
+
+class TestRedisResultCache:
+    """Test cases for RedisResultCache."""
+
+    def test_put_and_get(self, pool):
+        cache = RedisResultCache(pool)
+        key = make_key('multiply', 3, 4)
+        assert cache.get(key) is None
+        cache.put(key, 12)
+        assert cache.get(key) == 12
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    def test_values_keep_their_type(self, pool):
+        cache = RedisResultCache(pool)
+        values = [2 ** 100, -7, 2.5, math.inf, Decimal('1.4142135623730950488'), Fraction(1, 3)]
+        for i, value in enumerate(values):
+            cache.put(make_key('power', i, 2), value)
+        for i, value in enumerate(values):
+            result = cache.get(make_key('power', i, 2))
+            assert result == value and type(result) is type(value)
+
+    def test_pickles_are_never_loaded(self, pool):
+        cache = RedisResultCache(pool)
+        key = make_key('power', 2, 10)
+        pool.execute('SET', cache._key(key), pickle.dumps(1024))
+        assert cache.get(key) is None and cache.stats()['misses'] == 1
+        pool.execute('ZADD', 'calc:factorials', 5, 5)
+        pool.execute('SET', cache._key(make_key('factorial', 5)), pickle.dumps(120))
+        assert cache.factorial_prefix(6) == (0, 1)
+
+    def test_shared_between_instances(self, pool, server):
+        RedisResultCache(pool).put(make_key('power', 2, 100), 2 ** 100)
+        other = RedisResultCache(ConnectionPool.from_url(server.url))
+        assert other.get(make_key('power', 2, 100)) == 2 ** 100
+
+    def test_oversized_results_are_not_stored(self, pool):
+        cache = RedisResultCache(pool, max_bytes=100)
+        cache.put(make_key('factorial', 1000), math.factorial(1000))
+        assert cache.get(make_key('factorial', 1000)) is None
+
+    def test_factorial_prefix(self, pool):
+        cache = RedisResultCache(pool)
+        assert cache.factorial_prefix(50) == (0, 1)
+        cache.put(make_key('factorial', 10), math.factorial(10))
+        cache.put(make_key('factorial', 30), math.factorial(30))
+        assert cache.factorial_prefix(25) == (10, math.factorial(10))
+        assert cache.factorial_prefix(40) == (30, math.factorial(30))
+
+    def test_factorial_prefix_skips_evicted_entries(self, pool):
+        cache = RedisResultCache(pool)
+        cache.put(make_key('factorial', 10), math.factorial(10))
+        pool.execute('DEL', cache._key(make_key('factorial', 10)))
+        assert cache.factorial_prefix(20) == (0, 1)
+        assert pool.execute('ZCARD', 'calc:factorials') == 0
+
+    def test_clear_keeps_other_keys(self, pool):
+        cache = RedisResultCache(pool)
+        cache.put(make_key('add', 1, 2), 3)
+        cache.put(make_key('factorial', 5), 120)
+        pool.execute('SET', 'unrelated', b'x')
+        cache.clear()
+        assert cache.get(make_key('add', 1, 2)) is None
+        assert cache.factorial_prefix(5) == (0, 1)
+        assert pool.execute('GET', 'unrelated') == b'x'
+
+    def test_server_down_is_a_miss(self, server, pool):
+        cache = RedisResultCache(pool)
+        cache.put(make_key('add', 1, 2), 3)
+        server.stop()
+        pool.close()
+        assert cache.get(make_key('add', 1, 2)) is None
+        cache.put(make_key('add', 2, 2), 4)
+        assert cache.factorial_prefix(5) == (0, 1)
+        assert cache.stats()['errors'] == 3
+
+    def test_calculator_uses_it(self, pool):
+        cache = RedisResultCache(pool)
+        Calculator(cache=cache).power(3, 40)
+        assert Calculator(cache=cache).power(3, 40) == 3 ** 40
+        assert cache.stats()['hits'] == 1
+
+
+class TestRedisHistoryLog:
+    """Test cases for RedisHistoryLog behind PersistentHistory."""
+
+    def test_survives_restart(self, pool):
+        log = RedisHistoryLog(pool)
+        calc = make_calc(log)
+        calc.add(1, 2)
+        calc.factorial(5)
+        log.close()
+
+        restarted = make_calc(RedisHistoryLog(pool))
+        assert restarted.get_history() == ['1 + 2 = 3', '5! = 120']
+
+    def test_pages_beyond_memory_window(self, pool):
+        log = RedisHistoryLog(pool)
+        calc = make_calc(log, capacity=3)
+        for i in range(10):
+            calc.add(i, 0)
+        log.flush()
+        assert calc.get_history(0, 2) == ['0 + 0 = 0', '1 + 0 = 1']
+        assert calc.get_history(8) == ['8 + 0 = 8', '9 + 0 = 9']
+
+    def test_batches_are_pipelined(self, server, pool):
+        log = RedisHistoryLog(pool, flush_interval=10)
+        calc = make_calc(log)
+        before = server.round_trips
+        for i in range(100):
+            calc.add(i, i)
+        log.flush()
+        assert log.count('s') == 100
+        # One pipeline for the whole batch, plus the LLEN above
+        assert server.round_trips - before == 2
+
+    def test_refresh_sees_other_instances(self, server, pool):
+        here_log = RedisHistoryLog(pool)
+        here = make_calc(here_log, 'shared')
+        elsewhere_log = RedisHistoryLog(ConnectionPool.from_url(server.url))
+        elsewhere = make_calc(elsewhere_log, 'shared')
+        here.add(1, 1)
+        here_log.flush()
+        elsewhere.add(2, 2)
+        elsewhere_log.flush()
+        here.history.refresh()
+        assert here.get_history() == ['1 + 1 = 2', '2 + 2 = 4']
+
+        elsewhere.clear_history()
+        elsewhere_log.flush()
+        here.history.refresh()
+        assert here.get_history() == []
+
+    def test_big_integers_round_trip(self, pool):
+        log = RedisHistoryLog(pool)
+        make_calc(log).factorial(3000)
+        log.flush()
+        assert PersistentHistory(log, 's', 5).entries()[0].result == math.factorial(3000)
+
+    def test_server_down_keeps_memory_history(self, server, pool):
+        log = RedisHistoryLog(pool)
+        calc = make_calc(log)
+        server.stop()
+        pool.close()
+        calc.add(1, 2)
+        assert log.flush(timeout=5)
+        assert calc.get_history() == ['1 + 2 = 3']
+
+
+class TestOpenBackend:
+    """Test cases for open_backend()."""
+
+    def test_memory_is_the_default(self):
+        backend = open_backend()
+        assert isinstance(backend.cache, ResultCache)
+        assert backend.history_log is None and not backend.shared
+        assert backend.stats() == {'name': 'memory', 'pool': None}
+
+    def test_sqlite(self, tmp_path):
+        # tmp_path is absolute, so this is sqlite:///tmp/.../state.db
+        backend = open_backend(f'sqlite://{tmp_path}/state.db')
+        assert isinstance(backend.cache, SharedResultCache)
+        assert isinstance(backend.history_log, HistoryLog)
+        assert backend.history_log.path == f'{tmp_path}/state.db'
+        backend.close()
+
+    def test_redis(self, server):
+        backend = open_backend(server.url, max_connections=4)
+        assert isinstance(backend.cache, RedisResultCache)
+        assert isinstance(backend.history_log, RedisHistoryLog)
+        assert backend.stats()['pool']['max_connections'] == 4
+        backend.close()
+
+    def test_unknown_scheme(self):
+        with pytest.raises(ValueError):
+            open_backend('mysql://localhost/calc')
+        with pytest.raises(ValueError):
+            open_backend('sqlite://')
+
+
+def test_app_with_redis_backend(server, monkeypatch):
+    backend = open_backend(server.url)
+    monkeypatch.setattr(webapp, 'result_cache', backend.cache)
+    monkeypatch.setattr(webapp, 'history_log', backend.history_log)
+    webapp.sessions.clear()
+    client = webapp.app.test_client()
+    headers = {webapp.SESSION_HEADER: 'scaled-out'}
+    client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 2}, headers=headers)
+    backend.history_log.flush()
+
+    # Another instance records an entry for the same session
+    other = open_backend(server.url)
+    make_calc(other.history_log, 'scaled-out').multiply(2, 3)
+    other.history_log.flush()
+
+    response = client.get('/history', headers=headers)
+    assert response.get_json()['history'] == ['1 + 2 = 3', '2 × 3 = 6']
+    webapp.sessions.clear()
+    backend.close()
+    other.close()
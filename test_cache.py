@@ -0,0 +1,125 @@
+"""
+Test file for the Calculator result caches
+
+Run tests with: python -m pytest test_cache.py
+"""
+
+import math
+import pickle
+import sqlite3
+import sys
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from cache import ResultCache, SharedResultCache, make_key
+from calculator import Calculator
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return ResultCache()
+    return SharedResultCache(str(tmp_path / 'cache.sqlite3'))
+
+
+class TestResultCache:
+    """Behaviour shared by both cache implementations."""
+
+    def test_hits_and_misses(self, cache):
+        calc = Calculator(cache=cache)
+        assert calc.power(2, 10) == 1024
+        assert calc.power(2, 10) == 1024
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+
+    def test_keys_distinguish_types(self, cache):
+        calc = Calculator(cache=cache)
+        assert type(calc.power(2, 3)) is int
+        assert type(calc.power(2.0, 3)) is float
+
+    def test_factorial_reuses_prefix(self, cache):
+        calc = Calculator(cache=cache)
+        calc.factorial(10)
+        assert cache.factorial_prefix(12) == (10, math.factorial(10))
+        assert calc.factorial(12) == math.factorial(12)
+        assert cache.factorial_prefix(11) == (10, math.factorial(10))
+        assert cache.factorial_prefix(5) == (0, 1)
+
+    def test_errors_are_not_cached(self, cache):
+        calc = Calculator(cache=cache)
+        with pytest.raises(ValueError):
+            calc.square_root(-4)
+        assert cache.stats()['entries'] == 0
+
+    def test_history_still_recorded_on_hit(self, cache):
+        calc = Calculator(cache=cache)
+        calc.factorial(5)
+        calc.factorial(5)
+        assert calc.get_history() == ["5! = 120", "5! = 120"]
+
+
+class TestEviction:
+    """Byte-bounded LRU eviction."""
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        size = sys.getsizeof(2 ** 1000)
+        cache = ResultCache(max_bytes=size * 2)
+        cache.put(make_key('power', 2, 1000), 2 ** 1000)
+        cache.put(make_key('power', 3, 1000), 2 ** 1000)
+        cache.get(make_key('power', 2, 1000))
+        cache.put(make_key('power', 5, 1000), 2 ** 1000)
+        assert cache.get(make_key('power', 3, 1000)) is None
+        assert cache.get(make_key('power', 2, 1000)) == 2 ** 1000
+        assert cache.stats()['bytes'] <= cache.max_bytes
+
+    def test_memory_cache_evicts_factorial_prefix(self):
+        cache = ResultCache(max_bytes=sys.getsizeof(math.factorial(300)))
+        calc = Calculator(cache=cache)
+        calc.factorial(300)
+        calc.factorial(200)
+        assert cache.factorial_prefix(400)[0] == 200
+
+    def test_oversized_values_are_skipped(self):
+        cache = ResultCache(max_bytes=64)
+        cache.put(make_key('factorial', 1000), math.factorial(1000))
+        assert cache.stats()['entries'] == 0
+
+    def test_shared_cache_stays_within_budget(self, tmp_path):
+        cache = SharedResultCache(str(tmp_path / 'cache.sqlite3'), max_bytes=2000)
+        for n in range(100, 110):
+            cache.put(make_key('factorial', n), math.factorial(n))
+        assert 0 < cache.stats()['bytes'] <= 2000
+        assert cache.factorial_prefix(109)[0] == 109
+
+
+def test_shared_cache_is_visible_to_other_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    Calculator(cache=SharedResultCache(path)).factorial(50)
+    other = SharedResultCache(path)
+    assert other.get(make_key('factorial', 50)) == math.factorial(50)
+
+
+def test_shared_cache_values_keep_their_type(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'cache.sqlite3'))
+    values = [2 ** 100, -7, 2.5, math.inf, Decimal('1.4142135623730950488'), Fraction(1, 3)]
+    for i, value in enumerate(values):
+        cache.put(make_key('power', i, 2), value)
+    for i, value in enumerate(values):
+        result = cache.get(make_key('power', i, 2))
+        assert result == value and type(result) is type(value)
+    cache.put(make_key('power', 'complex', 2), 1j)
+    assert cache.get(make_key('power', 'complex', 2)) is None
+
+
+def test_shared_cache_never_loads_pickles(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = SharedResultCache(path)
+    with sqlite3.connect(path) as db:
+        for key, value in [(make_key('power', 2, 10), 1024), (make_key('factorial', 5), 120)]:
+            blob = pickle.dumps(value)
+            db.execute("INSERT INTO results VALUES (?, ?, ?, ?, 0)",
+                       (repr(key), 5 if key[0] == 'factorial' else None, blob, len(blob)))
+    assert cache.get(make_key('power', 2, 10)) is None and cache.stats()['misses'] == 1
+    assert cache.factorial_prefix(6) == (0, 1)
@@ -8,51 +8,21 @@ Tests will skip if methods are not implemented, allowing CI/CD to pass
 while students work on their implementations.
 """
 
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
 import pytest
 from calculator import Calculator
+from conformance import is_implemented
 
 
 def is_method_implemented(calc, method_name):
     """
     Check if a calculator method is actually implemented.
     Returns True if method exists and returns a non-None value, False otherwise.
+    Each method is probed once per test session (see conformance.is_implemented).
     """
-    if not hasattr(calc, method_name):
-        return False
-    
-    method = getattr(calc, method_name)
-    
-    # Try calling the method with safe test values
-    try:
-        if method_name == 'add':
-            result = method(1, 1)
-        elif method_name == 'subtract':
-            result = method(2, 1)
-        elif method_name == 'multiply':
-            result = method(2, 2)
-        elif method_name == 'divide':
-            result = method(4, 2)
-        elif method_name == 'power':
-            result = method(2, 2)
-        elif method_name == 'square_root':
-            result = method(4)
-        elif method_name == 'factorial':
-            result = method(3)
-        elif method_name == 'percentage':
-            result = method(100, 10)
-        else:
-            return False
-        
-        # If method returns None, it's not implemented
-        return result is not None
-    except (AttributeError, TypeError):
-        return False
-    except ValueError:
-        # ValueError might be from validation (e.g., divide by zero) - means method exists
-        return True
-    except Exception:
-        # Any other exception means method exists but might have issues
-        return True
+    return hasattr(calc, method_name) and is_implemented(type(calc), method_name)
 
 
 class TestCalculator:
@@ -115,6 +85,15 @@ class TestCalculator:
         assert self.calc.power(5, 0) == 1
         assert self.calc.power(9, 0.5) == pytest.approx(3.0)
         assert self.calc.power(-2, 2) == 4
+        assert self.calc.power(-8, 2.0) == 64
+
+    def test_power_negative_base_fractional_exponent(self):
+        """A negative base with a fractional exponent has no real result."""
+        if not is_method_implemented(self.calc, 'power'):
+            pytest.skip("power() method not implemented yet")
+        with pytest.raises(ValueError, match="fractional power"):
+            self.calc.power(-8, 0.5)
+        assert self.calc.get_history() == []
 
     def test_square_root(self):
         """Test square root method."""
@@ -217,6 +196,65 @@ class TestCalculator:
         assert len(self.calc.get_history()) == 0
 
 
+class TestHistory:
+    """Test cases for the bounded history buffer."""
+
+    def test_capacity_drops_oldest(self):
+        calc = Calculator(history_size=3)
+        for i in range(5):
+            calc.add(i, 1)
+        assert calc.get_history() == ["2 + 1 = 3", "3 + 1 = 4", "4 + 1 = 5"]
+        assert len(calc.history) == 3
+
+    def test_pagination(self):
+        calc = Calculator(history_size=4)
+        for i in range(6):
+            calc.add(i, 0)
+        assert calc.get_history(0, 2) == ["2 + 0 = 2", "3 + 0 = 3"]
+        assert calc.get_history(3, 10) == ["5 + 0 = 5"]
+        assert calc.get_history(10, 2) == []
+
+    def test_compact_records(self):
+        calc = Calculator()
+        calc.multiply(4, 5)
+        entry = calc.history.entries()[0]
+        assert (entry.operation, entry.a, entry.b, entry.result) == ('multiply', 4, 5, 20)
+        assert entry.timestamp > 0
+        assert not hasattr(entry, '__dict__')
+
+    def test_huge_integers_are_summarised(self):
+        calc = Calculator()
+        calc.factorial(2000)
+        assert calc.get_history() == ["2000! = <5736-digit integer>"]
+
+    def test_huge_fractions_and_decimals_are_summarised(self):
+        calc = Calculator()
+        calc.divide(Fraction(1), Fraction(3 ** 3000))
+        with localcontext(prec=3000):
+            calc.multiply(Decimal('1.' + '1' * 2000), Decimal(1))
+        assert calc.get_history() == ["1 ÷ <1432-digit integer> = 1/<1432-digit integer>",
+                                      "<2001-digit decimal> × 1 = <2001-digit decimal>"]
+
+    def test_changes_since_seq(self):
+        calc = Calculator(history_size=3)
+        for i in range(4):
+            calc.add(i, 0)
+        seq, entries = calc.history.changes(2, limit=10)
+        assert seq == 4 and [str(e) for e in entries] == ["2 + 0 = 2", "3 + 0 = 3"]
+        assert calc.history.changes(4, limit=10) == (4, [])
+        # Entry 1 was overwritten, more than `limit` are new, or since is in the future
+        assert calc.history.changes(0, limit=10) == (4, None)
+        assert calc.history.changes(2, limit=1) == (4, None)
+        assert calc.history.changes(5, limit=10) == (4, None)
+        calc.clear_history()
+        assert calc.history.changes(4, limit=10) == (5, None)
+        assert calc.history.last() == (5, None)
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            Calculator(history_size=0)
+
+
 def test_calculator_creation():
     """Test that Calculator can be instantiated."""
     calc = Calculator()
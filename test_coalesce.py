@@ -0,0 +1,142 @@
+"""
+Test file for request coalescing (SingleFlight)
+
+Run tests with: python -m pytest test_coalesce.py
+"""
+
+import threading
+import time
+
+import pytest
+
+import app as webapp
+from calculator import Calculator
+from coalesce import SingleFlight
+from factorial import FactorialEngine
+from numeric import DecimalMode
+
+CALLERS = 8
+
+
+def run_concurrently(target, count=CALLERS):
+    """Call target(i) from `count` threads released together; return results in order."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+class SlowCounter:
+    """A compute function that takes a while and counts how often it ran."""
+
+    def __init__(self, result=42, delay=0.2, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class TestSingleFlight:
+    """Test cases for the SingleFlight primitive."""
+
+    def test_concurrent_callers_share_one_run(self):
+        flight = SingleFlight()
+        compute = SlowCounter()
+        results = run_concurrently(lambda i: flight.do('key', compute))
+        assert results == [42] * CALLERS
+        assert compute.calls == 1
+        assert flight.stats() == {'executions': 1, 'coalesced': CALLERS - 1, 'in_flight': 0}
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        compute = SlowCounter(error=ValueError('boom'))
+        results = run_concurrently(lambda i: flight.do('key', compute))
+        assert compute.calls == 1
+        assert all(isinstance(r, ValueError) and str(r) == 'boom' for r in results)
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+        compute = SlowCounter(delay=0.05)
+        run_concurrently(lambda i: flight.do(i % 2, compute), count=4)
+        assert compute.calls == 2
+
+    def test_finished_key_runs_again(self):
+        flight = SingleFlight()
+        compute = SlowCounter(delay=0)
+        flight.do('key', compute)
+        flight.do('key', compute)
+        assert compute.calls == 2
+        assert flight.in_flight() == 0
+
+
+class TestCalculatorCoalescing:
+    """Test cases for coalescing in front of Calculator's cached operations."""
+
+    def test_shared_across_calculators_without_cache(self, monkeypatch):
+        flight = SingleFlight()
+        engine = FactorialEngine()
+        compute = SlowCounter(result=6)
+        monkeypatch.setattr(engine, 'factorial', lambda n, k=0, prefix=1: compute(n))
+        calcs = [Calculator(factorial_engine=engine, single_flight=flight) for _ in range(CALLERS)]
+        results = run_concurrently(lambda i: calcs[i].factorial(3))
+        assert results == [6] * CALLERS
+        assert compute.calls == 1
+        # Every caller still records the calculation in its own history
+        assert all(calc.get_history() == ['3! = 6'] for calc in calcs)
+
+    def test_decimal_precision_is_part_of_the_key(self):
+        flight = SingleFlight()
+        calc = Calculator(single_flight=flight)
+        short = calc.calculate('square_root', '2', mode=DecimalMode(5))
+        long = calc.calculate('square_root', '2', mode=DecimalMode(20))
+        assert str(short) == '1.4142' and str(long) == '1.4142135623730950488'
+        assert flight.executions == 2
+
+
+class TestCalculateEndpoint:
+    """N concurrent identical /calculate requests compute the result once."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_state(self):
+        webapp.sessions.clear()
+        webapp.result_cache.clear()
+        yield
+        webapp.result_cache.clear()
+
+    def test_identical_requests_compute_once(self, monkeypatch):
+        n = 3000
+        compute = SlowCounter(result=12345)
+        monkeypatch.setattr(webapp.factorial_engine, 'factorial',
+                            lambda n, k=0, prefix=1: compute(n))
+        before = webapp.single_flight.executions
+
+        def request(i):
+            with webapp.app.test_client() as client:
+                return client.post('/calculate', json={'operation': 'factorial', 'num1': str(n)})
+
+        responses = run_concurrently(request)
+        assert [r.status_code for r in responses] == [200] * CALLERS
+        assert [r.get_json()['result'] for r in responses] == [12345] * CALLERS
+        assert compute.calls == 1
+        assert webapp.single_flight.executions - before == 1
+        # Each request got its own session
+        assert len(webapp.sessions) == CALLERS
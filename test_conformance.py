@@ -0,0 +1,83 @@
+"""
+Test file for the randomized conformance harness
+
+Run tests with: python -m pytest test_conformance.py
+Set CALC_CONFORMANCE_CHECKS to run more checks (python conformance.py runs a
+million across every core).
+"""
+
+import os
+
+import conformance
+from calculator import Calculator
+
+CHECKS = int(os.environ.get('CALC_CONFORMANCE_CHECKS', '20000'))
+
+
+class SloppyCalculator(Calculator):
+    """Forgets to reject zero divisors."""
+
+    def divide(self, a, b):
+        return a / b if b else 0.0
+
+
+class ComplexPowerCalculator(Calculator):
+    """Returns complex numbers for negative bases with fractional exponents."""
+
+    def power(self, a, b):
+        return a ** b
+
+
+class UnfinishedCalculator(Calculator):
+    def power(self, a, b):
+        pass
+
+
+def test_calculator_and_engines_agree_with_references():
+    report = conformance.run(CHECKS, workers=2, seed=1)
+    assert report.ok, report.summary()
+    assert report.checks >= CHECKS
+    assert set(report.counts) >= set(conformance.CASES) | {'engine.factorial'}
+
+
+def test_shards_are_reproducible():
+    first = conformance.run_shard(7, 2000)
+    second = conformance.run_shard(7, 2000)
+    assert first.counts == second.counts
+
+
+def test_failures_are_reported_with_their_seed():
+    report = conformance.run(3000, seed=5, shards=1, calculator_class=SloppyCalculator,
+                             vector=False)
+    assert not report.ok
+    assert all(line.startswith('divide(') and 'expected raises ValueError, got 0.0' in line
+               for line in report.failures)
+    assert all('[replay: --seed 5 --shards 1 --checks 3000]' in line for line in report.failures)
+
+
+def test_complex_powers_are_caught():
+    report = conformance.run(3000, seed=5, shards=1, calculator_class=ComplexPowerCalculator,
+                             vector=False)
+    assert not report.ok
+    assert any(line.startswith('power(-') and 'expected raises ValueError, got (' in line
+               for line in report.failures)
+
+
+def test_unimplemented_methods_are_skipped():
+    report = conformance.run_shard(3, 500, UnfinishedCalculator, vector=False)
+    assert report.ok
+    assert report.skipped == {'power'} and 'power' not in report.counts
+
+
+def test_probes_are_cached():
+    conformance.is_implemented.cache_clear()
+    for _ in range(3):
+        assert conformance.is_implemented(Calculator, 'add')
+    assert not conformance.is_implemented(Calculator, 'no_such_method')
+    info = conformance.is_implemented.cache_info()
+    assert (info.misses, info.hits) == (2, 2)
+
+
+def test_main(capsys):
+    assert conformance.main(['--checks', '500', '--workers', '1', '--no-vector']) == 0
+    assert 'all passed' in capsys.readouterr().out
@@ -0,0 +1,90 @@
+"""
+Test file for the expression evaluator
+
+Run tests with: python -m pytest test_expression.py
+"""
+
+import pytest
+
+from calculator import Calculator
+from expression import CompiledExpression, ExpressionCache, ExpressionError
+
+
+class TestExpressions:
+    """Test cases for parsing and evaluating expressions."""
+
+    def setup_method(self):
+        self.calc = Calculator()
+
+    @pytest.mark.parametrize('source, expected', [
+        ('1 + 2 * 3', 7),
+        ('(1 + 2) * 3', 9),
+        ('2^10 + sqrt(49) * 5!', 1024 + 7.0 * 120),
+        ('2 ^ 3 ^ 2', 512),
+        ('-2^2', -4),
+        ('2 * -3', -6),
+        ('10 - 4 - 3', 3),
+        ('8 / 2 / 2', 2.0),
+        ('3!!', 720),
+        ('√16 + 1', 5.0),
+        ('power(2, 8) + percentage(200, 25)', 306.0),
+        ('1.5e2 + .5', 150.5),
+        ('6 × 7 ÷ 2', 21.0),
+    ])
+    def test_evaluate(self, source, expected):
+        assert self.calc.evaluate(source) == pytest.approx(expected)
+
+    def test_variables(self):
+        compiled = CompiledExpression('rate * total / 100')
+        assert compiled.variables == {'rate', 'total'}
+        assert compiled.evaluate(self.calc, {'rate': 5, 'total': 200}) == 10.0
+        assert compiled.evaluate(self.calc, {'rate': 10, 'total': 50}) == 5.0
+
+    def test_steps_are_recorded_in_history(self):
+        self.calc.evaluate('2 + 3 * 4')
+        assert self.calc.get_history() == ['3 × 4 = 12', '2 + 12 = 14']
+
+    def test_calculator_errors_propagate(self):
+        with pytest.raises(ValueError, match="Cannot calculate square root of negative number"):
+            self.calc.evaluate('sqrt(0 - 4)')
+        with pytest.raises(ValueError):
+            self.calc.evaluate('(-1)!')
+
+    @pytest.mark.parametrize('source, message', [
+        ('1 +', 'Unexpected end of expression'),
+        ('(1 + 2', "Expected '\\)'"),
+        ('1 2', "Unexpected '2'"),
+        ('1 $ 2', "Unexpected character '\\$'"),
+        ('foo(1)', 'Unknown function: foo'),
+        ('sqrt(1, 2)', 'takes 1 argument'),
+        ('x + 1', 'Unknown variable: x'),
+    ])
+    def test_errors(self, source, message):
+        with pytest.raises(ExpressionError, match=message):
+            self.calc.evaluate(source)
+
+    def test_no_python_eval(self):
+        with pytest.raises(ExpressionError):
+            self.calc.evaluate('__import__("os")')
+
+
+class TestExpressionCache:
+    """Test cases for the compiled-expression LRU cache."""
+
+    def test_reuses_compiled_expression(self):
+        cache = ExpressionCache(maxsize=2)
+        assert cache.compile('1 + x') is cache.compile('1 + x')
+        assert cache.stats()['hits'] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = ExpressionCache(maxsize=2)
+        first = cache.compile('1')
+        cache.compile('2')
+        cache.compile('3')
+        assert cache.compile('1') is not first
+        assert cache.stats()['entries'] == 2
+
+
+def test_registered_operations_are_functions():
+    calc = Calculator()
+    assert calc.evaluate('gcd(12, 18) + modulo(10, 4)') == 8
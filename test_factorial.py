@@ -0,0 +1,61 @@
+"""
+Test file for the factorial engine
+
+Run tests with: python -m pytest test_factorial.py
+"""
+
+import math
+
+import pytest
+
+from calculator import Calculator
+from factorial import FactorialEngine, FactorialTimeoutError, product_until, range_product
+
+
+class TestFactorialEngine:
+    """Test cases for FactorialEngine."""
+
+    @pytest.mark.parametrize('n', [0, 1, 2, 5, 31, 32, 33, 100, 5000])
+    def test_matches_math_factorial(self, n):
+        assert FactorialEngine().factorial(n) == math.factorial(n)
+
+    def test_range_product(self):
+        assert range_product(1, 1) == 1
+        assert range_product(5, 8) == 5 * 6 * 7
+        assert range_product(1, 10001) == math.factorial(10000)
+
+    def test_product_until_matches(self):
+        assert product_until(1, 20001) == math.factorial(20000)
+
+    def test_continues_from_prefix(self):
+        engine = FactorialEngine()
+        assert engine.factorial(1000, 400, math.factorial(400)) == math.factorial(1000)
+
+    def test_with_budget_matches(self):
+        engine = FactorialEngine(time_budget=10)
+        assert engine.factorial(20000) == math.factorial(20000)
+
+    def test_max_n(self):
+        engine = FactorialEngine(max_n=100)
+        assert engine.factorial(100) == math.factorial(100)
+        with pytest.raises(ValueError, match="too large"):
+            engine.factorial(101)
+
+    def test_time_budget_aborts(self):
+        engine = FactorialEngine(time_budget=0.0)
+        with pytest.raises(FactorialTimeoutError):
+            engine.factorial(200000)
+
+    def test_process_pool(self):
+        engine = FactorialEngine(workers=1)
+        try:
+            assert engine.factorial(25000) == math.factorial(25000)
+        finally:
+            engine.shutdown()
+
+
+def test_calculator_rejects_before_computing():
+    calc = Calculator(factorial_engine=FactorialEngine(max_n=10))
+    with pytest.raises(ValueError, match="too large"):
+        calc.factorial(11)
+    assert calc.get_history() == []
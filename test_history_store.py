@@ -0,0 +1,137 @@
+"""
+Test file for the persistent history store
+
+Run tests with: python -m pytest test_history_store.py
+"""
+
+import math
+import sqlite3
+
+import pytest
+
+import app as webapp
+from calculator import Calculator
+from history_store import HistoryLog, PersistentHistory
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'history.sqlite3')
+
+
+def make_calc(log, session_id='s', capacity=5):
+    return Calculator(history=PersistentHistory(log, session_id, capacity))
+
+
+class TestPersistentHistory:
+    """Test cases for PersistentHistory and HistoryLog."""
+
+    def test_survives_restart(self, log_path):
+        log = HistoryLog(log_path)
+        calc = make_calc(log)
+        calc.add(1, 2)
+        calc.factorial(5)
+        log.close()
+
+        restarted = make_calc(HistoryLog(log_path))
+        assert restarted.get_history() == ['1 + 2 = 3', '5! = 120']
+
+    def test_sessions_are_separate(self, log_path):
+        log = HistoryLog(log_path)
+        make_calc(log, 'a').add(1, 1)
+        make_calc(log, 'b').add(2, 2)
+        log.flush()
+        assert make_calc(log, 'a').get_history() == ['1 + 1 = 2']
+
+    def test_pages_beyond_memory_window(self, log_path):
+        log = HistoryLog(log_path)
+        calc = make_calc(log, capacity=3)
+        for i in range(10):
+            calc.add(i, 0)
+        assert len(calc.history) == 10
+        assert calc.get_history(0, 2) == ['0 + 0 = 0', '1 + 0 = 1']
+        assert calc.get_history(6, 3) == ['6 + 0 = 6', '7 + 0 = 7', '8 + 0 = 8']
+        assert calc.get_history(8) == ['8 + 0 = 8', '9 + 0 = 9']
+
+    def test_changes_reach_beyond_memory_window(self, log_path):
+        log = HistoryLog(log_path)
+        calc = make_calc(log, capacity=3)
+        for i in range(6):
+            calc.add(i, 0)
+        seq, entries = calc.history.changes(1, limit=10)
+        assert seq == 6 and [str(e) for e in entries][:2] == ['1 + 0 = 1', '2 + 0 = 2']
+        log.close()
+        assert PersistentHistory(HistoryLog(log_path), 's', 3).seq == 6
+
+    def test_reload_reads_only_the_window(self, log_path):
+        log = HistoryLog(log_path)
+        calc = make_calc(log, capacity=100)
+        for i in range(50):
+            calc.add(i, 0)
+        reloaded = PersistentHistory(log, 's', 4)
+        assert reloaded._size == 4
+        assert len(reloaded) == 50
+
+    def test_clear_is_persisted(self, log_path):
+        log = HistoryLog(log_path)
+        calc = make_calc(log)
+        calc.add(1, 1)
+        calc.clear_history()
+        calc.add(2, 2)
+        log.close()
+        assert make_calc(HistoryLog(log_path)).get_history() == ['2 + 2 = 4']
+
+    def test_refresh_sees_other_workers(self, log_path):
+        here_log, elsewhere_log = HistoryLog(log_path), HistoryLog(log_path)
+        here, elsewhere = make_calc(here_log), make_calc(elsewhere_log)
+        here.add(1, 1)
+        here_log.flush()
+        elsewhere.add(2, 2)
+        elsewhere_log.flush()
+        here.history.refresh()
+        assert here.get_history() == ['1 + 1 = 2', '2 + 2 = 4']
+        assert here.history.seq == 2
+
+        elsewhere.clear_history()
+        elsewhere_log.flush()
+        here.history.refresh()
+        assert here.get_history() == [] and here.history.seq == 3
+
+    def test_logs_without_sequence_numbers(self, log_path):
+        log = HistoryLog(log_path)
+        make_calc(log).add(1, 1)
+        log.close()
+        db = sqlite3.connect(log_path)
+        db.execute("DROP TABLE history_seq")
+        db.commit()
+        db.close()
+        assert HistoryLog(log_path).state('s') == (1, 1)
+
+    def test_big_integers_round_trip(self, log_path):
+        log = HistoryLog(log_path)
+        make_calc(log).factorial(3000)
+        log.flush()
+        entry = PersistentHistory(log, 's', 5).entries()[0]
+        assert entry.result == math.factorial(3000)
+
+    def test_group_commit(self, log_path):
+        log = HistoryLog(log_path, flush_interval=10)
+        calc = make_calc(log)
+        for i in range(100):
+            calc.add(i, i)
+        # Nothing has reached the database yet; the batch is still open
+        assert log.count('s') == 0
+        log.flush()
+        assert log.count('s') == 100
+
+
+def test_app_uses_history_log(log_path, monkeypatch):
+    monkeypatch.setattr(webapp, 'history_log', HistoryLog(log_path))
+    webapp.sessions.clear()
+    client = webapp.app.test_client()
+    headers = {webapp.SESSION_HEADER: 'persisted'}
+    client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 2}, headers=headers)
+    # Simulate a restart: forget the in-memory session and load it back
+    webapp.sessions.clear()
+    assert client.get('/history', headers=headers).get_json()['history'] == ['1 + 2 = 3']
+    webapp.sessions.clear()
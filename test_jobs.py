@@ -0,0 +1,133 @@
+"""
+Test file for background jobs and result streaming
+
+Run tests with: python -m pytest test_jobs.py
+"""
+
+import json
+import threading
+
+import pytest
+
+import app as webapp
+from jobs import JobManager, JobRejected
+
+
+def blocking_manager(gate, **limits):
+    def run(calc, item):
+        gate.wait(5)
+        return {'success': True, 'result': item}
+    return JobManager(run, workers=2, **limits)
+
+
+class TestJobManager:
+    """Test cases for queuing and backpressure."""
+
+    def test_results_arrive_in_order(self):
+        manager = JobManager(lambda calc, item: {'success': True, 'result': item * 2})
+        job = manager.submit('s', None, [1, 2, 3])
+        results, finished = [], False
+        while not finished:
+            new, finished = job.wait(len(results), timeout=5)
+            results.extend(new)
+        assert [r['result'] for r in results] == [2, 4, 6]
+        assert job.status == 'done'
+
+    def test_per_client_limit(self):
+        gate = threading.Event()
+        manager = blocking_manager(gate, max_per_client=1)
+        manager.submit('heavy', None, [1])
+        with pytest.raises(JobRejected):
+            manager.submit('heavy', None, [2])
+        manager.submit('light', None, [3])
+        gate.set()
+        manager.shutdown()
+
+    def test_global_limit(self):
+        gate = threading.Event()
+        manager = blocking_manager(gate, max_pending=2, max_per_client=5)
+        manager.submit('a', None, [1])
+        manager.submit('b', None, [1])
+        with pytest.raises(JobRejected):
+            manager.submit('c', None, [1])
+        gate.set()
+        manager.shutdown()
+
+    def test_slots_are_released(self):
+        manager = JobManager(lambda calc, item: {'success': True, 'result': item}, max_per_client=1)
+        for i in range(3):
+            job = manager.submit('s', None, [i])
+            # Waiting past the last result returns once the job has finished
+            assert job.wait(job.total, timeout=5) == ([], True)
+
+
+class TestJobRoutes:
+    """Test cases for /jobs in the web app."""
+
+    def setup_method(self):
+        webapp.sessions.clear()
+        self.client = webapp.app.test_client()
+
+    def submit(self, body):
+        response = self.client.post('/jobs', json=body)
+        assert response.status_code == 202
+        return response.get_json()
+
+    def test_ndjson_stream(self):
+        job = self.submit([{'operation': 'add', 'num1': 1, 'num2': 2},
+                           {'operation': 'divide', 'num1': 1, 'num2': 0},
+                           {'operation': 'factorial', 'num1': 5}])
+        body = self.client.get(job['stream_url']).get_data(as_text=True)
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert [line.get('result') for line in lines[:3]] == [3, None, 120]
+        assert lines[1]['success'] is False
+        assert [line['index'] for line in lines[:3]] == [0, 1, 2]
+        assert lines[-1]['status'] == 'done' and lines[-1]['completed'] == 3
+
+    def test_sse_stream(self):
+        job = self.submit({'operation': 'multiply', 'num1': 6, 'num2': 7})
+        response = self.client.get(job['stream_url'], headers={'Accept': 'text/event-stream'})
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert 'event: result\ndata: {"success":true,"result":42,"index":0}' in body
+        assert body.rstrip().splitlines()[-2] == 'event: done'
+
+    def test_status(self):
+        job = self.submit({'operation': 'add', 'num1': 1, 'num2': 1})
+        self.client.get(job['stream_url']).get_data()
+        status = self.client.get(job['status_url']).get_json()
+        assert status['status'] == 'done'
+        assert status['results'] == [{'success': True, 'result': 2}]
+
+    def test_job_results_land_in_session_history(self):
+        job = self.submit({'operation': 'add', 'num1': 2, 'num2': 2})
+        self.client.get(job['stream_url']).get_data()
+        assert self.client.get('/history').get_json()['history'] == ['2 + 2 = 4']
+
+    def test_limit_is_per_address_not_session(self, monkeypatch):
+        gate = threading.Event()
+        monkeypatch.setattr(webapp, 'jobs', blocking_manager(gate, max_per_client=1))
+        body = {'operation': 'add', 'num1': 1, 'num2': 1}
+        first = self.client.post('/jobs', json=body, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        assert first.status_code == 202
+        # A fresh session id doesn't buy another slot
+        self.client.delete_cookie('calc_session')
+        again = self.client.post('/jobs', json=body, headers={webapp.SESSION_HEADER: 'new-session'},
+                                 environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        assert again.status_code == 429
+        other = self.client.post('/jobs', json=body, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        assert other.status_code == 202
+        gate.set()
+        webapp.jobs.shutdown()
+
+    def test_unknown_job(self):
+        assert self.client.get('/jobs/nope').status_code == 404
+        assert self.client.get('/jobs/nope/stream').status_code == 404
+
+    def test_rejected_with_retry_after(self, monkeypatch):
+        def reject(*args):
+            raise JobRejected('busy')
+        monkeypatch.setattr(webapp.jobs, 'submit', reject)
+        response = self.client.post('/jobs', json={'operation': 'add', 'num1': 1, 'num2': 1})
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
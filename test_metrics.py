@@ -0,0 +1,91 @@
+"""
+Test file for the metrics registry and the /metrics endpoint
+
+Run tests with: python -m pytest test_metrics.py
+"""
+
+import pytest
+
+import app as webapp
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test cases for counters, gauges, histograms and text rendering."""
+
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('ops_total', 'Operations', ('operation',))
+        gauge = registry.gauge('in_flight', 'In flight')
+        counter.inc(('add',))
+        counter.inc(('add',), 2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        text = registry.render()
+        assert '# TYPE ops_total counter' in text
+        assert 'ops_total{operation="add"} 3' in text
+        assert 'in_flight 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('phase',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(('compute',), value)
+        text = registry.render()
+        assert 'latency_seconds_bucket{phase="compute",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{phase="compute",le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{phase="compute",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{phase="compute"} 4.05' in text
+        assert 'latency_seconds_count{phase="compute"} 4' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter('c', 'C', ('name',)).inc(('say "hi"\n',))
+        assert 'c{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_collector(self):
+        registry = MetricsRegistry()
+        registry.collector(lambda: [('sessions', 'gauge', 'Sessions', 7)])
+        assert 'sessions 7' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Test cases for /metrics and the opt-in profiler."""
+
+    @pytest.fixture
+    def client(self):
+        webapp.sessions.clear()
+        with webapp.app.test_client() as client:
+            yield client
+
+    def test_operations_are_counted_and_timed(self, client):
+        before = webapp.operations_total.value(('add', 'ok'))
+        compute = webapp.phase_seconds.count(('add', 'compute'))
+        client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 2})
+        client.post('/calculate/batch', json=[{'operation': 'add', 'num1': 1, 'num2': 2}])
+        client.post('/calculate', json={'operation': 'divide', 'num1': 1, 'num2': 0})
+        client.post('/calculate', json={'operation': 'nope', 'num1': 1, 'num2': 0})
+        assert webapp.operations_total.value(('add', 'ok')) == before + 2
+        assert webapp.phase_seconds.count(('add', 'compute')) == compute + 2
+        assert webapp.operations_total.value(('divide', 'error')) >= 1
+        assert webapp.operations_total.value(('unknown', 'invalid')) >= 1
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        text = response.get_data(as_text=True)
+        for phase in ('parse', 'coerce', 'compute', 'history', 'serialize'):
+            assert f'calc_phase_seconds_count{{operation="add",phase="{phase}"}}' in text
+        assert 'calc_cache_hit_ratio' in text
+        assert '# TYPE calc_http_requests_in_flight gauge' in text
+        assert 'calc_http_requests_total{endpoint="/calculate",status="200"}' in text
+
+    def test_profile_requires_opt_in(self, client, monkeypatch):
+        response = client.get('/health?profile=1')
+        assert response.is_json
+
+        monkeypatch.setattr(webapp, 'PROFILING_ENABLED', True)
+        response = client.get('/health?profile=tottime')
+        assert response.mimetype == 'text/plain'
+        assert 'function calls' in response.get_data(as_text=True)
@@ -0,0 +1,130 @@
+"""
+Test file for the float / decimal / fraction numeric modes
+
+Run tests with: python -m pytest test_numeric.py
+"""
+
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+import app as webapp
+from cache import ResultCache
+from calculator import Calculator
+from history_store import decode_value, encode_value
+from numeric import FLOAT, FRACTION, get_mode, int_to_str
+from operations import InputError
+from ratelimit import RateLimiter
+
+
+class TestModes:
+    """Test cases for Calculator.calculate() under each mode."""
+
+    def test_float_is_default(self):
+        assert get_mode() is FLOAT
+        assert Calculator().calculate('add', '0.1', '0.2') == 0.1 + 0.2
+
+    def test_decimal_is_exact_for_decimal_inputs(self):
+        result = Calculator().calculate('add', '0.1', '0.2', mode=get_mode('decimal'))
+        assert result == Decimal('0.3')
+
+    def test_decimal_precision(self):
+        calc = Calculator()
+        assert str(calc.calculate('divide', 1, 3, mode=get_mode('decimal', 5))) == '0.33333'
+        assert len(str(calc.calculate('square_root', 2, mode=get_mode('decimal', 50)))) == 51
+
+    def test_precision_is_part_of_cache_key(self):
+        calc = Calculator(cache=ResultCache())
+        short = calc.calculate('square_root', 2, mode=get_mode('decimal', 5))
+        long = calc.calculate('square_root', 2, mode=get_mode('decimal', 40))
+        assert short == Decimal('1.4142')
+        assert long != short
+
+    def test_fraction_is_exact(self):
+        calc = Calculator()
+        third = calc.calculate('divide', 1, 3, mode=FRACTION)
+        assert third == Fraction(1, 3)
+        assert calc.calculate('multiply', '1/3', 3, mode=FRACTION) == 1
+        assert calc.calculate('square_root', '9/4', mode=FRACTION) == Fraction(3, 2)
+        assert calc.calculate('factorial', '5', mode=FRACTION) == 120
+
+    def test_errors(self):
+        calc = Calculator()
+        with pytest.raises(ValueError, match='Cannot divide by zero'):
+            calc.calculate('divide', 1, 0, mode=FRACTION)
+        with pytest.raises(InputError, match='Invalid first number: abc'):
+            calc.calculate('add', 'abc', 1, mode=get_mode('decimal'))
+        with pytest.raises(InputError, match='Factorial requires an integer'):
+            calc.calculate('factorial', '7/2', mode=FRACTION)
+        with pytest.raises(InputError, match='Unknown mode'):
+            get_mode('complex')
+        for mode in (get_mode('decimal'), FRACTION):
+            assert mode.parse('1e10000', 'first') == 10 ** 10000
+            for huge in ('1e10001', '1E-99999999999999999999', '7' * 10001):
+                with pytest.raises(InputError, match='First number is too large'):
+                    mode.parse(huge, 'first')
+        with pytest.raises(InputError, match='Precision must be between'):
+            get_mode('decimal', 0)
+
+    def test_int_to_str(self):
+        for value in (0, -7, 2 ** 2048, -(2 ** 2049), 3 ** 20000 - 1, -(7 ** 12345)):
+            text = int_to_str(value)
+            # Decimal(str) is linear, and has no int-to-str digit limit
+            assert Decimal(text) == value and not text.startswith(('0', '-0')) or value == 0
+
+    def test_history_store_round_trip(self):
+        for value in (Decimal('0.30'), Fraction(1, 3), 2 ** 100, 1.5, None,
+                      Fraction(3 ** 20000, 2 ** 5001)):
+            assert decode_value(encode_value(value)) == value
+        # Rows written before fractions were stored in hex
+        assert decode_value('f1/3') == Fraction(1, 3)
+
+
+class TestModesApi:
+    """Test cases for the mode field in /calculate and /calculate/batch."""
+
+    @pytest.fixture
+    def client(self):
+        webapp.sessions.clear()
+        with webapp.app.test_client() as client:
+            yield client
+
+    def test_calculate_decimal(self, client):
+        data = client.post('/calculate', json={
+            'operation': 'add', 'num1': '0.1', 'num2': '0.2', 'mode': 'decimal'}).get_json()
+        assert data['success'] and data['result'] == '0.3' and data['mode'] == 'decimal'
+
+    def test_batch_fraction(self, client):
+        data = client.post('/calculate/batch', json=[
+            {'operation': 'divide', 'num1': 1, 'num2': 3, 'mode': 'fraction'},
+            {'operation': 'add', 'num1': 1, 'num2': 2, 'mode': 'bogus'},
+        ]).get_json()
+        assert data['results'][0] == {'success': True, 'result': '1/3'}
+        assert 'Unknown mode' in data['results'][1]['error']
+
+    @pytest.mark.parametrize('mode', ['float', 'decimal', 'fraction'])
+    @pytest.mark.parametrize('operation', ['add', 'factorial'])
+    def test_huge_operands_are_rejected_before_parsing(self, client, monkeypatch, mode, operation):
+        # The rate limiter parses operands too, to estimate the cost
+        monkeypatch.setattr(webapp, 'rate_limiter', RateLimiter(rate=1000, burst=1000))
+        start = time.perf_counter()
+        data = client.post('/calculate', json={'operation': operation, 'num1': '1e1000000',
+                                               'num2': 1, 'mode': mode}).get_json()
+        assert data['success'] is False
+        assert 'too large' in data['error'] or 'Invalid' in data['error']
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.parametrize('body', [
+        {'operation': 'power', 'num1': 3, 'num2': 20000, 'mode': 'fraction'},
+        {'operation': 'divide', 'num1': 1, 'num2': str(3 ** 9000), 'mode': 'fraction'},
+        {'operation': 'power', 'num1': 7, 'num2': 6000, 'mode': 'decimal', 'precision': 6000},
+    ])
+    def test_huge_exact_results_keep_history_readable(self, client, body):
+        data = client.post('/calculate', json=body).get_json()
+        assert data['success'] is True
+        assert '-digit' in data['entry']
+        response = client.get('/history')
+        assert response.status_code == 200
+        assert response.get_json()['history'] == [data['entry']]
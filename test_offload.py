@@ -0,0 +1,100 @@
+"""
+Test file for offloading costly operations to a process pool
+
+Run tests with: python -m pytest test_offload.py
+"""
+
+import time
+from fractions import Fraction
+
+import pytest
+
+import app as webapp
+from calculator import Calculator
+from numeric import get_mode
+from offload import Offloader, OffloadTimeoutError
+from operations import registry
+
+
+class TestCostEstimates:
+    """Test cases for the per-operation result size estimates."""
+
+    def test_power_cost(self):
+        cost = registry.get('power').cost
+        assert cost(3, 1000) == 2 * 1000
+        assert cost(Fraction(3, 2), 10) == (2 + 2) * 10
+        assert cost(1, 10 ** 9) == 0 and cost(2.5, 10 ** 9) == 0 and cost(2, 0.5) == 0
+
+    def test_fraction_mode_integers_count_as_ints(self):
+        cost = registry.get('power').cost
+        assert cost(Fraction(3), Fraction(1000)) == cost(3, 1000)
+        assert cost(Fraction(3), Fraction(-1000)) == cost(3, 1000)  # 1 / 3 ** 1000
+        assert cost(Fraction(1), Fraction(10 ** 9)) == 0 and cost(Fraction(4), Fraction(1, 2)) == 0
+
+    def test_exact_products_and_quotients(self):
+        big = 2 ** 1000
+        assert registry.get('multiply').cost(big, big) == 2002
+        assert registry.get('multiply').cost(float(big), big) == 0
+        assert registry.get('divide').cost(big, big) == 0  # a float
+        assert registry.get('divide').cost(Fraction(big), Fraction(big, 3)) == 2004
+        assert registry.get('percentage').cost(Fraction(big), 7) == 1004
+
+    def test_factorial_cost_bounds_result(self):
+        import math
+        cost = registry.get('factorial').cost
+        for n in (10, 1000, 50000):
+            assert cost(n) >= math.factorial(n).bit_length()
+
+
+class TestOffloader:
+    """Test cases for inline calls, size limits, pooled calls and timeouts."""
+
+    def test_cheap_calls_stay_inline(self):
+        offloader = Offloader(workers=1, min_bits=1000)
+        calc = Calculator(offloader=offloader)
+        assert calc.power(2, 10) == 1024
+        assert calc.factorial(10) == 3628800
+        assert offloader.offloaded == 0 and offloader._pool is None
+
+    def test_result_size_limit(self):
+        calc = Calculator(offloader=Offloader(max_result_bits=10000))
+        with pytest.raises(ValueError, match='Result too large'):
+            calc.power(3, 10 ** 6)
+        assert calc.get_history() == []
+        data = webapp.app.test_client().post(
+            '/calculate', json={'operation': 'power', 'num1': 7, 'num2': 10 ** 8}).get_json()
+        assert data['success'] is False and 'Result too large' in data['error']
+
+    def test_chained_products_are_limited(self):
+        calc = Calculator(offloader=Offloader(max_result_bits=10000))
+        big = 3 ** 4000
+        assert calc.multiply(big, 3) == 3 * big
+        with pytest.raises(ValueError, match='Result too large'):
+            calc.multiply(big, big)
+        with pytest.raises(ValueError, match='Result too large'):
+            calc.evaluate('(3^4000) * (3^4000)')
+        with pytest.raises(ValueError, match='Result too large'):
+            calc.calculate('divide', '1/3', 3 ** 7000, mode=get_mode('fraction'))
+
+    def test_costly_calls_use_the_pool(self):
+        offloader = Offloader(workers=1, min_bits=1000)
+        calc = Calculator(offloader=offloader)
+        try:
+            assert calc.power(3, 5000) == 3 ** 5000
+            assert calc.factorial(2000) == calc.factorial_engine.factorial(2000)
+            assert offloader.offloaded == 2
+            assert calc.get_history(0, 1) == ['3 ^ 5000 = <2386-digit integer>']
+        finally:
+            offloader.shutdown()
+
+    def test_timeout_stops_the_call_and_pool_recovers(self):
+        offloader = Offloader(workers=1, min_bits=0, timeout=0.2)
+        try:
+            start = time.monotonic()
+            with pytest.raises(OffloadTimeoutError, match='time limit'):
+                offloader.call(1, time.sleep, 30)
+            assert time.monotonic() - start < 5
+            assert offloader.timeouts == 1
+            assert offloader.call(1, pow, 2, 10) == 1024
+        finally:
+            offloader.shutdown()
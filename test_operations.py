@@ -0,0 +1,87 @@
+"""
+Test file for the operation registry
+
+Run tests with: python -m pytest test_operations.py
+"""
+
+import pytest
+
+from calculator import Calculator
+from operations import InputError, OperationRegistry, registry
+
+
+class TestRegistry:
+    """Test cases for registry lookup and operand coercion."""
+
+    def test_builtin_operations(self):
+        names = [operation.name for operation in registry]
+        assert names[:8] == ['add', 'subtract', 'multiply', 'divide',
+                             'power', 'square_root', 'factorial', 'percentage']
+        assert {'modulo', 'log', 'nth_root', 'gcd'} <= set(names)
+
+    def test_unknown_operation(self):
+        with pytest.raises(InputError, match='Unknown operation: nope'):
+            registry.get('nope')
+
+    def test_coercion(self):
+        assert registry.get('add').coerce(('2', '2.5')) == [2, 2.5]
+        assert registry.get('factorial').coerce(('5.0',)) == [5]
+        with pytest.raises(InputError, match='Invalid second number: x'):
+            registry.get('add').coerce((1, 'x'))
+        with pytest.raises(InputError, match='Missing second number'):
+            registry.get('add').coerce((1,))
+        with pytest.raises(InputError, match='Factorial requires an integer'):
+            registry.get('factorial').coerce((3.5,))
+
+    def test_register_requires_one_implementation(self):
+        with pytest.raises(ValueError):
+            OperationRegistry().register('x')
+        with pytest.raises(ValueError):
+            OperationRegistry().register('x', method='add', func=abs)
+
+    def test_describe(self):
+        description = registry.get('power').describe()
+        assert description['arity'] == 2
+        assert description['inputs'][0]['label'] == 'Base'
+
+
+class TestCalculate:
+    """Test cases for Calculator.calculate dispatch."""
+
+    def setup_method(self):
+        self.calc = Calculator()
+
+    def test_methods_and_functions(self):
+        assert self.calc.calculate('add', '2', '3') == 5
+        assert self.calc.calculate('square_root', 16) == 4.0
+        assert self.calc.calculate('modulo', 10, 3) == 1
+        assert self.calc.calculate('log', 8, 2) == pytest.approx(3.0)
+        assert self.calc.calculate('nth_root', 27, 3) == pytest.approx(3.0)
+        assert self.calc.calculate('nth_root', -8, 3) == pytest.approx(-2.0)
+        assert self.calc.calculate('gcd', 12, 18) == 6
+
+    def test_function_operations_are_recorded(self):
+        self.calc.calculate('gcd', 12, 18)
+        self.calc.calculate('modulo', 7, 4)
+        assert self.calc.get_history() == ['gcd(12, 18) = 6', '7 mod 4 = 3']
+
+    @pytest.mark.parametrize('name, operands, message', [
+        ('modulo', (1, 0), 'Cannot divide by zero'),
+        ('log', (-1, 10), 'positive number'),
+        ('log', (10, 1), 'base'),
+        ('nth_root', (-4, 2), 'even root'),
+        ('nth_root', (4, 0), 'cannot be zero'),
+        ('gcd', (1.5, 2), 'requires an integer'),
+    ])
+    def test_validation(self, name, operands, message):
+        with pytest.raises(ValueError, match=message):
+            self.calc.calculate(name, *operands)
+
+    def test_registration_alone_adds_an_operation(self):
+        custom = OperationRegistry()
+        custom.register('double', func=lambda a: a * 2, inputs=(('Number', ''),),
+                        template="2 × {a} = {result}")
+        calc = Calculator()
+        calc.registry = custom
+        assert calc.calculate('double', '21') == 42
+        assert calc.get_history() == ['2 × 21 = 42']
@@ -0,0 +1,166 @@
+"""
+Test file for rate limiting and admission control
+
+Run tests with: python -m pytest test_ratelimit.py
+"""
+
+import pytest
+
+import app as webapp
+from ratelimit import (ITEM_TOKENS, REQUEST_TOKENS, ConcurrencyLimiter, RateLimiter,
+                       operation_tokens)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestOperationTokens:
+    """Test cases for the cost estimate taken from the operands."""
+
+    def test_cheap_operations_cost_one_item(self):
+        assert operation_tokens('add', ('1', '2')) == ITEM_TOKENS
+        assert operation_tokens('power', ('2.5', '3')) == ITEM_TOKENS
+
+    def test_cost_grows_with_result_size(self):
+        small = operation_tokens('factorial', ('1000', None))
+        large = operation_tokens('factorial', ('20000', None))
+        assert ITEM_TOKENS < small < 1 < 100 < large < 1000
+        assert operation_tokens('power', ('3', '1000000')) > large
+
+    def test_invalid_input_is_cheap(self):
+        assert operation_tokens('factorial', ('-5', None)) == ITEM_TOKENS
+        assert operation_tokens('factorial', ('x', None)) == ITEM_TOKENS
+        assert operation_tokens('no_such_operation', ('1', '2')) == ITEM_TOKENS
+        assert operation_tokens('power', ('3', '1000000'), 'bogus') == ITEM_TOKENS
+
+    def test_fraction_mode_costs_like_exact_ints(self):
+        assert operation_tokens('power', ('3', '2000000'), 'fraction') == pytest.approx(
+            operation_tokens('power', ('3', '2000000')))
+        assert operation_tokens('multiply', ('1/3', '2/3'), 'fraction') < 2 * ITEM_TOKENS
+
+    def test_decimal_powers_are_bounded_by_precision(self):
+        assert operation_tokens('power', ('3', '1000000'), 'decimal') == ITEM_TOKENS
+
+
+class TestRateLimiter:
+    """Test cases for the per-client token buckets."""
+
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=4, clock=clock)
+        assert [limiter.acquire('a') for _ in range(4)] == [0, 0, 0, 0]
+        assert limiter.acquire('a') == pytest.approx(0.5)
+        clock.now += 0.5
+        assert limiter.acquire('a') == 0
+        assert limiter.stats()['admitted'] == 5 and limiter.stats()['rejected'] == 1
+
+    def test_clients_have_separate_buckets(self):
+        limiter = RateLimiter(rate=1, burst=1, clock=FakeClock())
+        assert limiter.acquire('a') == 0
+        assert limiter.acquire('a') > 0
+        assert limiter.acquire('b') == 0
+
+    def test_expensive_request_needs_full_bucket(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=10, burst=20, clock=clock)
+        assert limiter.acquire('a', 500) == 0
+        assert limiter.tokens('a') == 0
+        assert limiter.acquire('a', 500) == pytest.approx(2.0)
+        clock.now += 2
+        assert limiter.acquire('a', 500) == 0
+
+    def test_least_recently_seen_client_is_dropped(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2, clock=FakeClock())
+        for key in ('a', 'b', 'c'):
+            limiter.acquire(key)
+        assert len(limiter) == 2
+        assert limiter.tokens('a') == 1  # forgotten, so full again
+
+
+class TestConcurrencyLimiter:
+    def test_rejects_past_limit_without_blocking(self):
+        limiter = ConcurrencyLimiter(2)
+        assert limiter.try_acquire() and limiter.try_acquire()
+        assert not limiter.try_acquire()
+        limiter.release()
+        assert limiter.try_acquire()
+        assert limiter.stats() == {'limit': 2, 'active': 2, 'rejected': 1}
+
+
+class TestAdmission:
+    """Test cases for 429 responses from the web app."""
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        clock = FakeClock()
+        monkeypatch.setattr(webapp, 'rate_limiter', RateLimiter(rate=10, burst=20, clock=clock))
+        webapp.sessions.clear()
+        return clock
+
+    def post(self, path, body, address='10.0.0.1'):
+        client = webapp.app.test_client()
+        return client.post(path, json=body, environ_base={'REMOTE_ADDR': address})
+
+    def test_heavy_client_is_throttled_cheap_client_is_not(self, clock):
+        heavy = {'operation': 'factorial', 'num1': '5000'}  # ~17 of the 20-token burst
+        assert self.post('/calculate', heavy).status_code == 200
+        response = self.post('/calculate', heavy)
+        assert response.status_code == 429
+        assert response.get_json()['success'] is False
+        assert int(response.headers['Retry-After']) >= 1
+        cheap = {'operation': 'add', 'num1': '1', 'num2': '2'}
+        assert self.post('/calculate', cheap, address='10.0.0.2').status_code == 200
+        clock.now += int(response.headers['Retry-After'])
+        assert self.post('/calculate', heavy).status_code == 200
+
+    def test_cheap_requests_within_rate_pass(self, clock):
+        body = {'operation': 'add', 'num1': '1', 'num2': '2'}
+        for _ in range(40):
+            assert self.post('/calculate', body).status_code == 200
+            clock.now += 1 / 10
+
+    def test_batch_is_charged_per_item(self, clock):
+        batch = [{'operation': 'add', 'num1': i, 'num2': i} for i in range(1000)]
+        expected = REQUEST_TOKENS + 1000 * ITEM_TOKENS
+        assert self.post('/calculate/batch', batch).status_code == 200
+        assert webapp.rate_limiter.tokens('10.0.0.1') == pytest.approx(20 - expected)
+
+    def test_table_is_charged_per_cell(self, clock):
+        table = {'name': 'grid', 'operation': 'percentage', 'rows': list(range(50)),
+                 'columns': list(range(20))}
+        expected = REQUEST_TOKENS + 1000 * ITEM_TOKENS
+        assert self.post('/tables', table).status_code == 201
+        assert webapp.rate_limiter.tokens('10.0.0.1') == pytest.approx(20 - expected)
+        webapp.table_store.remove('grid')
+
+    def test_unusable_tables_are_turned_away(self, clock):
+        table = {'name': 'grid', 'operation': ['percentage'], 'rows': [1], 'columns': [2]}
+        assert self.post('/tables', table).status_code == 400
+        # Costs more than a full bucket, which is all the limiter would charge
+        table = {'name': 'grid', 'operation': 'factorial', 'rows': ['5000'] * 2}
+        response = self.post('/tables', table, address='10.0.0.2')
+        assert response.status_code == 400
+        assert 'Table too costly' in response.get_json()['error']
+        assert 'grid' not in webapp.table_store
+
+    def test_read_only_endpoints_are_not_limited(self, clock):
+        webapp.rate_limiter.acquire('10.0.0.1', 20)
+        client = webapp.app.test_client()
+        assert client.get('/history', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 200
+
+    def test_concurrency_cap_sheds_load(self, monkeypatch):
+        limiter = ConcurrencyLimiter(1)
+        monkeypatch.setattr(webapp, 'concurrency_limiter', limiter)
+        body = {'operation': 'add', 'num1': '1', 'num2': '2'}
+        assert self.post('/calculate', body).status_code == 200
+        assert limiter.active == 0  # released when the request finished
+        limiter.try_acquire()  # a request already in progress
+        response = self.post('/calculate', body)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+        assert webapp.rejected_total.value(('concurrency',)) >= 1
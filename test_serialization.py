@@ -0,0 +1,95 @@
+"""
+Test file for JSON encoding, big-integer results and response compression
+
+Run tests with: python -m pytest test_serialization.py
+"""
+
+import gzip
+import json
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+import app as webapp
+from numeric import MAX_SAFE_INTEGER, to_json
+from serialization import get_encoder
+
+
+@pytest.fixture
+def client():
+    webapp.sessions.clear()
+    with webapp.app.test_client() as client:
+        yield client
+
+
+class TestEncoders:
+    """Test cases for the orjson and stdlib encoders."""
+
+    @pytest.mark.parametrize('name', ['orjson', 'stdlib'])
+    def test_encoders_agree(self, name):
+        if name == 'orjson':
+            pytest.importorskip('orjson')
+        dumps = get_encoder(name)
+        value = {'result': 1.5, 'text': 'gcd(12, 18) = 6 √ ×', 'items': [1, None, True],
+                 'exact': Fraction(1, 3), 'decimal': Decimal('0.30')}
+        encoded = dumps(value)
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == dict(value, exact='1/3', decimal='0.30')
+
+    def test_unknown_encoder(self):
+        with pytest.raises(ValueError, match='Unknown JSON encoder'):
+            get_encoder('yaml')
+
+    def test_huge_integers_fall_back_to_stdlib(self):
+        assert get_encoder()({'n': 2 ** 70}) == b'{"n":1180591620717411303424}'
+
+
+class TestBigIntegers:
+    """Test cases for sending integers beyond 2**53 as strings."""
+
+    def test_to_json(self):
+        assert to_json(MAX_SAFE_INTEGER) == MAX_SAFE_INTEGER
+        assert to_json(-MAX_SAFE_INTEGER - 1) == str(-MAX_SAFE_INTEGER - 1)
+        assert to_json(True) is True and to_json(2.5) == 2.5
+
+    def test_large_factorial_result(self, client):
+        data = client.post('/calculate', json={'operation': 'factorial', 'num1': 25}).get_json()
+        assert data['result'] == '15511210043330985984000000'
+
+    def test_factorial_beyond_int_str_limit(self, client):
+        # 2000! has 5736 digits, more than str(int) allows by default
+        data = client.post('/calculate', json={'operation': 'factorial', 'num1': 2000}).get_json()
+        assert data['success'] and data['result'] == str(Decimal(math.factorial(2000)))
+
+
+class TestCompression:
+    """Test cases for negotiated response compression."""
+
+    def fill_history(self, client, count=100):
+        client.post('/calculate/batch', json=[
+            {'operation': 'multiply', 'num1': i, 'num2': 1.5} for i in range(count)])
+
+    def test_large_responses_are_gzipped(self, client):
+        self.fill_history(client)
+        response = client.get('/history?limit=100', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(gzip.decompress(response.get_data()))['history']) == 100
+
+    def test_small_or_unaccepted_responses_are_plain(self, client):
+        response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        self.fill_history(client)
+        response = client.get('/history?limit=100', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.get_json()['history']) == 100
+
+    def test_etag_matches_compressed_response(self, client):
+        self.fill_history(client)
+        headers = {'Accept-Encoding': 'gzip'}
+        etag = client.get('/history?limit=100', headers=headers).headers['ETag']
+        assert etag.startswith('W/')
+        response = client.get('/history?limit=100', headers=dict(headers, **{'If-None-Match': etag}))
+        assert response.status_code == 304
@@ -0,0 +1,136 @@
+"""
+Test file for per-session calculators
+
+Run tests with: python -m pytest test_sessions.py
+"""
+
+import threading
+
+import pytest
+
+import app as webapp
+from calculator import Calculator
+from sessions import SessionStore, is_valid_session_id
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStore:
+    """Test cases for the bounded session store."""
+
+    def test_same_id_same_calculator(self):
+        store = SessionStore(lambda session_id: object())
+        assert store.get('a') is store.get('a')
+        assert store.get('a') is not store.get('b')
+
+    def test_evicts_least_recently_used(self):
+        store = SessionStore(lambda session_id: object(), max_sessions=2)
+        store.get('a')
+        store.get('b')
+        store.get('a')
+        store.get('c')
+        assert 'a' in store and 'c' in store
+        assert 'b' not in store
+
+    def test_evicts_idle_sessions(self):
+        clock = FakeClock()
+        store = SessionStore(lambda session_id: object(), idle_timeout=10, clock=clock)
+        store.get('a')
+        clock.now = 5
+        store.get('b')
+        clock.now = 12
+        store.get('c')
+        assert 'a' not in store
+        assert 'b' in store and 'c' in store
+
+    def test_session_id_validation(self):
+        assert is_valid_session_id('abc-123_XYZ')
+        assert not is_valid_session_id(None)
+        assert not is_valid_session_id('x' * 65)
+        assert not is_valid_session_id('bad id;')
+
+
+class TestSessionsInApp:
+    """Each session gets its own history."""
+
+    def setup_method(self):
+        webapp.sessions.clear()
+        webapp.app.config['TESTING'] = True
+
+    def test_cookie_issued_and_reused(self):
+        client = webapp.app.test_client()
+        response = client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 1})
+        assert webapp.SESSION_COOKIE in response.headers.get('Set-Cookie', '')
+        client.post('/calculate', json={'operation': 'add', 'num1': 2, 'num2': 2})
+        assert client.get('/history').get_json()['history'] == ['1 + 1 = 2', '2 + 2 = 4']
+
+    def test_clear_only_affects_own_session(self):
+        alice = {webapp.SESSION_HEADER: 'alice'}
+        bob = {webapp.SESSION_HEADER: 'bob'}
+        client = webapp.app.test_client()
+        client.post('/calculate', json={'operation': 'add', 'num1': 1, 'num2': 1}, headers=alice)
+        client.post('/calculate', json={'operation': 'add', 'num1': 2, 'num2': 2}, headers=bob)
+        client.post('/clear', headers=bob)
+        assert client.get('/history', headers=alice).get_json()['history'] == ['1 + 1 = 2']
+        assert client.get('/history', headers=bob).get_json()['history'] == []
+
+
+@pytest.mark.parametrize('threads, per_thread', [(16, 100)])
+def test_concurrent_calculate_and_clear(threads, per_thread):
+    """Hammer /calculate and /clear from many threads; no entries lost or mixed up."""
+    webapp.sessions.clear()
+    webapp.app.config['TESTING'] = True
+    errors = []
+    barrier = threading.Barrier(threads * 2)
+
+    def calculator_thread(index):
+        client = webapp.app.test_client()
+        headers = {webapp.SESSION_HEADER: f'calc-{index}'}
+        barrier.wait()
+        for i in range(per_thread):
+            data = client.post('/calculate', headers=headers,
+                               json={'operation': 'add', 'num1': index, 'num2': i}).get_json()
+            if data.get('result') != index + i:
+                errors.append(data)
+
+    def clearing_thread(index):
+        client = webapp.app.test_client()
+        headers = {webapp.SESSION_HEADER: f'clear-{index}'}
+        barrier.wait()
+        for i in range(per_thread):
+            client.post('/calculate', headers=headers, json={'operation': 'add', 'num1': 0, 'num2': 0})
+            client.post('/clear', headers=headers)
+
+    workers = [threading.Thread(target=calculator_thread, args=(i,)) for i in range(threads)]
+    workers += [threading.Thread(target=clearing_thread, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    client = webapp.app.test_client()
+    for index in range(threads):
+        headers = {webapp.SESSION_HEADER: f'calc-{index}'}
+        data = client.get(f'/history?limit={per_thread}', headers=headers).get_json()
+        assert data['total'] == per_thread
+        assert data['history'] == [f'{index} + {i} = {index + i}' for i in range(per_thread)]
+
+
+def test_concurrent_writes_to_one_session():
+    """Threads sharing one session must not lose history entries."""
+    threads, per_thread = 8, 500
+    calc = Calculator(history_size=threads * per_thread)
+    workers = [threading.Thread(target=lambda: [calc.add(1, 1) for _ in range(per_thread)])
+               for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(calc.history) == threads * per_thread
@@ -0,0 +1,149 @@
+"""
+Test file for startup time: import budgets and lazily loaded modules
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+which reports the cumulative time spent importing it and everything it pulls
+in. Budgets are generous on purpose (a slow CI runner shouldn't fail them);
+what they catch is a heavy dependency creeping onto an import path. Set
+CALC_STARTUP_BUDGET_SCALE=2 to loosen them on a very slow machine.
+
+Run tests with: python -m pytest test_startup.py
+"""
+
+import os
+import runpy
+import stat
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RUNS = 3
+BUDGET_SCALE = float(os.environ.get('CALC_STARTUP_BUDGET_SCALE', 1))
+
+# Cumulative import time allowed per module, in milliseconds
+IMPORT_BUDGETS_MS = {
+    'calculator': 80,
+    'main': 80,
+    'streaming': 120,
+    'app': 800,
+}
+
+# Modules each import path must leave alone until they're actually used
+HEAVY = ('numpy', 'flask', 'multiprocessing', 'concurrent.futures.process', 'sqlite3', 'pickle')
+NOT_IMPORTED = {
+    'calculator': HEAVY + ('concurrent.futures',),
+    'main': HEAVY + ('argparse', 'concurrent.futures'),
+    'streaming': HEAVY,
+    'app': ('numpy', 'multiprocessing', 'concurrent.futures.process'),
+}
+
+
+def import_profile(module):
+    """Import module in a new interpreter; return (its cumulative µs, modules imported)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, name = line[len('import time:'):].split('|')
+        imported.add(name.strip())
+        if name == ' ' + module:  # top level, not a nested import of the same name
+            cumulative = int(total)
+    return cumulative, imported
+
+
+@pytest.mark.parametrize('module', sorted(IMPORT_BUDGETS_MS))
+def test_import_time_within_budget(module):
+    best = min(import_profile(module)[0] for _ in range(RUNS)) / 1000
+    budget = IMPORT_BUDGETS_MS[module] * BUDGET_SCALE
+    assert best <= budget, f"import {module} took {best:.1f} ms (budget {budget:g} ms)"
+
+
+@pytest.mark.parametrize('module', sorted(NOT_IMPORTED))
+def test_heavy_modules_are_lazy(module):
+    _, imported = import_profile(module)
+    assert imported.isdisjoint(NOT_IMPORTED[module]), sorted(imported & set(NOT_IMPORTED[module]))
+
+
+def test_lazy_modules_load_on_first_use():
+    # The pieces that moved behind lazy imports still work once reached
+    code = (
+        "import sys, tempfile, os\n"
+        "from cache import SharedResultCache\n"
+        "from offload import Offloader\n"
+        "cache = SharedResultCache(os.path.join(tempfile.mkdtemp(), 'c.sqlite3'))\n"
+        "cache.put(('power', ('int', 2)), 2 ** 100)\n"
+        "assert cache.get(('power', ('int', 2))) == 2 ** 100\n"
+        "offloader = Offloader(workers=1, min_bits=0)\n"
+        "assert offloader.call(10, pow, 2, 10) == 1024\n"
+        "offloader.shutdown()\n"
+        "assert 'sqlite3' in sys.modules and 'concurrent.futures.process' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True)
+
+
+class TestWarmUp:
+    """Test cases for app.warm_up(), run by gunicorn before a worker serves."""
+
+    def test_every_warmup_request_succeeds(self):
+        import app as webapp
+        client = webapp.app.test_client()
+        headers = {webapp.SESSION_HEADER: webapp.new_session_id()}
+        for method, path, body in webapp.WARMUP_REQUESTS:
+            response = client.open(path, method=method, json=body, headers=headers)
+            assert response.status_code == 200, path
+        webapp.sessions.discard(headers[webapp.SESSION_HEADER])
+
+    def test_leaves_no_session_or_metrics_behind(self):
+        import app as webapp
+        webapp.sessions.clear()
+        assert webapp.warm_up() > 0
+        assert len(webapp.sessions) == 0
+        assert webapp.http_requests_total.value(('/calculate', '200')) == 0
+        assert webapp.operations_total.value(('add', 'ok')) == 0
+
+
+class TestGunicornConfig:
+    """Test cases for the settings gunicorn.conf.py derives from the environment."""
+
+    def load(self, monkeypatch, **env):
+        for name in ('CALC_CACHE_PATH', 'CALC_STATE_BACKEND', 'CALC_RATE_LIMIT',
+                     'CALC_RATE_BURST', 'CALC_MAX_CONCURRENT'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(os.path.join(HERE, 'gunicorn.conf.py'))
+
+    def test_shared_cache_lives_in_a_private_directory(self, monkeypatch):
+        config = self.load(monkeypatch, WEB_CONCURRENCY='2')
+        cache_dir = os.path.dirname(os.environ['CALC_CACHE_PATH'])
+        assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+        assert config['workers'] == 2
+        config['on_exit'](None)
+        assert not os.path.exists(cache_dir)
+
+    def test_configured_cache_path_is_kept(self, monkeypatch, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        config = self.load(monkeypatch, WEB_CONCURRENCY='2', CALC_CACHE_PATH=path)
+        assert os.environ['CALC_CACHE_PATH'] == path
+        config['on_exit'](None)
+        assert tmp_path.exists()
+
+    def test_single_worker_needs_no_shared_cache(self, monkeypatch):
+        self.load(monkeypatch, WEB_CONCURRENCY='1')
+        assert 'CALC_CACHE_PATH' not in os.environ
+
+    def test_tables_are_refused_with_several_workers(self, monkeypatch):
+        import app as webapp
+        from tables import TableStore
+        config = self.load(monkeypatch, CALC_PREWARM='0')
+        for workers, refused in ((1, False), (4, True)):
+            monkeypatch.setattr(webapp, 'table_store', TableStore())
+            worker = type('Worker', (), {'cfg': type('Config', (), {'workers': workers})})
+            config['post_worker_init'](worker)
+            assert bool(webapp.table_store.disabled) is refused
@@ -0,0 +1,78 @@
+"""
+Test file for the streaming file calculator (python main.py run)
+
+Run tests with: python -m pytest test_streaming.py
+"""
+
+import io
+import itertools
+import json
+
+import main
+import streaming
+
+
+def ndjson(*records, extra=''):
+    return io.StringIO(''.join(json.dumps(record) + '\n' for record in records) + extra)
+
+
+class TestStreaming:
+    """Test cases for streaming.run() and its helpers."""
+
+    def test_ndjson_results_in_order(self):
+        source = ndjson({'operation': 'add', 'num1': 1, 'num2': 2},
+                        {'operation': 'divide', 'num1': '1', 'num2': '0'},
+                        {'operation': 'factorial', 'num1': 25}, extra='not json\n')
+        sink = io.StringIO()
+        stats = streaming.run(source, sink)
+        assert [json.loads(line) for line in sink.getvalue().splitlines()] == [
+            {'success': True, 'result': 3},
+            {'success': False, 'error': 'Cannot divide by zero'},
+            {'success': True, 'result': '15511210043330985984000000'},
+            {'success': False, 'error': 'Unreadable record'},
+        ]
+        assert (stats.records, stats.errors) == (4, 2)
+        assert 'Processed 4 operations (2 failed)' in stats.summary()
+
+    def test_csv_in_and_out_with_mode(self):
+        source = io.StringIO('operation,num1,num2\ndivide,1,3\nsquare_root,9,\n')
+        sink = io.StringIO()
+        streaming.run(source, sink, input_format='csv', output_format='csv', mode='fraction')
+        assert sink.getvalue() == 'success,result,error\ntrue,1/3,\ntrue,3,\n'
+
+    def test_parallel_chunks_keep_input_order(self):
+        records = [{'operation': 'multiply', 'num1': i, 'num2': 2} for i in range(500)]
+        sink = io.StringIO()
+        stats = streaming.run(ndjson(*records), sink, chunk_size=7, workers=2)
+        assert stats.records == 500
+        assert [json.loads(line)['result'] for line in sink.getvalue().splitlines()] == \
+            [i * 2 for i in range(500)]
+
+    def test_chunks_are_lazy(self):
+        lines = (f'{i}\n' for i in itertools.count())
+        first = next(streaming.chunks(lines, 3))
+        assert first == ['0\n', '1\n', '2\n']
+
+
+def test_run_command(tmp_path, capsys):
+    source = tmp_path / 'ops.ndjson'
+    source.write_text('{"operation": "power", "num1": 2, "num2": 10}\n')
+    output = tmp_path / 'results.csv'
+    assert main.main(['run', '--input', str(source), '--output', str(output)]) == 0
+    assert output.read_text() == 'success,result,error\ntrue,1024,\n'
+    assert 'Processed 1 operations' in capsys.readouterr().err
+    assert main.main(['run', '--input', str(source), '--mode', 'decimal', '--precision', '0']) == 2
+
+
+def test_stats_command(tmp_path, capsys):
+    source = tmp_path / 'latency.csv'
+    source.write_text('host,ms\n' + ''.join(f'a,{i}\n' for i in range(1, 101)))
+    assert main.main(['stats', '--input', str(source), '--column', 'ms', '--percentiles', '0,100',
+                      '--bins', '4', '--chunk-size', '30', '--workers', '2']) == 0
+    out, err = capsys.readouterr()
+    summary = json.loads(out)
+    assert (summary['count'], summary['sum'], summary['mean']) == (100, 5050, 50.5)
+    assert summary['percentiles'] == {'0': 1, '100': 100}
+    assert summary['histogram']['counts'] == [25, 25, 25, 25]
+    assert 'Summarised 100 values' in err
+    assert main.main(['stats', '--input', str(source), '--column', 'nope']) == 2
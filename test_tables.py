@@ -0,0 +1,196 @@
+"""
+Test file for precomputed lookup tables
+
+Run tests with: python -m pytest test_tables.py
+"""
+
+import math
+from array import array
+
+import pytest
+
+import app as webapp
+from calculator import Calculator
+from numeric import get_mode
+from operations import InputError
+from tables import LookupTable, TableStore
+
+
+def build(name='t', operation='percentage', rows=(200, 50), columns=(10, 15, 20), **options):
+    return LookupTable.build(name, Calculator(), operation, list(rows),
+                             None if columns is None else list(columns), **options)
+
+
+class TestLookupTable:
+    """Test cases for LookupTable."""
+
+    def test_cells_match_calculator(self):
+        calc = Calculator()
+        table = build(rows=[200, '50', 12.5], columns=[10, '15', 2.5])
+        for i, a in enumerate([200, 50, 12.5]):
+            for j, b in enumerate([10, 15, 2.5]):
+                assert table.lookup(i, j) == calc.percentage(a, b)
+
+    def test_results_are_packed(self):
+        assert isinstance(build(operation='add')._values, array)
+        assert build(operation='add')._values.typecode == 'q'
+        assert build(operation='percentage')._values.typecode == 'd'
+        # Results past 2**53 are kept as the strings sent in JSON
+        table = build(operation='factorial', rows=[5, 30], columns=None)
+        assert table.lookup(0) == 120
+        assert table.lookup(1) == str(math.factorial(30))
+
+    def test_failed_cells_keep_their_error(self):
+        table = build(operation='divide', rows=[1, 2], columns=[0, 4])
+        assert table.lookup(1, 1) == 0.5
+        with pytest.raises(ValueError, match='divide by zero'):
+            table.lookup(0, 0)
+        assert table.describe()['errors'] == 2
+
+    def test_out_of_range(self):
+        table = build()
+        with pytest.raises(IndexError):
+            table.lookup(2, 0)
+        with pytest.raises(IndexError):
+            table.lookup(0, 3)
+
+    def test_unary_operations_take_no_columns(self):
+        table = build(operation='square_root', rows=[4, 9, -1], columns=None)
+        assert table.describe()['columns'] == 1
+        assert table.lookup(1) == 3.0
+        with pytest.raises(ValueError):
+            table.lookup(2)
+        with pytest.raises(InputError):
+            build(operation='square_root', rows=[4], columns=[1])
+
+    def test_bad_operands_reject_the_table(self):
+        with pytest.raises(InputError):
+            build(rows=[1, 'x'])
+        with pytest.raises(InputError):
+            build(rows=[])
+        with pytest.raises(InputError):
+            build(operation='add', columns=None)
+
+    def test_interrupted_calculations_are_not_stored(self, monkeypatch):
+        def interrupted(*args):
+            raise RuntimeError('Calculation was interrupted; please try again')
+        monkeypatch.setattr(Calculator, 'run', interrupted)
+        with pytest.raises(RuntimeError):
+            build()
+
+    def test_decimal_mode(self):
+        table = build(operation='divide', rows=[1], columns=[3], mode=get_mode('decimal', 10))
+        assert table.lookup(0, 0) == '0.3333333333'
+
+
+class TestTableStore:
+    """Test cases for TableStore."""
+
+    def test_memory_is_accounted(self):
+        store = TableStore()
+        first, second = build('a'), build('b', rows=range(100))
+        store.add(first)
+        store.add(second)
+        assert store.stats()['bytes'] == first.nbytes + second.nbytes
+        assert second.nbytes > first.nbytes
+        store.remove('a')
+        assert store.stats()['bytes'] == second.nbytes
+
+    def test_replacing_a_name(self):
+        store = TableStore()
+        store.add(build('a', rows=range(100)))
+        store.add(build('a'))
+        assert len(store) == 1
+        assert store.stats()['bytes'] == store.get('a').nbytes
+
+    def test_evicts_least_recently_used(self):
+        tables = [build(name) for name in 'abc']
+        store = TableStore(max_bytes=sum(table.nbytes for table in tables[:2]))
+        store.add(tables[0])
+        store.add(tables[1])
+        store.get('a')
+        assert store.add(tables[2]) == ['b']
+        assert 'a' in store and 'b' not in store and 'c' in store
+        assert store.stats()['evictions'] == 1
+
+    def test_limits(self):
+        store = TableStore(max_bytes=100, max_cells=10)
+        with pytest.raises(InputError):
+            store.check_size(4, 3)
+        store.check_size(5, 2)
+        with pytest.raises(InputError):
+            store.add(build())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(webapp, 'table_store', TableStore())
+    webapp.sessions.clear()
+    yield webapp.app.test_client()
+    webapp.sessions.clear()
+
+
+def test_register_and_look_up(client):
+    response = client.post('/tables', json={'name': 'rates', 'operation': 'percentage',
+                                            'rows': ['1200', 800], 'columns': [5, 7.5]})
+    assert response.status_code == 201
+    assert response.get_json()['cells'] == 4
+    assert client.get('/tables/rates/0/1').get_json() == {'success': True, 'result': 90.0}
+    assert client.get('/tables/rates/1').get_json()['result'] == 40.0
+    assert client.get('/tables/rates/2/0').status_code == 404
+    # Lookups are not calculations of the session
+    assert client.get('/history').get_json()['history'] == []
+
+
+def test_failed_cell(client):
+    client.post('/tables', json={'name': 'd', 'operation': 'divide', 'rows': [1], 'columns': [0]})
+    assert client.get('/tables/d/0/0').get_json() == {'success': False,
+                                                      'error': 'Cannot divide by zero'}
+
+
+def test_invalid_registrations(client):
+    body = {'name': 'ok', 'operation': 'add', 'rows': [1], 'columns': [2]}
+    for bad in ({'name': 'no spaces'}, {'rows': 'x'}, {'operation': 'nope'},
+                {'rows': [1] * 1000, 'columns': [1] * 1000}, {'rows': [[1]]},
+                {'columns': [{'n': 2}]}, {'operation': ['add']}, {'mode': ['x']}):
+        response = client.post('/tables', json=dict(body, **bad))
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+def test_build_failures(client, monkeypatch):
+    def interrupted(*args):
+        raise RuntimeError('Calculation was interrupted; please try again')
+    monkeypatch.setattr(Calculator, 'run', interrupted)
+    body = {'name': 'r', 'operation': 'add', 'rows': [1], 'columns': [2]}
+    response = client.post('/tables', json=body)
+    assert response.status_code == 503
+    assert response.get_json() == {'success': False,
+                                   'error': 'Calculation was interrupted; please try again'}
+
+    def broken(*args):
+        raise KeyError('registry')
+    monkeypatch.setattr(Calculator, 'run', broken)
+    response = client.post('/tables', json=body)
+    assert response.status_code == 500 and response.get_json()['success'] is False
+    assert client.get('/tables/r/0/0').status_code == 404
+
+
+def test_refused_when_disabled(client):
+    webapp.table_store.disabled = 'Lookup tables need a single worker process'
+    response = client.post('/tables', json={'name': 'r', 'operation': 'add',
+                                            'rows': [1], 'columns': [2]})
+    assert response.status_code == 409
+    assert response.get_json() == {'success': False,
+                                   'error': 'Lookup tables need a single worker process'}
+    assert len(webapp.table_store) == 0
+
+
+def test_list_and_delete(client):
+    client.post('/tables', json={'name': 'sq', 'operation': 'square_root', 'rows': [1, 4]})
+    listing = client.get('/tables').get_json()
+    assert [table['name'] for table in listing['tables']] == ['sq']
+    assert listing['stats']['tables'] == 1
+    assert client.delete('/tables/sq').get_json()['success'] is True
+    assert client.get('/tables/sq/0').status_code == 404
+    assert client.delete('/tables/sq').status_code == 404
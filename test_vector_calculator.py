@@ -0,0 +1,112 @@
+"""
+Test file for the NumPy-backed VectorCalculator
+
+Run tests with: python -m pytest test_vector_calculator.py
+"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from calculator import Calculator  # noqa: E402
+from factorial import FactorialEngine  # noqa: E402
+from offload import Offloader  # noqa: E402
+from vector_calculator import VectorCalculator  # noqa: E402
+
+
+class TestVectorCalculator:
+    """Test cases for array mode."""
+
+    def setup_method(self):
+        self.vec = VectorCalculator()
+
+    def test_calculator_exposes_vector(self):
+        calc = Calculator()
+        assert isinstance(calc.vector, VectorCalculator)
+        assert calc.vector is calc.vector
+
+    def test_basic_operations(self):
+        assert self.vec.add([1, 2, 3], [4, 5, 6]).tolist() == [5, 7, 9]
+        assert self.vec.subtract([5, 1], [3, 1]).tolist() == [2, 0]
+        assert self.vec.multiply([2.5, -2], [4, 3]).tolist() == [10.0, -6.0]
+        assert self.vec.divide([8, 1], [2, 3]).tolist() == pytest.approx([4.0, 1 / 3])
+        assert self.vec.percentage([100, 80], [25, 12.5]).tolist() == [25.0, 10.0]
+
+    def test_broadcasting(self):
+        assert self.vec.add([1, 2, 3], 10).tolist() == [11, 12, 13]
+        assert self.vec.multiply([[1], [2]], [1, 2]).tolist() == [[1, 2], [2, 4]]
+        with pytest.raises(ValueError):
+            self.vec.add([1, 2], [1, 2, 3])
+
+    def test_integer_overflow_falls_back_to_exact(self):
+        assert self.vec.multiply([2 ** 40], [2 ** 40]).tolist() == [2 ** 80]
+        assert self.vec.power([2, 3], [100, 2]).tolist() == [2 ** 100, 9]
+        assert self.vec.percentage([2 ** 62], [400]).tolist() == [float(2 ** 64)]
+
+    def test_power(self):
+        assert self.vec.power([2, 5, -2], [3, 0, 2]).tolist() == [8, 1, 4]
+        assert self.vec.power([9], [0.5]).tolist() == pytest.approx([3.0])
+        assert self.vec.power([2], [-1]).tolist() == [0.5]
+        assert self.vec.power([-8.0], [2.0]).tolist() == [64.0]
+
+    def test_power_negative_base_fractional_exponent(self):
+        with pytest.raises(ValueError, match="negative number to a fractional power"):
+            self.vec.power([4, -8], [0.5, 0.5])
+        with pytest.raises(ValueError, match="negative number to a fractional power"):
+            self.vec.power([-8.0], [float('nan')])
+
+    def test_float_overflow(self):
+        for name, a, b in (('add', [1.0, 1e308], [1.0, 1e308]), ('power', [10.0], [400]),
+                           ('multiply', [1e200], [1e200]), ('divide', [1e308], [1e-308]),
+                           ('percentage', [1e308], [1e10])):
+            with pytest.raises(OverflowError, match="Numerical result out of range"):
+                getattr(self.vec, name)(a, b)
+        # Infinite operands aren't an overflow
+        assert self.vec.add([math.inf], [1.0]).tolist() == [math.inf]
+
+    def test_divide_by_zero(self):
+        with pytest.raises(ValueError, match="Cannot divide by zero"):
+            self.vec.divide([5, 1], [1, 0])
+
+    def test_square_root(self):
+        assert self.vec.square_root([16, 2, 0]).tolist() == pytest.approx([4.0, 1.4142135623730951, 0.0])
+        with pytest.raises(ValueError, match="Cannot calculate square root of negative number"):
+            self.vec.square_root([4, -1])
+
+    def test_factorial(self):
+        assert self.vec.factorial([0, 1, 5, 3]).tolist() == [1, 1, 120, 6]
+        assert self.vec.factorial([25]).tolist() == [15511210043330985984000000]
+        with pytest.raises(ValueError):
+            self.vec.factorial([-1])
+        with pytest.raises(ValueError):
+            self.vec.factorial([3.5])
+
+    def test_factorial_limits(self):
+        vec = VectorCalculator(FactorialEngine(max_n=1000), Offloader(max_result_bits=15000))
+        assert vec.factorial([100, 200]).tolist()[1] == math.factorial(200)
+        with pytest.raises(ValueError, match='too large'):
+            vec.factorial([5, 1001])
+        # Each factorial is allowed, but together they exceed the size limit
+        with pytest.raises(ValueError, match='Result too large'):
+            vec.factorial([1000, 1000])
+
+    def test_power_size_limit(self):
+        vec = VectorCalculator(offloader=Offloader(max_result_bits=10000))
+        assert vec.power([2], [5000]).tolist() == [2 ** 5000]
+        with pytest.raises(ValueError, match='Result too large'):
+            vec.power([3], [5000000])
+        with pytest.raises(ValueError, match='Result too large'):
+            vec.power([2 ** 70], [200])
+        # Float powers are bounded, so they are not limited
+        assert vec.power([3.0], [500]).tolist() == [3.0 ** 500]
+
+    def test_calculator_shares_its_limits(self):
+        calc = Calculator(factorial_engine=FactorialEngine(max_n=50))
+        with pytest.raises(ValueError):
+            calc.vector.factorial([51])
+
+    def test_rejects_non_numeric(self):
+        with pytest.raises(ValueError):
+            self.vec.add(['a'], [1])
@@ -0,0 +1,180 @@
+"""
+Vectorized Calculator - NumPy-backed array mode
+
+Applies the Calculator operations to whole lists/arrays at once, with NumPy
+broadcasting between the operands. Errors follow the scalar rules checked in
+test_calculator.py: any zero divisor, negative square root or invalid
+factorial input rejects the whole call with a ValueError, and a float result
+that overflows rejects it with OverflowError, like a scalar float power (JSON
+has no infinity). The scalar limits apply too: FactorialEngine.max_n and time
+budget for factorials, and the Offloader's result size limit for exact
+integer powers and factorials (counted over the whole result array).
+"""
+
+import math
+
+from factorial import FactorialEngine
+from numeric import MAX_SAFE_INTEGER, to_json
+from operations import registry
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Largest magnitude that is safe to keep in int64 without overflow
+INT64_LIMIT = 2 ** 63
+# 20! is the largest factorial that fits in int64
+MAX_TABLE_FACTORIAL = 20
+
+
+class VectorCalculator:
+    """Array-aware counterpart of Calculator; every method returns an ndarray."""
+
+    def __init__(self, factorial_engine=None, offloader=None):
+        if np is None:
+            raise RuntimeError("Vector mode requires NumPy (pip install numpy)")
+        self.factorial_engine = factorial_engine or FactorialEngine()
+        # Optional Offloader whose max_result_bits bounds exact results
+        self.offloader = offloader
+        self._factorials = np.array(
+            [math.factorial(n) for n in range(MAX_TABLE_FACTORIAL + 1)], dtype=np.int64
+        )
+
+    def _operand(self, value):
+        """Convert a number, list or array into a numeric ndarray."""
+        array = np.asarray(value)
+        if array.dtype.kind == 'b':
+            array = array.astype(np.int64)
+        if array.dtype.kind == 'O':
+            if not all(isinstance(x, (int, float)) for x in array.flat):
+                raise ValueError("Operands must be numbers")
+        elif array.dtype.kind not in 'iuf':
+            raise ValueError("Operands must be numbers")
+        return array
+
+    def _operands(self, a, b):
+        a, b = self._operand(a), self._operand(b)
+        try:
+            np.broadcast_shapes(a.shape, b.shape)
+        except ValueError:
+            raise ValueError(f"Cannot broadcast shapes {a.shape} and {b.shape}")
+        return a, b
+
+    def _check_size(self, name, *operands):
+        """Raise ValueError if name's exact results would exceed the result size limit."""
+        if self.offloader is None:
+            return
+        cost = registry.get(name).cost
+        self.offloader.check(sum(cost(*map(_python, values)) for values in np.broadcast(*operands)))
+
+    def _widen(self, a, b, estimate):
+        """Switch integer operands to Python ints when int64 would overflow."""
+        if a.dtype.kind in 'iu' and b.dtype.kind in 'iu':
+            with np.errstate(over='ignore'):
+                if (np.abs(estimate) >= INT64_LIMIT).any():
+                    return a.astype(object), b.astype(object)
+        return a, b
+
+    def _finite(self, result, *operands):
+        """Return result, or raise OverflowError (as float arithmetic does for
+        scalars) where finite operands gave an infinite or NaN float."""
+        if result.dtype.kind != 'f':
+            return result
+        overflow = ~np.isfinite(result)
+        for operand in operands:
+            if operand.dtype.kind == 'f':
+                overflow &= np.isfinite(operand)
+        if overflow.any():
+            raise OverflowError("Numerical result out of range")
+        return result
+
+    def add(self, a, b):
+        a, b = self._operands(a, b)
+        with np.errstate(over='ignore', invalid='ignore'):
+            a, b = self._widen(a, b, np.abs(a.astype(float)) + np.abs(b.astype(float)))
+            return self._finite(a + b, a, b)
+
+    def subtract(self, a, b):
+        a, b = self._operands(a, b)
+        with np.errstate(over='ignore', invalid='ignore'):
+            a, b = self._widen(a, b, np.abs(a.astype(float)) + np.abs(b.astype(float)))
+            return self._finite(a - b, a, b)
+
+    def multiply(self, a, b):
+        a, b = self._operands(a, b)
+        with np.errstate(over='ignore', invalid='ignore'):
+            a, b = self._widen(a, b, a.astype(float) * b.astype(float))
+            return self._finite(a * b, a, b)
+
+    def divide(self, a, b):
+        a, b = self._operands(a, b)
+        if (b == 0).any():
+            raise ValueError("Cannot divide by zero")
+        with np.errstate(over='ignore', invalid='ignore'):
+            return self._finite(np.true_divide(a, b), a, b)
+
+    def power(self, a, b):
+        a, b = self._operands(a, b)
+        if b.dtype.kind == 'f' and ((a < 0) & (b != np.floor(b))).any():
+            # The results would be complex; NumPy would give NaN
+            raise ValueError("Cannot raise a negative number to a fractional power")
+        if a.dtype.kind in 'iuO' and b.dtype.kind in 'iuO':
+            # Exact integer powers grow with the exponent
+            self._check_size('power', a, b)
+        if a.dtype.kind in 'iu' and b.dtype.kind in 'iu':
+            if (b < 0).any():
+                # NumPy refuses negative integer exponents on integer arrays
+                a = a.astype(float)
+            else:
+                with np.errstate(over='ignore'):
+                    a, b = self._widen(a, b, np.abs(a.astype(float)) ** b.astype(float))
+        with np.errstate(over='ignore', invalid='ignore'):
+            return self._finite(a ** b, a, b)
+
+    def square_root(self, a):
+        a = self._operand(a)
+        if (a < 0).any():
+            raise ValueError("Cannot calculate square root of negative number")
+        return np.sqrt(a.astype(float))
+
+    def factorial(self, a):
+        a = self._operand(a)
+        if a.dtype.kind == 'f':
+            if not np.isfinite(a).all() or (a != np.floor(a)).any():
+                raise ValueError("Factorial requires an integer")
+            a = a.astype(np.int64)
+        elif a.dtype.kind == 'O':
+            if not all(isinstance(x, int) or float(x).is_integer() for x in a.flat):
+                raise ValueError("Factorial requires an integer")
+            a = np.frompyfunc(int, 1, 1)(a)
+        if (a < 0).any():
+            raise ValueError("Cannot calculate factorial of negative number")
+        if a.size and a.max() > MAX_TABLE_FACTORIAL:
+            engine = self.factorial_engine
+            engine.check(int(a.max()))
+            self._check_size('factorial', a)
+            # Beyond int64 range: exact big-int factorials element by element
+            return np.frompyfunc(lambda n: engine.factorial(int(n)), 1, 1)(a).astype(object)
+        return self._factorials[a.astype(np.intp)]
+
+    def percentage(self, a, b):
+        a, b = self._operands(a, b)
+        with np.errstate(over='ignore', invalid='ignore'):
+            a, b = self._widen(a, b, a.astype(float) * b.astype(float))
+            return self._finite(np.multiply(a, b) / 100, a, b)
+
+
+def _python(value):
+    """A NumPy scalar as the Python number the scalar operations expect."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def to_list(array):
+    """Convert a result array into JSON-friendly Python values."""
+    array = np.asarray(array)
+    if array.dtype.kind == 'O' or (array.dtype.kind in 'iu' and array.size
+                                   and int(np.abs(array).max()) > MAX_SAFE_INTEGER):
+        # Integers beyond 2**53 go out as strings, like scalar results
+        return np.frompyfunc(to_json, 1, 1)(array.astype(object)).tolist()
+    return array.tolist()
@@ -0,0 +1,9 @@
+"""
+WSGI entry point for production servers
+
+Usage: gunicorn --config gunicorn.conf.py wsgi:app
+"""
+
+from app import app
+
+application = app